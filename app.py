@@ -1,17 +1,42 @@
-import json
-import os, subprocess, contextlib, tarfile, shutil, time
+import json, hashlib, gzip, zlib, re, argparse
+import os, subprocess, contextlib, tarfile, shutil, time, itertools, uuid, threading, fnmatch, base64, mmap, tempfile, math, bisect
+import socket, struct, random, zipfile, urllib.request, urllib.error, contextvars, fcntl, errno
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait as wait_futures
 from pathlib import Path
-from threading import Lock
-from datetime import datetime
+from stat import S_ISREG, S_ISLNK, S_IMODE
+from array import array
+from threading import Lock, Condition, Event, Thread
+from datetime import datetime, timedelta
 
 from functools import wraps
-from flask import Flask, Response, request, jsonify, render_template, redirect, url_for, session
+from flask import Flask, Response, request, jsonify, render_template, redirect, url_for, session, send_file, g
+from werkzeug import formparser
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.security import check_password_hash, generate_password_hash
 from dotenv import load_dotenv
 
+try:
+    import re._parser as _re_parser
+except ImportError:  # Python < 3.11
+    import sre_parse as _re_parser
+try:
+    import zstandard
+except ImportError:  # optional: zstd backups fall back to gzip
+    zstandard = None
+try:
+    import lz4.frame as lz4frame
+except ImportError:  # optional: lz4 backups fall back to gzip
+    lz4frame = None
+try:
+    import gunicorn
+except ImportError:  # optional: `serve` falls back to Werkzeug's threaded server
+    gunicorn = None
+
 BASE_DIR = Path(__file__).resolve().parent
 load_dotenv(BASE_DIR / ".env")
 CONFIG_FILE = Path(os.environ.get("RUSTPANEL_CONFIG_FILE", BASE_DIR / "config.json")).expanduser()
+CACHE_DIR = Path(os.environ.get("RUSTPANEL_CACHE_DIR", BASE_DIR / "cache")).expanduser()
 
 # === CONFIGURATION ===
 AUTH_TOKEN = os.environ.get("RUSTPANEL_TOKEN", "")  # optional token
@@ -32,11 +57,49 @@ DEFAULT_CONFIG = {
     "rust_dir": _default_rust_dir,
     "file_root": _default_file_root,
     "auto_download_rust_with_oxide": False,
+    "backup_mode": "incremental",
+    "backup_compression": "gzip",
+    "backup_level": 3,
+    "backup_threads": 0,  # 0 = half of the available cores
+    "backup_low_priority": True,
+    "rcon_host": os.environ.get("RUST_RCON_HOST", "127.0.0.1"),
+    "rcon_port": int(os.environ.get("RUST_RCON_PORT", "28016")),
+    "rcon_password": os.environ.get("RUST_RCON_PASSWORD", ""),  # empty disables RCON
+    "schedules": [],
+    "backup_retention": {"hourly": 0, "daily": 0, "weekly": 0, "scope": "auto"},  # 0/0/0 keeps everything
+    "server_identity": os.environ.get("RUST_IDENTITY", ""),  # empty: the only directory under server/
+    "save_snapshot_keep": 48,  # newest save snapshots kept; 0 keeps all
+    "alert_rules": [],
+    "alert_webhook": "",  # Discord/Slack-compatible webhook URL; empty disables
+    "alert_file": "",  # append alerts as JSON lines to this file; empty disables
+    "instances": {},  # further servers: name -> settings that differ from the ones above
+}
+
+_CHOICE_SETTINGS = {
+    "backup_mode": {"incremental", "archive"},
+    "backup_compression": {"gzip", "zstd", "lz4", "none"},
+}
+_BOOL_SETTINGS = {"auto_download_rust_with_oxide", "backup_low_priority"}
+_INT_SETTINGS = {
+    "backup_level": (0, 22),
+    "backup_threads": (0, 64),
+    "rcon_port": (1, 65535),
+    "save_snapshot_keep": (0, 10000),
 }
+_OPTIONAL_SETTINGS = {"rcon_password", "alert_webhook", "alert_file", "server_identity"}
+_STRUCTURED_SETTINGS = {"schedules", "backup_retention", "alert_rules"}  # validated by _validate_structured
+_SECRET_SETTINGS = {"rcon_password", "alert_webhook"}  # never sent back to the browser (webhook URLs embed a token)
 
 _CONFIG_LOCK = Lock()
 
+SSE_KEEPALIVE = 15  # seconds between SSE comments on an idle stream
+
 BACKUP_DIR_NAME = "backups"
+BACKUP_STORE_NAME = ".store"  # content-addressed chunks shared by incremental backups
+ARCHIVE_SUFFIX = ".tar.gz"
+ARCHIVE_SUFFIXES = (".tar.gz", ".tar.zst", ".tar.lz4", ".tar")
+SNAPSHOT_SUFFIX = ".snap"
+BACKUP_CHUNK_SIZE = 4 * 1024 * 1024
 _BACKUP_ALLOWED = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_.")
 
 def _load_config_file() -> dict:
@@ -50,12 +113,15 @@ def _load_config_file() -> dict:
             for key in cfg:
                 if key in data:
                     cfg[key] = data[key]
+    if not isinstance(cfg["instances"], dict):
+        cfg["instances"] = {}
     return cfg
 
 def _persist_config(cfg: dict) -> None:
     CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
     tmp = CONFIG_FILE.with_suffix(CONFIG_FILE.suffix + ".tmp")
     tmp.write_text(json.dumps(cfg, indent=2, sort_keys=True))
+    os.chmod(tmp, 0o600)  # holds the RCON password
     tmp.replace(CONFIG_FILE)
 
 def _normalize_paths(value: str, *, field: str) -> str:
@@ -73,33 +139,115 @@ def _coerce_bool(value) -> bool:
         return value.strip().lower() in {"1", "true", "yes", "on"}
     return bool(value)
 
-def _update_config(updates: dict) -> dict:
-    global CONFIG
+def _coerce_int(value, key: str, low: int, high: int) -> int:
+    try:
+        number = int(str(value).strip())
+    except ValueError:
+        raise ValueError(f"{key.replace('_', ' ').title()} must be a whole number") from None
+    if not low <= number <= high:
+        raise ValueError(f"{key.replace('_', ' ').title()} must be between {low} and {high}")
+    return number
+
+def _validated_settings(base: dict, updates: dict) -> dict:
+    """Return `base` with `updates` applied, raising ValueError for the first bad value."""
+    cfg = dict(base)
+    for key, value in updates.items():
+        if key not in DEFAULT_CONFIG or key == "instances":
+            raise ValueError(f"Unknown setting: {key}")
+        if key in _BOOL_SETTINGS:
+            cfg[key] = _coerce_bool(value)
+            continue
+        if key in _INT_SETTINGS:
+            cfg[key] = _coerce_int(value, key, *_INT_SETTINGS[key])
+            continue
+        if key in _STRUCTURED_SETTINGS:
+            cfg[key] = _validate_structured(key, value)
+            continue
+        if not isinstance(value, str):
+            raise ValueError(f"{key} must be a string")
+        if key in _CHOICE_SETTINGS:
+            value = value.strip().lower()
+            if value not in _CHOICE_SETTINGS[key]:
+                choices = ", ".join(sorted(_CHOICE_SETTINGS[key]))
+                raise ValueError(f"{key.replace('_', ' ').title()} must be one of: {choices}")
+            cfg[key] = value
+            continue
+        if key in {"steam_home", "steamcmd", "rust_dir", "file_root"}:
+            cfg[key] = _normalize_paths(value, field=key.replace("_", " ").title())
+        else:
+            value = value.strip()
+            if not value and key not in _OPTIONAL_SETTINGS:
+                raise ValueError(f"{key.replace('_', ' ').title()} is required")
+            if key == "alert_webhook" and value and not value.startswith(("http://", "https://")):
+                raise ValueError("Alert webhook must be an http(s) URL")
+            if key == "server_identity" and (value in {".", ".."} or "/" in value):
+                raise ValueError("Server identity must be a directory name under server/")
+            cfg[key] = value
+    return cfg
+
+def _update_config(updates: dict, server: str | None = None) -> dict:
+    """Validate and store `updates` for one server (the current one by default)."""
     with _CONFIG_LOCK:
+        inst = _inst(server)
+        changed = {key: value for key, value in _validated_settings(inst.cfg, updates).items() if key in updates}
         cfg = dict(CONFIG)
-        for key, value in updates.items():
-            if key not in DEFAULT_CONFIG:
-                raise ValueError(f"Unknown setting: {key}")
-            if key == "auto_download_rust_with_oxide":
-                cfg[key] = _coerce_bool(value)
-                continue
-            if not isinstance(value, str):
-                raise ValueError(f"{key} must be a string")
-            if key in {"steam_home", "steamcmd", "rust_dir", "file_root"}:
-                cfg[key] = _normalize_paths(value, field=key.replace("_", " ").title())
-            else:
-                value = value.strip()
-                if not value:
-                    raise ValueError(f"{key.replace('_', ' ').title()} is required")
-                cfg[key] = value
-        CONFIG = cfg
-        _apply_config(CONFIG)
-        _persist_config(CONFIG)
-        return dict(CONFIG)
+        if inst.name == DEFAULT_INSTANCE:
+            cfg.update(changed)
+        else:
+            cfg.update({key: value for key, value in changed.items() if key in _GLOBAL_SETTINGS})
+            overrides = {**CONFIG["instances"][inst.name],
+                         **{key: value for key, value in changed.items() if key not in _GLOBAL_SETTINGS}}
+            cfg["instances"] = {**CONFIG["instances"], inst.name: overrides}
+        _commit_config(cfg)
+        return dict(_INSTANCES[inst.name].cfg)
 
-def _get_config() -> dict:
+def _save_instance(name: str, settings: dict) -> dict:
+    """Create or update an additional server; `settings` override the default server's."""
+    if name == DEFAULT_INSTANCE:
+        return _update_config(settings, DEFAULT_INSTANCE)
+    if not _INSTANCE_NAME.match(name):
+        raise ValueError("Server name must be 1-32 lowercase letters, digits, '-' or '_'")
+    if name in _reserved_instance_names():
+        raise ValueError(f"Server name {name!r} is reserved")
+    local = [key for key in settings if key in _GLOBAL_SETTINGS]
+    if local:
+        raise ValueError(f"{', '.join(local)} cannot be set per server")
+    with _CONFIG_LOCK:
+        existing = CONFIG["instances"].get(name)
+        if existing is None and not {"service", "file_root"} <= settings.keys():
+            raise ValueError("A new server needs at least a service and a file_root")
+        base = _INSTANCES[name].cfg if existing is not None else _INSTANCES[DEFAULT_INSTANCE].cfg
+        validated = _validated_settings(base, settings)
+        overrides = {**(existing or {}), **{key: validated[key] for key in settings}}
+        _commit_config({**CONFIG, "instances": {**CONFIG["instances"], name: overrides}})
+        return dict(_INSTANCES[name].cfg)
+
+def _delete_instance(name: str) -> None:
     with _CONFIG_LOCK:
-        return dict(CONFIG)
+        if name not in CONFIG["instances"]:
+            raise KeyError(name)
+        _commit_config({**CONFIG, "instances": {k: v for k, v in CONFIG["instances"].items() if k != name}})
+
+def _commit_config(cfg: dict) -> None:
+    """Make `cfg` the live configuration; callers hold _CONFIG_LOCK."""
+    global CONFIG, _INSTANCES
+    instances = _build_instances(cfg)
+    seen: dict[str, str] = {}
+    for inst in instances.values():
+        if inst.service in seen:
+            raise ValueError(f"Servers {seen[inst.service]} and {inst.name} use the same service {inst.service}")
+        seen[inst.service] = inst.name
+    CONFIG, _INSTANCES = cfg, instances
+    _persist_config(CONFIG)
+    _sync_instances()
+
+def _get_config() -> dict:
+    return dict(_inst().cfg)
+
+def _public_config(cfg: dict) -> dict:
+    public = {k: v for k, v in cfg.items() if k not in _SECRET_SETTINGS and k != "instances"}
+    public.update({f"{k}_set": bool(cfg.get(k)) for k in _SECRET_SETTINGS})
+    return public
 
 def _build_script_env(cfg: dict, file_root: Path) -> dict:
     env = os.environ.copy()
@@ -115,22 +263,57 @@ def _build_script_env(cfg: dict, file_root: Path) -> dict:
     )
     return env
 
-def _apply_config(cfg: dict) -> None:
-    global SERVICE, STEAM_USER, STEAM_HOME, STEAMCMD, RUST_DIR, FILE_ROOT, SCRIPT_ENV
-    SERVICE = cfg["service"]
-    STEAM_USER = cfg["steam_user"]
-    STEAM_HOME = cfg["steam_home"]
-    STEAMCMD = cfg["steamcmd"]
-    RUST_DIR = cfg["rust_dir"]
-    FILE_ROOT = Path(cfg["file_root"]).expanduser().resolve()
-    SCRIPT_ENV = _build_script_env(cfg, FILE_ROOT)
+# --- Instances ---
+# One panel can drive several Rust servers. The top-level settings describe
+# the "default" server; `instances` maps further server names to the settings
+# they override. Routes under /api/<server>/... act on that server, plain
+# /api/... on the default one. The current server lives in a context
+# variable that requests, jobs and the scheduler set before doing any work.
+DEFAULT_INSTANCE = "default"
+_INSTANCE_NAME = re.compile(r"^[a-z0-9][a-z0-9_-]{0,31}$")
+_GLOBAL_SETTINGS = {"instances", "alert_rules", "alert_webhook", "alert_file"}  # panel-wide, never per server
+
+class _Instance:
+    """One managed server: its resolved settings and the values derived from them."""
+
+    def __init__(self, name: str, cfg: dict):
+        self.name = name
+        self.cfg = cfg
+        self.service = cfg["service"]
+        self.file_root = Path(cfg["file_root"]).expanduser().resolve()
+        self.env = _build_script_env(cfg, self.file_root)
+
+def _build_instances(cfg: dict) -> dict[str, _Instance]:
+    base = {k: v for k, v in cfg.items() if k != "instances"}
+    instances = {DEFAULT_INSTANCE: _Instance(DEFAULT_INSTANCE, base)}
+    for name, overrides in (cfg.get("instances") or {}).items():
+        if not isinstance(overrides, dict) or name == DEFAULT_INSTANCE:
+            continue
+        own = {k: v for k, v in overrides.items() if k in DEFAULT_CONFIG and k not in _GLOBAL_SETTINGS}
+        instances[name] = _Instance(name, {**base, **own})
+    return instances
+
+_CURRENT_INSTANCE: contextvars.ContextVar[str | None] = contextvars.ContextVar("rustpanel_instance", default=None)
+
+def _inst(name: str | None = None) -> _Instance:
+    """The named server, or the one the current request/job/schedule is working on."""
+    name = name or _CURRENT_INSTANCE.get() or DEFAULT_INSTANCE
+    try:
+        return _INSTANCES[name]
+    except KeyError:
+        raise ValueError(f"Unknown server: {name}") from None
+
+@contextlib.contextmanager
+def _using_instance(name: str):
+    token = _CURRENT_INSTANCE.set(name)
+    try:
+        yield _inst(name)
+    finally:
+        _CURRENT_INSTANCE.reset(token)
 
 
 CONFIG = _load_config_file()
-SCRIPT_ENV: dict[str, str]
-SERVICE = STEAM_USER = STEAM_HOME = STEAMCMD = RUST_DIR = ""
-FILE_ROOT = Path(DEFAULT_CONFIG["file_root"]).expanduser().resolve()
-_apply_config(CONFIG)
+_INSTANCES = _build_instances(CONFIG)
 
 PANEL_USER = os.environ.get("RUSTPANEL_USER", "admin")
 _password_hash = os.environ.get("RUSTPANEL_PASSWORD_HASH", "")
@@ -149,6 +332,38 @@ app = Flask(__name__, template_folder=str(TEMPLATE_DIR), static_folder=str(STATI
 app.secret_key = SECRET
 app.config.update(SESSION_COOKIE_HTTPONLY=True, SESSION_COOKIE_SAMESITE="Lax")
 
+class _InstancePrefix:
+    """Serve /api/<server>/... with the /api/... views, recording which server was asked for."""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        parts = environ.get("PATH_INFO", "").split("/", 3)  # "", "api", <server>, rest
+        if len(parts) > 2 and parts[1] == "api" and parts[2] in _INSTANCES:
+            environ["rustpanel.instance"] = parts[2]
+            environ["PATH_INFO"] = "/api/" + (parts[3] if len(parts) > 3 else "")
+        return self.wsgi_app(environ, start_response)
+
+app.wsgi_app = _InstancePrefix(app.wsgi_app)
+
+@app.before_request
+def _bind_instance():
+    # Pages take ?server=; the API takes it as a path prefix.
+    name = request.environ.get("rustpanel.instance") or request.args.get("server") or DEFAULT_INSTANCE
+    if name not in _INSTANCES:
+        return jsonify({"ok": False, "error": f"unknown server: {name}"}), 404
+    _CURRENT_INSTANCE.set(name)
+
+def _reserved_instance_names() -> set[str]:
+    """First path segments of the API, which a server name must not shadow."""
+    names = {"start", "stop", "restart", DEFAULT_INSTANCE}
+    for rule in app.url_map.iter_rules():
+        parts = rule.rule.split("/")
+        if len(parts) > 2 and parts[1] == "api" and not parts[2].startswith("<"):
+            names.add(parts[2])
+    return names
+
 # === HELPERS ===
 def _authorized(req):
     """Check session login or token header"""
@@ -156,6 +371,8 @@ def _authorized(req):
         return True
     if AUTH_TOKEN and req.headers.get("X-Auth-Token") == AUTH_TOKEN:
         return True
+    if AUTH_TOKEN and req.headers.get("Authorization") == f"Bearer {AUTH_TOKEN}":
+        return True  # Prometheus `authorization` / bearer_token scrape configs
     return False
 
 def _login_required(view):
@@ -168,37 +385,282 @@ def _login_required(view):
 
 def _run(cmd: list[str]):
     """Run shell command and return (code, output)"""
-    p = subprocess.run(cmd, capture_output=True, text=True, env=SCRIPT_ENV)
+    started = time.perf_counter()
+    p = subprocess.run(cmd, capture_output=True, text=True, env=_inst().env)
+    _SPAWNS.observe(time.perf_counter() - started, _spawn_label(cmd))
     return p.returncode, (p.stdout or p.stderr or "").strip()
 
+class _LineRing:
+    """Bounded, sequence-numbered line buffer that any number of readers can follow."""
+
+    def __init__(self, size: int):
+        self._cond = Condition()
+        self._ring: deque[tuple[int, str]] = deque(maxlen=size)
+        self._seq = 0
+        self.closed = False
+
+    @property
+    def head(self) -> int:
+        with self._cond:
+            return self._seq
+
+    def append(self, line: str) -> None:
+        with self._cond:
+            self._seq += 1
+            self._ring.append((self._seq, line))
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def read_after(self, cursor: int, backlog: int | None = None) -> tuple[int, list[tuple[int, str]]]:
+        """Return the cursor to continue from and the lines newer than `cursor`."""
+        with self._cond:
+            if backlog is not None:
+                cursor = max(cursor, self._seq - backlog)
+            if not self._ring or cursor >= self._seq:
+                return self._seq, []
+            start = max(cursor + 1 - self._ring[0][0], 0)
+            return self._seq, list(itertools.islice(self._ring, start, None))
+
+    def follow(self, cursor: int, backlog: int | None = None, keepalive: float = SSE_KEEPALIVE):
+        """Yield `(seq, line)` pairs after `cursor`, or `None` on an idle tick, until closed."""
+        cursor, lines = self.read_after(cursor, backlog)
+        yield from lines
+        while True:
+            with self._cond:
+                ready = self._cond.wait_for(lambda: self._seq > cursor or self.closed, timeout=keepalive)
+                done = self.closed and self._seq <= cursor
+            if done:
+                return
+            if not ready:
+                yield None
+                continue
+            cursor, lines = self.read_after(cursor)
+            yield from lines
+
+def _sse_lines(ring: _LineRing, cursor: int, backlog: int | None = None):
+    for item in ring.follow(cursor, backlog):
+        if item is None:
+            yield ": keepalive\n\n"
+            continue
+        seq, line = item
+        yield f"id: {seq}\ndata: {line}\n\n"
+
+def _parse_event_id(value: str | None) -> int | None:
+    if not value:
+        return None
+    try:
+        return max(int(value), 0)
+    except ValueError:
+        return None
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+# Every open stream holds a request thread; past this many (0 = no cap) new
+# streams are refused so plain API calls always find a free thread.
+SSE_MAX_STREAMS = int(os.environ.get("RUSTPANEL_MAX_STREAMS", "0"))
+_SSE_LOCK = Lock()
+_SSE_OPEN = 0
+
+def _sse_response(stream):
+    """Return an event-stream response, or 503 when the stream cap is reached."""
+    global _SSE_OPEN
+    with _SSE_LOCK:
+        if SSE_MAX_STREAMS and _SSE_OPEN >= SSE_MAX_STREAMS:
+            return jsonify({"ok": False, "error": "too many open streams"}), 503
+        _SSE_OPEN += 1
+
+    def release():
+        global _SSE_OPEN
+        with _SSE_LOCK:
+            _SSE_OPEN -= 1
+
+    # call_on_close runs even when the generator is never started.
+    response = Response(stream, mimetype="text/event-stream", headers=SSE_HEADERS)
+    response.call_on_close(release)
+    return response
+
+class _Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, labels: tuple[str, ...], buckets: tuple[float, ...]):
+        self.labels = labels
+        self.buckets = buckets
+        self._lock = Lock()
+        self._series: dict[tuple, list] = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, *label_values) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            for i in range(index, len(self.buckets)):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self) -> list[tuple[dict, list]]:
+        with self._lock:
+            return [(dict(zip(self.labels, key)), list(series)) for key, series in self._series.items()]
+
+    def quantile(self, series: list, q: float) -> float | None:
+        """Upper bucket bound holding the q-th observation of a snapshot series (None past the last bucket)."""
+        rank = q * series[-1]
+        for bound, count in zip(self.buckets, series):
+            if count >= rank:
+                return bound
+        return None
+
+# Every short-lived child the panel forks (systemctl, update checks, job
+# steps), labelled by the program it runs, so fork rates show up in
+# /metrics and /api/admin/stats.
+SPAWN_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 10, 60, 600)
+_SPAWNS = _Histogram(("program",), SPAWN_BUCKETS)
+
+def _spawn_label(cmd: list[str]) -> str:
+    args = list(cmd)
+    while args and (args[0] == "sudo" or args[0].startswith("-")):
+        args.pop(0)
+    return os.path.basename(args[0]) if args else "unknown"
+
 def _safe_path(rel: str) -> Path:
-    """Return a safe absolute path within FILE_ROOT."""
-    candidate = (FILE_ROOT / rel).resolve()
-    if FILE_ROOT not in candidate.parents and candidate != FILE_ROOT:
+    """Return a safe absolute path within the current server's file root."""
+    root = _inst().file_root
+    candidate = (root / rel).resolve()
+    if root not in candidate.parents and candidate != root:
         raise ValueError("invalid path")
     return candidate
 
 def _relative(path: Path) -> str:
-    rel = str(path.relative_to(FILE_ROOT))
+    rel = str(path.relative_to(_inst().file_root))
     return "" if rel == "." else rel
 
-def _list_entries(path: Path):
-    entries = []
+# Directory listings are cached per path and validated against the
+# directory's own mtime/inode, which change whenever an entry is added,
+# removed or renamed. File sizes and mtimes are not covered by that, so
+# they are re-read for the returned page (or briefly cached when sorting
+# needs them for every entry).
+FS_LIST_CACHE_SIZE = 256
+FS_STAT_TTL = 5.0
+FS_PAGE_SIZE = 500
+FS_PAGE_MAX = 5000
+FS_SORT_KEYS = {"name", "size", "modified"}
+
+class _DirListing:
+    def __init__(self, version: tuple, names: list[tuple[str, bool]]):
+        self.version = version
+        self.names = names  # (name, is_dir)
+        self.stats: dict[str, tuple[int | None, float | None]] = {}
+        self.stats_at = 0.0
+        self.views: dict[tuple, list[tuple[str, bool]]] = {}
+        self.lock = Lock()
+
+_DIR_CACHE: "OrderedDict[str, _DirListing]" = OrderedDict()
+_DIR_CACHE_LOCK = Lock()
+
+def _dir_listing(path: Path) -> _DirListing:
+    st = path.stat()
+    version = (st.st_mtime_ns, st.st_ino, st.st_dev)
+    key = str(path)
+    with _DIR_CACHE_LOCK:
+        listing = _DIR_CACHE.get(key)
+        if listing is not None and listing.version == version:
+            _DIR_CACHE.move_to_end(key)
+            return listing
     with os.scandir(path) as it:
-        entries_iter = sorted(it, key=lambda e: (not e.is_dir(follow_symlinks=False), e.name.lower()))
-        for entry in entries_iter:
-            is_dir = entry.is_dir(follow_symlinks=False)
-            info = {
-                "name": entry.name,
-                "is_dir": is_dir,
-            }
-            if not is_dir and entry.is_file(follow_symlinks=False):
-                try:
-                    info["size"] = entry.stat(follow_symlinks=False).st_size
-                except OSError:
-                    info["size"] = None
-            entries.append(info)
-    return entries
+        # d_type answers is_dir without a stat() per entry.
+        names = [(entry.name, entry.is_dir(follow_symlinks=False)) for entry in it]
+    listing = _DirListing(version, names)
+    with _DIR_CACHE_LOCK:
+        _DIR_CACHE[key] = listing
+        _DIR_CACHE.move_to_end(key)
+        while len(_DIR_CACHE) > FS_LIST_CACHE_SIZE:
+            _DIR_CACHE.popitem(last=False)
+    return listing
+
+def _stat_entry(path: Path, name: str, is_dir: bool) -> tuple[int | None, float | None]:
+    try:
+        st = os.stat(path / name, follow_symlinks=False)
+    except OSError:
+        return None, None
+    if is_dir or not S_ISREG(st.st_mode):
+        return None, st.st_mtime
+    return st.st_size, st.st_mtime
+
+def _listing_stats(path: Path, listing: _DirListing) -> dict:
+    now = time.monotonic()
+    if now - listing.stats_at > FS_STAT_TTL:
+        listing.stats = {name: _stat_entry(path, name, is_dir) for name, is_dir in listing.names}
+        listing.stats_at = now
+        # Views sorted by size/mtime were built from the old stats.
+        listing.views = {k: v for k, v in listing.views.items() if k[0] == "name"}
+    return listing.stats
+
+def _name_matcher(query: str):
+    query = query.lower()
+    if any(ch in query for ch in "*?["):
+        return lambda name: fnmatch.fnmatchcase(name.lower(), query)
+    return lambda name: query in name.lower()
+
+def _sorted_view(path: Path, listing: _DirListing, sort: str, descending: bool, query: str) -> list:
+    with listing.lock:
+        if sort != "name":
+            stats = _listing_stats(path, listing)
+        key = (sort, descending, query)
+        view = listing.views.get(key)
+        if view is not None:
+            return view
+        names = listing.names
+        if query:
+            match = _name_matcher(query)
+            names = [item for item in names if match(item[0])]
+        if sort == "name":
+            sort_key = lambda item: (item[0].lower(), item[0])
+        else:
+            index = 0 if sort == "size" else 1
+            sort_key = lambda item: (stats.get(item[0], (None, None))[index] or 0, item[0].lower())
+        dirs = sorted((item for item in names if item[1]), key=sort_key, reverse=descending)
+        files = sorted((item for item in names if not item[1]), key=sort_key, reverse=descending)
+        view = dirs + files
+        if len(listing.views) >= 8:
+            listing.views.pop(next(iter(listing.views)))
+        listing.views[key] = view
+        return view
+
+def _encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(str(offset).encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> int:
+    if not cursor:
+        return 0
+    try:
+        return max(int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))), 0)
+    except ValueError:
+        raise ValueError("invalid cursor") from None
+
+def _list_entries(path: Path, *, sort: str = "name", descending: bool = False, query: str = "",
+                  cursor: str = "", limit: int = FS_PAGE_SIZE) -> dict:
+    """Return one page of a directory listing, directories first."""
+    listing = _dir_listing(path)
+    offset = _decode_cursor(cursor)
+    view = _sorted_view(path, listing, sort, descending, query)
+    page = view[offset:offset + limit]
+    entries = []
+    for name, is_dir in page:
+        size, modified = _stat_entry(path, name, is_dir)
+        info = {"name": name, "is_dir": is_dir, "modified": modified}
+        if not is_dir:
+            info["size"] = size
+        entries.append(info)
+    end = offset + len(page)
+    return {
+        "entries": entries,
+        "total": len(view),
+        "next_cursor": _encode_cursor(end) if end < len(view) else None,
+    }
 
 # === ROUTES ===
 @app.route("/")
@@ -209,10 +671,12 @@ def index():
         "index.html",
         service=cfg["service"],
         token_set=bool(AUTH_TOKEN),
-        file_root=str(FILE_ROOT),
+        file_root=str(_inst().file_root),
         auto_download=cfg["auto_download_rust_with_oxide"],
         default_oxide_url=DEFAULT_OXIDE_ZIP,
         backups_path='/' + BACKUP_DIR_NAME,
+        server=_inst().name,
+        servers=list(_INSTANCES),
     )
 
 
@@ -252,16 +716,46 @@ def config_page():
             "rust_dir": request.form.get("rust_dir", ""),
             "file_root": request.form.get("file_root", ""),
             "auto_download_rust_with_oxide": request.form.get("auto_download_rust_with_oxide", "off"),
+            "backup_mode": request.form.get("backup_mode", cfg["backup_mode"]),
+            "backup_compression": request.form.get("backup_compression", cfg["backup_compression"]),
+            "backup_level": request.form.get("backup_level", str(cfg["backup_level"])),
+            "backup_threads": request.form.get("backup_threads", str(cfg["backup_threads"])),
+            "backup_low_priority": request.form.get("backup_low_priority", "off"),
+            "server_identity": request.form.get("server_identity", cfg["server_identity"]),
+            "save_snapshot_keep": request.form.get("save_snapshot_keep", str(cfg["save_snapshot_keep"])),
+            "rcon_host": request.form.get("rcon_host", cfg["rcon_host"]),
+            "rcon_port": request.form.get("rcon_port", str(cfg["rcon_port"])),
+            "schedules": request.form.get("schedules", json.dumps(cfg["schedules"])),
+            "backup_retention": {
+                "hourly": request.form.get("retention_hourly", cfg["backup_retention"]["hourly"]),
+                "daily": request.form.get("retention_daily", cfg["backup_retention"]["daily"]),
+                "weekly": request.form.get("retention_weekly", cfg["backup_retention"]["weekly"]),
+                "scope": request.form.get("retention_scope", cfg["backup_retention"]["scope"]),
+            },
         }
+        # A blank password field keeps the stored password.
+        if request.form.get("rcon_password"):
+            updates["rcon_password"] = request.form["rcon_password"]
+        if request.form.get("rcon_password_clear"):
+            updates["rcon_password"] = ""
+        if "alert_rules" in request.form:
+            updates["alert_rules"] = request.form["alert_rules"]
+            updates["alert_file"] = request.form.get("alert_file", "")
+        if request.form.get("alert_webhook"):
+            updates["alert_webhook"] = request.form["alert_webhook"]
+        if request.form.get("alert_webhook_clear"):
+            updates["alert_webhook"] = ""
         try:
             cfg = _update_config(updates)
             message = "Configuration saved."
         except ValueError as exc:
             error = str(exc)
-            cfg.update({k: v for k, v in updates.items() if k in cfg and k != "auto_download_rust_with_oxide"})
-            cfg["auto_download_rust_with_oxide"] = _coerce_bool(updates.get("auto_download_rust_with_oxide", False))
+            cfg.update({k: v for k, v in updates.items() if k in cfg and k not in _BOOL_SETTINGS})
+            for key in _BOOL_SETTINGS:
+                cfg[key] = _coerce_bool(updates.get(key, False))
 
-    return render_template("config.html", config=cfg, message=message, error=error, config_path=str(CONFIG_FILE))
+    return render_template("config.html", config=_public_config(cfg), message=message, error=error,
+                           config_path=str(CONFIG_FILE), server=_inst().name)
 
 
 @app.post("/logout")
@@ -271,12 +765,153 @@ def logout():
 
 
 # --- Basic systemd control ---
+STATUS_INTERVAL = max(1.0, float(os.environ.get("RUSTPANEL_STATUS_INTERVAL", "5")))
+STATUS_PROPERTIES = (
+    "Id", "LoadState", "ActiveState", "SubState", "Result", "MainPID", "NRestarts",
+    "ExecMainStartTimestamp", "ExecMainStartTimestampMonotonic", "MemoryCurrent", "CPUUsageNSec",
+)
+_SYSTEMD_UNSET = "18446744073709551615"  # (uint64)-1, systemd's "not available"
+
+def _systemd_int(value: str | None) -> int | None:
+    if not value or value == _SYSTEMD_UNSET or value == "[not set]":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+def _parse_systemctl_show(text: str) -> list[dict[str, str]]:
+    """Split `systemctl show unit...` output into one property dict per unit."""
+    units, current = [], {}
+    for line in text.splitlines():
+        if not line.strip():
+            if current:
+                units.append(current)
+                current = {}
+            continue
+        key, _, value = line.partition("=")
+        current[key] = value
+    if current:
+        units.append(current)
+    return units
+
+def _service_state(props: dict[str, str]) -> dict:
+    started_mono = _systemd_int(props.get("ExecMainStartTimestampMonotonic"))
+    active = props.get("ActiveState", "unknown")
+    started_at = None
+    if active == "active" and started_mono:
+        # systemd's monotonic clock is CLOCK_MONOTONIC, same as time.monotonic().
+        started_at = round(time.time() - (time.monotonic() - started_mono / 1_000_000))
+    return {
+        "unit": props.get("Id", ""),
+        "load_state": props.get("LoadState", "unknown"),
+        "active_state": active,
+        "sub_state": props.get("SubState", "unknown"),
+        "result": props.get("Result", ""),
+        "main_pid": _systemd_int(props.get("MainPID")) or None,
+        "restarts": _systemd_int(props.get("NRestarts")),
+        "started": props.get("ExecMainStartTimestamp") or None,
+        "started_at": started_at,
+        "memory_bytes": _systemd_int(props.get("MemoryCurrent")),
+        "cpu_nsec": _systemd_int(props.get("CPUUsageNSec")),
+    }
+
+class _StatusSampler:
+    """Polls systemd once per interval for every watched unit and caches the result.
+
+    All units are queried in a single `systemctl show` call, so the fork rate
+    depends on the interval only, not on how many browsers are polling.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._cond = Condition()
+        self._units: set[str] = set()
+        self._cache: dict[str, dict] = {}
+        self._sampled: dict[str, int] = {}  # unit -> generation its cached state is from
+        self._generation = 0
+        self.epoch = os.urandom(4).hex()  # tells generations of this run from a previous one's
+        self._wake = Event()
+        self._thread: Thread | None = None
+
+    def watch(self, unit: str) -> None:
+        with self._cond:
+            if unit not in self._units:
+                self._units.add(unit)
+                self._wake.set()
+            if self._thread is None:
+                self._thread = Thread(target=self._loop, name="status-sampler", daemon=True)
+                self._thread.start()
+
+    def retire(self, active: set[str]) -> None:
+        with self._cond:
+            self._units &= active
+            for unit in list(self._cache):
+                if unit not in self._units:
+                    del self._cache[unit]
+                    self._sampled.pop(unit, None)
+
+    def refresh(self, timeout: float = 5.0) -> None:
+        """Force a sample now and wait (bounded) for it to land."""
+        with self._cond:
+            target = self._generation + 1
+            self._wake.set()
+            self._cond.wait_for(lambda: self._generation >= target, timeout=timeout)
+
+    def get(self, unit: str, timeout: float = 5.0) -> dict | None:
+        return self.sample(unit, timeout)[1]
+
+    def sample(self, unit: str, timeout: float = 5.0) -> tuple[int, dict | None]:
+        """The unit's cached state and the generation it was sampled in."""
+        self.watch(unit)
+        with self._cond:
+            if unit not in self._cache:
+                self._cond.wait_for(lambda: unit in self._cache, timeout=timeout)
+            return self._sampled.get(unit, 0), self._cache.get(unit)
+
+    def _sample(self, units: list[str]) -> dict[str, dict]:
+        code, out = _run(["systemctl", "show", *units, "--no-pager", "--property=" + ",".join(STATUS_PROPERTIES)])
+        results = {}
+        if code == 0:
+            # systemctl prints one block per unit, in argument order.
+            for unit, props in zip(units, _parse_systemctl_show(out)):
+                results[unit] = _service_state(props)
+        for unit in units:
+            if unit not in results:
+                results[unit] = {"unit": unit, "active_state": "unknown", "error": out or f"exit {code}"}
+        return results
+
+    def _loop(self) -> None:
+        while True:
+            self._wake.clear()
+            with self._cond:
+                units = sorted(self._units)
+            results = self._sample(units) if units else {}
+            with self._cond:
+                self._generation += 1
+                for unit, state in results.items():
+                    if unit in self._units:
+                        self._cache[unit], self._sampled[unit] = state, self._generation
+                self._cond.notify_all()
+            self._wake.wait(self.interval)
+
+
+_STATUS = _StatusSampler(STATUS_INTERVAL)
+
 @app.get("/api/status")
 def status():
     if not _authorized(request):
         return jsonify({"ok": False, "error": "unauthorized"}), 401
-    code, out = _run(["sudo", "systemctl", "status", SERVICE, "--no-pager"])
-    return jsonify({"ok": code == 0, "exit": code, "output": out})
+    generation, state = _STATUS.sample(_inst().service)
+    if state is None:
+        return jsonify({"ok": False, "error": "status unavailable"}), 503
+    payload = {"ok": state.get("active_state") == "active", "status": state}
+    response = jsonify(payload)
+    # One tag per systemd sample: memory and CPU time change with every sample, so
+    # polls between two samples are what a 304 can save.
+    response.set_etag(f"{_inst().service}-{_STATUS.epoch}-{generation}")
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
 
 @app.post("/api/<action>")
 def action(action: str):
@@ -284,158 +919,2930 @@ def action(action: str):
         return jsonify({"ok": False, "error": "unauthorized"}), 401
     if action not in {"start", "stop", "restart"}:
         return jsonify({"ok": False, "error": "invalid action"}), 400
-    code, out = _run(["sudo", "systemctl", action, SERVICE])
+    data = request.get_json(silent=True) or {}
+    if isinstance(data, dict) and _coerce_bool(data.get("graceful", False)):
+        return _submit_lifecycle(action, data)
+    code, out = _run(["sudo", "systemctl", action, _inst().service])
+    _STATUS.refresh()
     return jsonify({"ok": code == 0, "exit": code, "output": out})
 
 # --- Live logs (Server-Sent Events) ---
+JOURNAL_RING_SIZE = 3000
+JOURNAL_RESTART_DELAY = 5
+
+class _JournalLine(str):
+    """A console line as viewers see it, remembering the journal cursor of its entry."""
+    cursor: str | None = None
+
+def _journal_lines(raw: str) -> list[str]:
+    """Render one `journalctl -o json` entry the way `-o short-iso-precise` prints it.
+
+    Continuation lines of a multi-line message come back as separate lines; the
+    first carries the entry's cursor. Anything that is not an entry (journalctl's
+    own warnings) is passed through as is.
+    """
+    try:
+        entry = json.loads(raw)
+    except ValueError:
+        return [raw]
+    if not isinstance(entry, dict):
+        return [raw]
+    message = entry.get("MESSAGE")
+    if isinstance(message, list):  # journald sends non-UTF-8 messages as byte arrays
+        message = bytes(message).decode("utf-8", "replace")
+    try:
+        usec = int(entry["__REALTIME_TIMESTAMP"])
+        stamp = datetime.fromtimestamp(usec // 1_000_000).astimezone().replace(microsecond=usec % 1_000_000)
+    except (KeyError, ValueError):
+        stamp = datetime.now().astimezone()
+    ident = entry.get("SYSLOG_IDENTIFIER") or entry.get("_COMM") or "unknown"
+    pid = f"[{entry['_PID']}]" if entry.get("_PID") else ""
+    prefix = f"{stamp.isoformat(timespec='microseconds')} {entry.get('_HOSTNAME') or 'localhost'} {ident}{pid}: "
+    first, *rest = str(message or "").split("\n")
+    line = _JournalLine(prefix + first)
+    line.cursor = entry.get("__CURSOR")
+    return [line, *(" " * len(prefix) + more for more in rest)]
+
+class _JournalHub:
+    """One `journalctl -f` per service, fanned out to every log viewer.
+
+    Lines land in a `_LineRing`, whose sequence numbers double as SSE event
+    ids so reconnecting browsers resume from `Last-Event-ID` instead of
+    replaying the tail.
+    """
+
+    def __init__(self, service: str):
+        self.service = service
+        self.lines = _LineRing(JOURNAL_RING_SIZE)
+        self._lock = Lock()
+        self._stop = Event()
+        self._proc: subprocess.Popen | None = None
+        self._thread: Thread | None = None
+
+    def ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is not None or self._stop.is_set():
+                return
+            self._thread = Thread(target=self._tail, name=f"journal-{self.service}", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._lock:
+            proc = self._proc
+        if proc is not None:
+            with contextlib.suppress(ProcessLookupError):
+                proc.terminate()
+        self.lines.close()
+
+    def _tail(self) -> None:
+        position, cursor = ["-n", str(JOURNAL_RING_SIZE)], None
+        while not self._stop.is_set():
+            args = ["sudo", "journalctl", "-u", self.service, "--no-pager", "-o", "json", *position, "-f"]
+            try:
+                proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                        text=True, bufsize=1, errors="replace")
+            except OSError as exc:
+                self.lines.append(f"[panel] unable to start journalctl: {exc}")
+                proc = None
+            if proc is not None:
+                with self._lock:
+                    self._proc = proc
+                if self._stop.is_set():
+                    proc.terminate()
+                for raw in proc.stdout:
+                    for line in _journal_lines(raw.rstrip("\n")):
+                        cursor = getattr(line, "cursor", None) or cursor
+                        self.lines.append(line)
+                code = proc.wait()
+                with self._lock:
+                    self._proc = None
+                if self._stop.is_set():
+                    return
+                self.lines.append(f"[panel] journalctl exited with code {code}, restarting")
+            self._stop.wait(JOURNAL_RESTART_DELAY)
+            # Replay what was logged while we were not following, from the last entry seen.
+            position = [f"--after-cursor={cursor}"] if cursor else ["-n", "0"]
+
+
+_JOURNAL_HUBS: dict[str, _JournalHub] = {}
+_JOURNAL_HUBS_LOCK = Lock()
+
+def _journal_hub(service: str) -> _JournalHub:
+    with _JOURNAL_HUBS_LOCK:
+        hub = _JOURNAL_HUBS.get(service)
+        if hub is None:
+            hub = _JOURNAL_HUBS[service] = _JournalHub(service)
+    hub.ensure_started()
+    return hub
+
+def _retire_journal_hubs(active: set[str]) -> None:
+    with _JOURNAL_HUBS_LOCK:
+        stale = [name for name in _JOURNAL_HUBS if name not in active]
+        hubs = [_JOURNAL_HUBS.pop(name) for name in stale]
+    for hub in hubs:
+        hub.stop()
+
 @app.get("/api/logs")
 def logs():
     if not _authorized(request):
         return Response("unauthorized\n", status=401)
 
-    n = request.args.get("n", "200")
+    try:
+        n = max(0, min(int(request.args.get("n", "200")), JOURNAL_RING_SIZE))
+    except ValueError:
+        n = 200
     since = request.args.get("since", "")
-    args = ["sudo", "journalctl", "-u", SERVICE, "--no-pager", "-n", n]
-    if since:
-        args += ["--since", since]
-    args.append("-f")
+    last_id = _parse_event_id(request.headers.get("Last-Event-ID") or request.args.get("last_id"))
+    hub = _journal_hub(_inst().service)
 
-    proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+    history: list[str] = []
+    if last_id is not None and last_id > hub.lines.head:
+        # The id belongs to a tailer that has since been replaced.
+        last_id = None
+    if last_id is not None:
+        cursor, backlog = last_id, None
+    elif since:
+        # Historical windows come from a bounded, non-following query; live
+        # lines are then picked up from the shared tailer.
+        cursor, backlog = hub.lines.head, None
+        args = ["sudo", "journalctl", "-u", _inst().service, "--no-pager", "-o", "short-iso-precise",
+                "-n", str(n), "--since", since]
+        code, out = _run(args)
+        history = out.splitlines() if out else []
+    else:
+        cursor, backlog = 0, n
 
     def stream():
+        yield "retry: 3000\n\n"
+        for line in history:
+            yield f"data: {line}\n\n"
+        yield from _sse_lines(hub.lines, cursor, backlog)
+
+    return _sse_response(stream())
+
+# --- Log index ---
+# Console lines from the shared journal tailer are parsed into events
+# {id, ts, level, plugin, player, msg, cursor} and appended as NDJSON to segments
+# under CACHE_DIR/logs/<service>/. A segment is split into blocks of
+# LOG_BLOCK events; its index keeps each block's byte offset and time range
+# and, per term (level, plugin, player) and per message trigram, a bitmask of
+# the blocks containing it. A query ANDs the masks and only reads the blocks
+# that can match, newest first, so it never shells out to journalctl. Full
+# segments are sealed with a gzipped index; the open one is re-indexed from
+# its NDJSON on start.
+LOG_DIR = CACHE_DIR / "logs"
+LOG_BLOCK = 128
+LOG_SEGMENT_EVENTS = 512 * LOG_BLOCK
+LOG_RETENTION_DAYS = int(os.environ.get("RUSTPANEL_LOG_RETENTION_DAYS", "30"))
+LOG_BACKFILL_SINCE = "7 days ago"  # first start: index this much of the journal
+LOG_BACKFILL_BATCH = 1000
+LOG_INDEX_CACHE = 16  # sealed segment indexes kept in memory
+LOG_QUERY_LIMIT = 1000
+LOG_LEVELS = ("error", "warning", "info", "debug")
+_JOURNAL_LINE = re.compile(r"^(\d{4}-\d\d-\d\dT[\d:.]+[+-]\d\d:?\d\d) \S+ [^\s\[:]+(?:\[\d+\])?: ?(.*)$")
+_LOG_LEVEL_RULES = (
+    ("error", re.compile(r"\[(?:error|exception|fatal)\]|exception\b|^error\b|\berror:|"
+                         r"failed to (?:call|compile|load|initialize)|error while compiling", re.I)),
+    ("warning", re.compile(r"\[warn(?:ing)?\]|^warning\b|\bwarning:", re.I)),
+    ("debug", re.compile(r"\[debug\]", re.I)),
+)
+_LOG_PLUGIN_RULES = (
+    re.compile(r"\bplugin '([^'\s]+)"),  # Failed to call hook 'X' on plugin 'Kits v1.2.3'
+    re.compile(r"\b(?:Loaded|Unloaded|Reloaded) plugin ([\w.-]+)"),
+    re.compile(r"Error while compiling:? ([\w.-]+?)\.cs\b"),
+    re.compile(r"^\[([A-Za-z][\w .-]{0,39})\] "),  # Puts() output: [Kits] ...
+)
+_LOG_NOT_PLUGINS = {"oxide", "carbon", "info", "warning", "warn", "error", "debug", "exception",
+                    "chat", "team chat", "event", "save", "server", "rcon", "panel"}
+_STEAMID = re.compile(r"\b(7656119\d{10})\b")
+
+def _journal_position(cursor: str | None) -> str | None:
+    """The seqnum id, seqnum and realtime fields of a journal cursor, enough to order and seek by."""
+    fields = dict(part.split("=", 1) for part in (cursor or "").split(";") if "=" in part)
+    if not {"s", "i"} <= fields.keys():
+        return None
+    return ";".join(f"{key}={fields[key]}" for key in ("s", "i", "t") if key in fields)
+
+def _journal_seqnum(position: str | None) -> tuple[str, int] | None:
+    fields = dict(part.split("=", 1) for part in (position or "").split(";") if "=" in part)
+    try:
+        return fields["s"], int(fields["i"], 16)
+    except (KeyError, ValueError):
+        return None
+
+def _journal_newer(position: str | None, last: str | None) -> bool | None:
+    """Whether `position` comes after `last` in the journal; None when they cannot be compared."""
+    seqnum, last_seqnum = _journal_seqnum(position), _journal_seqnum(last)
+    if seqnum is None or last_seqnum is None or seqnum[0] != last_seqnum[0]:
+        return None
+    return seqnum[1] > last_seqnum[1]
+
+def _parse_console_line(line: str) -> dict | None:
+    """Turn a `journalctl -o short-iso(-precise)` line into an event, or None for non-journal lines.
+
+    Lines from the journal tailer also record their entry's position as `cursor`.
+    """
+    match = _JOURNAL_LINE.match(line)
+    if match is None:
+        return None
+    stamp, msg = match.groups()
+    try:
+        ts = datetime.fromisoformat(stamp).timestamp()
+    except ValueError:
+        return None
+    level = next((name for name, rule in _LOG_LEVEL_RULES if rule.search(msg)), "info")
+    plugin = None
+    for rule in _LOG_PLUGIN_RULES:
+        found = rule.search(msg)
+        if found and found.group(1).lower() not in _LOG_NOT_PLUGINS:
+            plugin = found.group(1)
+            break
+    player = _STEAMID.search(msg)
+    event = {"ts": ts, "level": level, "plugin": plugin, "player": player.group(1) if player else None, "msg": msg}
+    position = _journal_position(getattr(line, "cursor", None))
+    if position:
+        event["cursor"] = position
+    return event
+
+def _log_terms(event: dict) -> list[str]:
+    terms = [f"level:{event['level']}"]
+    if event["plugin"]:
+        plugin = event["plugin"].lower()
+        terms += [f"plugin:{plugin}", f"plugin:{plugin}:{event['level']}"]  # the pair keeps "Kits errors" selective
+    if event["player"]:
+        terms.append(f"player:{event['player']}")
+    return terms
+
+class _LogSegment:
+    """One NDJSON file of events and its block index."""
+
+    def __init__(self, path: Path, first_id: int):
+        self.path = path
+        self.first_id = first_id
+        self.count = 0
+        self.size = 0
+        self.offsets = array("Q")
+        self.tmin = array("d")
+        self.tmax = array("d")
+        self.terms: dict[str, int] = {}
+        self.grams: dict[int, int] = {}
+
+    @property
+    def index_path(self) -> Path:
+        return self.path.with_name(self.path.stem + ".idx.json.gz")
+
+    def summary(self) -> dict:
+        return {"first_id": self.first_id, "count": self.count,
+                "tmin": min(self.tmin, default=0.0), "tmax": max(self.tmax, default=0.0)}
+
+    def add(self, event: dict, size: int) -> None:
+        block, ts = self.count // LOG_BLOCK, event["ts"]
+        if self.count % LOG_BLOCK == 0:
+            self.offsets.append(self.size)
+            self.tmin.append(ts)
+            self.tmax.append(ts)
+        else:
+            self.tmin[block] = min(self.tmin[block], ts)
+            self.tmax[block] = max(self.tmax[block], ts)
+        bit = 1 << block
+        for term in _log_terms(event):
+            self.terms[term] = self.terms.get(term, 0) | bit
+        for tri in _trigram_ids(event["msg"].encode()):
+            self.grams[tri] = self.grams.get(tri, 0) | bit
+        self.count += 1
+        self.size += size
+
+    def candidates(self, since: float, until: float, levels: list[str], plugin: str | None,
+                   player: str | None, grams: set[int]) -> list[int]:
+        """Blocks that may hold a match, newest first."""
+        mask = (1 << len(self.offsets)) - 1
+        prefix = f"plugin:{plugin}:" if plugin else "level:"
+        if levels:
+            wanted = 0
+            for level in levels:
+                wanted |= self.terms.get(prefix + level, 0)
+            mask &= wanted
+        elif plugin:
+            mask &= self.terms.get(f"plugin:{plugin}", 0)
+        if player:
+            mask &= self.terms.get(f"player:{player}", 0)
+        for tri in grams:
+            if not mask:
+                break
+            mask &= self.grams.get(tri, 0)
+        return [block for block in range(len(self.offsets) - 1, -1, -1)
+                if mask >> block & 1 and self.tmax[block] >= since and self.tmin[block] <= until]
+
+    def read_block(self, block: int, size: int) -> list[dict]:
+        start = self.offsets[block]
+        end = self.offsets[block + 1] if block + 1 < len(self.offsets) else size
+        with open(self.path, "rb") as fh:
+            fh.seek(start)
+            chunk = fh.read(end - start)
+        return [json.loads(line) for line in chunk.splitlines() if line]
+
+    def seal(self) -> None:
+        data = {
+            "first_id": self.first_id, "count": self.count, "size": self.size,
+            "offsets": list(self.offsets), "tmin": list(self.tmin), "tmax": list(self.tmax),
+            "terms": {term: format(mask, "x") for term, mask in self.terms.items()},
+            "grams": {str(tri): format(mask, "x") for tri, mask in self.grams.items()},
+        }
+        tmp = self.index_path.with_name(self.index_path.name + ".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=3) as fh:
+            json.dump(data, fh, separators=(",", ":"))
+        os.replace(tmp, self.index_path)
+
+    @classmethod
+    def load(cls, path: Path) -> "_LogSegment":
+        segment = cls(path, 0)
+        with gzip.open(segment.index_path, "rt", encoding="utf-8") as fh:
+            data = json.load(fh)
+        segment.first_id, segment.count, segment.size = data["first_id"], data["count"], data["size"]
+        segment.offsets, segment.tmin, segment.tmax = array("Q", data["offsets"]), array("d", data["tmin"]), array("d", data["tmax"])
+        segment.terms = {term: int(mask, 16) for term, mask in data["terms"].items()}
+        segment.grams = {int(tri): int(mask, 16) for tri, mask in data["grams"].items()}
+        return segment
+
+    @classmethod
+    def rebuild(cls, path: Path, first_id: int) -> tuple["_LogSegment", list[dict]]:
+        """Re-index an open segment, cutting off a torn last line; returns it and its last events."""
+        segment, tail = cls(path, first_id), deque(maxlen=LOG_BLOCK)
+        with open(path, "rb+") as fh:
+            for line in fh:
+                try:
+                    event = json.loads(line) if line.endswith(b"\n") else None
+                except ValueError:
+                    event = None
+                if event is None:
+                    fh.truncate(segment.size)
+                    break
+                segment.add(event, len(line))
+                tail.append(event)
+        return segment, list(tail)
+
+def _log_event_matches(event: dict, since: float, until: float, levels: list[str],
+                       plugin: str | None, player: str | None, needle: str) -> bool:
+    return (since <= event["ts"] <= until
+            and (not levels or event["level"] in levels)
+            and (plugin is None or (event["plugin"] or "").lower() == plugin)
+            and (player is None or event["player"] == player)
+            and needle in event["msg"].lower())
+
+class _LogStore:
+    """Append-only, block-indexed event log for one service."""
+
+    def __init__(self, directory: Path):
+        self.dir = directory
+        self._lock = Lock()
+        self._sealed: list[dict] = []  # summaries, oldest first
+        self._cache: OrderedDict[int, _LogSegment] = OrderedDict()
+        self._active: _LogSegment | None = None
+        self._loaded = False
+        self.last_ts = 0.0
+        self.cursor: str | None = None  # journal position of the newest indexed event
+
+    @property
+    def _manifest(self) -> Path:
+        return self.dir / "segments.json"
+
+    def _segment_path(self, first_id: int) -> Path:
+        return self.dir / f"{first_id:012d}.ndjson"
+
+    def _track(self, event: dict) -> None:
+        self.last_ts = max(self.last_ts, event["ts"])
+        self.cursor = event.get("cursor") or self.cursor
+
+    def _indexed(self, event: dict) -> bool:
+        """Whether `event` was already stored (journal backlog replayed after a restart).
+
+        Decided by journal seqnum: identical lines logged in the same instant are
+        separate entries. Events without a comparable cursor fall back to time.
+        """
+        newer = _journal_newer(event.get("cursor"), self.cursor)
+        if newer is not None:
+            return not newer
+        return event["ts"] < self.last_ts
+
+    def _load(self) -> None:
+        self._loaded = True
+        self.dir.mkdir(parents=True, exist_ok=True)
         try:
-            for line in proc.stdout:
-                yield f"data: {line.rstrip()}\n\n"
-        finally:
-            with contextlib.suppress(ProcessLookupError):
+            self._sealed = json.loads(self._manifest.read_text())
+        except (OSError, ValueError):
+            self._sealed = []
+        self._sealed = [s for s in self._sealed if self._segment_path(s["first_id"]).exists()]
+        next_id = self._sealed[-1]["first_id"] + self._sealed[-1]["count"] if self._sealed else 1
+        tail: list[dict] = []
+        path = self._segment_path(next_id)
+        if path.exists():
+            self._active, tail = _LogSegment.rebuild(path, next_id)
+        else:
+            self._active = _LogSegment(path, next_id)
+            if self._sealed:
+                previous = self._segment(self._sealed[-1]["first_id"])
+                tail = previous.read_block(len(previous.offsets) - 1, previous.size)
+        for event in tail:
+            self._track(event)
+        self._prune()
+
+    def _save_manifest(self) -> None:
+        tmp = self._manifest.with_name("segments.json.tmp")
+        tmp.write_text(json.dumps(self._sealed))
+        os.replace(tmp, self._manifest)
+
+    def _prune(self) -> None:
+        cutoff = time.time() - LOG_RETENTION_DAYS * 86400
+        expired = [s for s in self._sealed if s["tmax"] < cutoff]
+        if not expired:
+            return
+        for summary in expired:
+            path = self._segment_path(summary["first_id"])
+            self._cache.pop(summary["first_id"], None)
+            for stale in (path, path.with_name(path.stem + ".idx.json.gz")):
+                with contextlib.suppress(OSError):
+                    stale.unlink()
+        self._sealed = self._sealed[len(expired):]
+        self._save_manifest()
+
+    def _segment(self, first_id: int) -> _LogSegment:
+        if self._active is not None and first_id == self._active.first_id:
+            return self._active
+        segment = self._cache.get(first_id)
+        if segment is None:
+            segment = self._cache[first_id] = _LogSegment.load(self._segment_path(first_id))
+            while len(self._cache) > LOG_INDEX_CACHE:
+                self._cache.popitem(last=False)
+        self._cache.move_to_end(first_id)
+        return segment
+
+    def ensure_loaded(self) -> None:
+        with self._lock:
+            if not self._loaded:
+                self._load()
+
+    def append(self, events: list[dict]) -> int:
+        """Store events newer than what is already indexed; returns how many were kept."""
+        kept = 0
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            out = open(self._active.path, "ab")
+            try:
+                for event in events:
+                    if self._indexed(event):
+                        continue
+                    active = self._active
+                    event = {"id": active.first_id + active.count, **event}
+                    data = (json.dumps(event, separators=(",", ":")) + "\n").encode()
+                    out.write(data)
+                    active.add(event, len(data))
+                    self._track(event)
+                    kept += 1
+                    if active.count >= LOG_SEGMENT_EVENTS:
+                        out.close()
+                        self._seal()
+                        out = open(self._active.path, "ab")
+            finally:
+                out.close()
+        return kept
+
+    def _seal(self) -> None:
+        active = self._active
+        active.seal()
+        self._sealed.append(active.summary())
+        self._save_manifest()
+        self._cache[active.first_id] = active
+        next_id = active.first_id + active.count
+        self._active = _LogSegment(self._segment_path(next_id), next_id)
+        self._prune()
+
+    def stats(self) -> dict:
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            active = self._active
+            return {
+                "events": sum(s["count"] for s in self._sealed) + active.count,
+                "segments": len(self._sealed) + 1,
+                "last_ts": self.last_ts or None,
+            }
+
+    def query(self, *, since: float, until: float, levels: list[str], plugin: str | None, player: str | None,
+              text: str, before: int | None, limit: int) -> dict:
+        needle = text.lower()
+        grams = _trigram_ids(needle.encode()) if needle.isascii() else set()
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            summaries = self._sealed + [self._active.summary()]
+        events: list[dict] = []
+        scanned = 0
+        for summary in reversed(summaries):
+            if before is not None and summary["first_id"] >= before:
+                continue
+            if summary["count"] == 0 or summary["tmax"] < since or summary["tmin"] > until:
+                continue
+            with self._lock:
+                try:
+                    segment = self._segment(summary["first_id"])
+                except (OSError, ValueError):
+                    continue  # pruned or unreadable; skip rather than fail the query
+                blocks = segment.candidates(since, until, levels, plugin, player, grams)
+                size = segment.size
+            for block in blocks:
+                scanned += 1
+                for event in reversed(segment.read_block(block, size)):
+                    if before is not None and event["id"] >= before:
+                        continue
+                    if not _log_event_matches(event, since, until, levels, plugin, player, needle):
+                        continue
+                    events.append(event)
+                    if len(events) > limit:
+                        return {"events": events[:limit], "next": events[limit - 1]["id"], "scanned_blocks": scanned}
+        return {"events": events, "next": None, "scanned_blocks": scanned}
+
+class _LogIngester:
+    """Feeds one service's console lines from the journal tailer into its _LogStore."""
+
+    def __init__(self, service: str):
+        self.service = service
+        self.store = _LogStore(LOG_DIR / re.sub(r"[^\w.@-]", "_", service))
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread: Thread | None = None
+
+    def ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is not None or self._stop.is_set():
+                return
+            self._thread = Thread(target=self._run, name=f"log-index-{self.service}", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _backfill(self) -> None:
+        """Index what the journal logged while the panel was not following it."""
+        if self.store.cursor:
+            position = [f"--after-cursor={self.store.cursor}"]
+        else:
+            position = ["--since", f"@{int(self.store.last_ts)}" if self.store.last_ts else LOG_BACKFILL_SINCE]
+        args = ["sudo", "journalctl", "-u", self.service, "--no-pager", "-o", "json", *position]
+        try:
+            proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                    text=True, errors="replace")
+        except OSError:
+            return
+        batch = []
+        for raw in proc.stdout:
+            event = _parse_console_line(_journal_lines(raw.rstrip("\n"))[0])
+            if event is not None:
+                batch.append(event)
+            if len(batch) >= LOG_BACKFILL_BATCH:
+                self.store.append(batch)
+                batch = []
+            if self._stop.is_set():
                 proc.terminate()
+                break
+        self.store.append(batch)
+        proc.wait()
 
-    return Response(stream(), mimetype="text/event-stream")
+    def _run(self) -> None:
+        self.store.ensure_loaded()
+        self._backfill()
+        # What is indexed by now is history. From here every live line goes to the alert
+        # engine so rate rules see each repeat; only backlog the tailer replays after a
+        # restart is skipped, decided by journal cursor rather than by the index.
+        alerted = self.store.cursor
+        while not self._stop.is_set():
+            hub = _journal_hub(self.service)
+            for item in hub.lines.follow(0, backlog=JOURNAL_RING_SIZE):
+                if self._stop.is_set():
+                    return
+                if item is None:
+                    continue
+                event = _parse_console_line(item[1])
+                if event is None:
+                    continue
+                self.store.append([event])
+                if _journal_newer(event.get("cursor"), alerted) is not False:
+                    alerted = event.get("cursor") or alerted
+                    _ALERTS.observe(self.service, event)
+            self._stop.wait(JOURNAL_RESTART_DELAY)
 
-# --- Rust auto-update (via SteamCMD) ---
-@app.post("/api/update_rust")
-def update_rust():
-    if not _authorized(request):
-        return jsonify({"ok": False, "error": "unauthorized"}), 401
 
-    code, out = _run(["sudo", "/usr/local/bin/rust_update.sh"])
-    return jsonify({"ok": code == 0, "exit": code, "output": out})
+_LOG_INGESTERS: dict[str, _LogIngester] = {}
+_LOG_INGESTERS_LOCK = Lock()
 
+def _log_ingester(service: str) -> _LogIngester:
+    with _LOG_INGESTERS_LOCK:
+        ingester = _LOG_INGESTERS.get(service)
+        if ingester is None:
+            ingester = _LOG_INGESTERS[service] = _LogIngester(service)
+    ingester.ensure_started()
+    return ingester
 
-@app.post("/api/install_rust")
-def install_rust():
+def _retire_log_ingesters(active: set[str]) -> None:
+    with _LOG_INGESTERS_LOCK:
+        stale = [name for name in _LOG_INGESTERS if name not in active]
+        ingesters = [_LOG_INGESTERS.pop(name) for name in stale]
+    for ingester in ingesters:
+        ingester.stop()
+
+@app.get("/api/logs/query")
+def api_logs_query():
     if not _authorized(request):
         return jsonify({"ok": False, "error": "unauthorized"}), 401
+    args = request.args
+    now = time.time()
+    try:
+        # since/until accept epoch seconds, or negative offsets from now (since=-86400).
+        since = float(args.get("since", 0))
+        until = float(args.get("until", math.inf))
+        limit = max(1, min(int(args.get("limit", 100)), LOG_QUERY_LIMIT))
+        before = int(args["cursor"]) if args.get("cursor") else None
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid range, limit or cursor"}), 400
+    since = now + since if since < 0 else since
+    until = now + until if until <= 0 else until
+    levels = [level for level in args.get("level", "").lower().split(",") if level]
+    if any(level not in LOG_LEVELS for level in levels):
+        return jsonify({"ok": False, "error": f"level must be one of: {', '.join(LOG_LEVELS)}"}), 400
+    plugin = args.get("plugin", "").strip().lower() or None
+    player = args.get("player", "").strip() or None
+    started = time.perf_counter()
+    store = _log_ingester(_inst().service).store
+    result = store.query(since=since, until=until, levels=levels, plugin=plugin, player=player,
+                         text=args.get("q", ""), before=before, limit=limit)
+    return jsonify({"ok": True, **result, "took": time.perf_counter() - started, "index": store.stats()})
 
-    code, out = _run(["sudo", "/usr/local/bin/rust_install.sh"])
-    return jsonify({"ok": code == 0, "exit": code, "output": out})
+# --- Alerts ---
+# Rules in the config (`alert_rules`) are checked against every live console
+# event from the log ingester. All rule regexes are folded into one
+# precompiled alternation, so a line that no rule can match costs a single
+# search. A rule fires once `threshold` matches land within `window` seconds
+# (a deque of the last `threshold` hit times, so O(1) per hit), then stays
+# quiet for `cooldown`. Notifications go through a bounded queue to a sender
+# thread that posts to `alert_webhook` and/or appends to `alert_file`, so a
+# slow webhook never holds up ingestion.
+ALERT_EVENTS = {  # named patterns usable as {"event": ...} instead of a regex
+    "exception": r"\b\w+Exception\b",
+    "hook_failure": r"Failed to call hook",
+    "plugin_compile_error": r"Error while compiling",
+    "server_start": r"^Started |Server startup complete",
+    "server_crash": r"Main process exited|core dumped|Segmentation fault|Crash!!!",
+    "player_connect": r" joined \[",
+}
+ALERT_SINKS = ("webhook", "file")
+ALERT_QUEUE = 100
+ALERT_HISTORY = 100
+ALERT_WEBHOOK_TIMEOUT = 10
+ALERT_WEBHOOK_RETRIES = 3
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
 
-# --- Oxide/uMod/Carbon installer ---
-@app.post("/api/update_oxide")
-def update_oxide():
-    if not _authorized(request):
-        return jsonify({"ok": False, "error": "unauthorized"}), 401
+def _validate_alert_rules(value) -> list[dict]:
+    if isinstance(value, str):
+        try:
+            value = json.loads(value or "[]")
+        except ValueError as exc:
+            raise ValueError(f"Alert rules must be valid JSON: {exc}") from None
+    if not isinstance(value, list):
+        raise ValueError("Alert rules must be a list")
+    rules, seen = [], set()
+    for index, item in enumerate(value):
+        if not isinstance(item, dict):
+            raise ValueError(f"Alert rule #{index + 1} must be an object")
+        rule_id = _sanitize_backup_slug(str(item.get("id") or f"rule-{index + 1}")).replace("_", "-")
+        if not rule_id or rule_id in seen:
+            raise ValueError(f"Alert rule #{index + 1}: id must be unique")
+        seen.add(rule_id)
+        pattern = item.get("pattern") or None
+        event = item.get("event") or None
+        level = item.get("level") or None
+        plugin = item.get("plugin") or None
+        if pattern and event:
+            raise ValueError(f"Alert rule {rule_id}: use either pattern or event, not both")
+        if not (pattern or event or level or plugin):
+            raise ValueError(f"Alert rule {rule_id}: needs a pattern, event, level or plugin to match")
+        if event is not None and event not in ALERT_EVENTS:
+            raise ValueError(f"Alert rule {rule_id}: event must be one of: {', '.join(ALERT_EVENTS)}")
+        if level is not None and level not in LOG_LEVELS:
+            raise ValueError(f"Alert rule {rule_id}: level must be one of: {', '.join(LOG_LEVELS)}")
+        sinks = item.get("sinks", list(ALERT_SINKS))
+        if not isinstance(sinks, list) or any(sink not in ALERT_SINKS for sink in sinks):
+            raise ValueError(f"Alert rule {rule_id}: sinks must be a list of: {', '.join(ALERT_SINKS)}")
+        rules.append({
+            "id": rule_id,
+            "pattern": str(pattern) if pattern else None,
+            "event": event,
+            "level": level,
+            "plugin": str(plugin) if plugin else None,
+            "ignore_case": _coerce_bool(item.get("ignore_case", True)),
+            "threshold": _coerce_int(item.get("threshold", 1), "threshold", 1, 100000),
+            "window": _coerce_int(item.get("window", 60), "window", 1, 86400),
+            "cooldown": _coerce_int(item.get("cooldown", 300), "cooldown", 0, 86400),
+            "sinks": sinks,
+            "enabled": _coerce_bool(item.get("enabled", True)),
+        })
+        try:
+            _AlertRule(rules[-1])  # compile the pattern the way the engine will
+        except re.error as exc:
+            raise ValueError(f"Alert rule {rule_id}: invalid pattern: {exc}") from None
+    return rules
 
-    data = request.get_json(silent=True) or {}
-    url = data.get("url", "").strip() or DEFAULT_OXIDE_ZIP
+class _AlertRule:
+    """A validated rule with its regex compiled once."""
 
-    cfg = _get_config()
-    steps = []
-    if cfg.get("auto_download_rust_with_oxide"):
-        rust_code, rust_out = _run(["sudo", "/usr/local/bin/rust_update.sh"])
-        steps.append(("Rust update", rust_code, rust_out))
-        if rust_code != 0:
-            combined = "\n\n".join(f"{name} exit {code}: {text}".strip() for name, code, text in steps)
-            return jsonify({"ok": False, "exit": rust_code, "output": combined})
+    def __init__(self, spec: dict):
+        self.spec = spec
+        self.id = spec["id"]
+        source = spec["pattern"] or ALERT_EVENTS.get(spec["event"] or "")
+        self.source = f"(?i:{source})" if source and spec["ignore_case"] else source
+        self.regex = re.compile(self.source) if self.source else None
+        self.plugin = (spec["plugin"] or "").lower() or None
 
-    code, out = _run(["sudo", "/usr/local/bin/oxide_update.sh", url])
-    steps.append(("Oxide update", code, out))
-    combined = "\n\n".join(f"{name} exit {code}: {text}".strip() for name, code, text in steps)
-    return jsonify({"ok": code == 0 and all(step[1] == 0 for step in steps), "exit": code, "output": combined})
+    def matches(self, event: dict) -> bool:
+        if self.spec["level"] and event["level"] != self.spec["level"]:
+            return False
+        if self.plugin and (event["plugin"] or "").lower() != self.plugin:
+            return False
+        return self.regex is None or self.regex.search(event["msg"]) is not None
 
+class _AlertEngine:
+    """Sliding-window rule evaluation plus the notification queue and sender."""
 
-@app.get("/api/config")
-def api_get_config():
+    def __init__(self):
+        self._lock = Lock()
+        self._cond = Condition()
+        self._pending: deque[dict] = deque()
+        self._always: tuple[_AlertRule, ...] = ()
+        self._regex_rules: tuple[_AlertRule, ...] = ()
+        self._prefilter: re.Pattern | None = None
+        self._hits: dict[tuple[str, str], deque] = {}
+        self._fired: dict[tuple[str, str], float] = {}
+        self._webhook = ""
+        self._file = ""
+        self.history: deque[dict] = deque(maxlen=ALERT_HISTORY)
+        self.stats = {"evaluated": 0, "matched": 0, "fired": 0, "dropped": 0, "failed": 0}
+        self._thread: Thread | None = None
+
+    def configure(self, rules: list[dict], webhook: str, file: str) -> None:
+        compiled = []
+        for spec in rules:
+            if not spec["enabled"]:
+                continue
+            try:
+                compiled.append(_AlertRule(spec))
+            except re.error as exc:  # saved before patterns were validated as compiled
+                app.logger.warning("alert rule %s skipped: %s", spec["id"], exc)
+        # Rules whose regex can share one alternation are only re-checked when it hits;
+        # the rest (no regex, or backreferences that would shift) are checked every line.
+        shared = [rule for rule in compiled if rule.regex is not None and not _BACKREFERENCE.search(rule.source)]
+        prefilter = None
+        if shared:
+            try:
+                prefilter = re.compile("|".join(f"(?:{rule.source})" for rule in shared))
+            except re.error:  # e.g. two rules defining the same group name
+                shared = []
+        with self._lock:
+            self._regex_rules = tuple(shared)
+            self._always = tuple(rule for rule in compiled if rule not in shared)
+            self._prefilter = prefilter
+            # Keep the hit history of rules whose threshold did not change.
+            thresholds = {rule.id: rule.spec["threshold"] for rule in compiled}
+            self._hits = {key: hits for key, hits in self._hits.items() if thresholds.get(key[1]) == hits.maxlen}
+            self._webhook = webhook
+            self._file = file
+
+    def observe(self, service: str, event: dict) -> None:
+        self.stats["evaluated"] += 1
+        prefilter = self._prefilter
+        candidates = self._always
+        if prefilter is not None and prefilter.search(event["msg"]):
+            candidates = candidates + self._regex_rules
+        for rule in candidates:
+            if rule.matches(event):
+                self._hit(service, rule, event)
+
+    def _hit(self, service: str, rule: _AlertRule, event: dict) -> None:
+        spec, ts, key = rule.spec, event["ts"], (service, rule.id)
+        with self._lock:
+            self.stats["matched"] += 1
+            hits = self._hits.get(key)
+            if hits is None:
+                hits = self._hits[key] = deque(maxlen=spec["threshold"])
+            hits.append(ts)
+            if len(hits) < spec["threshold"] or ts - hits[0] > spec["window"]:
+                return
+            if ts - self._fired.get(key, -math.inf) < spec["cooldown"]:
+                return
+            self._fired[key] = ts
+            self.stats["fired"] += 1
+            span = ts - hits[0]
+        alert = {
+            "rule": rule.id,
+            "service": service,
+            "ts": ts,
+            "count": spec["threshold"],
+            "window": spec["window"],
+            "span": span,
+            "message": event["msg"],
+            "sinks": spec["sinks"],
+            "summary": f"[{service}] alert {rule.id}: {spec['threshold']} match(es) in {span:.0f}s "
+                       f"(limit {spec['window']}s) - {event['msg'][:300]}",
+        }
+        self.enqueue(alert)
+
+    def enqueue(self, alert: dict) -> None:
+        with self._cond:
+            if len(self._pending) >= ALERT_QUEUE:
+                self.stats["dropped"] += 1
+                return
+            self._pending.append(alert)
+            self._cond.notify()
+        self.ensure_started()
+
+    def ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = Thread(target=self._send_loop, name="alert-sender", daemon=True)
+                self._thread.start()
+
+    def _send_loop(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                alert = self._pending.popleft()
+            with self._lock:
+                webhook, path = self._webhook, self._file
+            delivery = {}
+            if "webhook" in alert["sinks"] and webhook:
+                delivery["webhook"] = self._post(webhook, alert)
+            if "file" in alert["sinks"] and path:
+                delivery["file"] = self._append(path, alert)
+            if any(result != "ok" for result in delivery.values()):
+                self.stats["failed"] += 1
+            self.history.append({**{k: v for k, v in alert.items() if k != "sinks"}, "delivery": delivery})
+
+    @staticmethod
+    def _post(url: str, alert: dict) -> str:
+        # `content` is what Discord reads, `text` what Slack/Mattermost read.
+        body = json.dumps({"content": alert["summary"], "text": alert["summary"], "alert": alert}).encode()
+        req = urllib.request.Request(url, data=body, method="POST",
+                                     headers={"Content-Type": "application/json", "User-Agent": "rust-panel"})
+        error = "not sent"
+        for attempt in range(ALERT_WEBHOOK_RETRIES):
+            if attempt:
+                time.sleep(2 ** attempt)
+            try:
+                with urllib.request.urlopen(req, timeout=ALERT_WEBHOOK_TIMEOUT) as resp:
+                    resp.read()
+                return "ok"
+            except urllib.error.HTTPError as exc:
+                error = f"HTTP {exc.code}"
+                if exc.code < 500 and exc.code != 429:
+                    break
+            except (urllib.error.URLError, OSError) as exc:
+                error = str(getattr(exc, "reason", exc))
+        return error
+
+    @staticmethod
+    def _append(path: str, alert: dict) -> str:
+        try:
+            with open(os.path.expanduser(path), "a", encoding="utf-8") as fh:
+                fh.write(json.dumps({k: v for k, v in alert.items() if k != "sinks"}) + "\n")
+        except OSError as exc:
+            return str(exc)
+        return "ok"
+
+
+_ALERTS = _AlertEngine()
+_ALERTS.configure(CONFIG["alert_rules"], CONFIG["alert_webhook"], CONFIG["alert_file"])
+
+def _alerts_payload() -> dict:
+    cfg = _get_config()
+    return {
+        "rules": cfg["alert_rules"],
+        "events": ALERT_EVENTS,
+        "webhook_set": bool(cfg["alert_webhook"]),
+        "file": cfg["alert_file"],
+        "stats": dict(_ALERTS.stats),
+        "history": list(_ALERTS.history)[::-1],
+    }
+
+@app.get("/api/alerts")
+def api_alerts():
     if not _authorized(request):
         return jsonify({"ok": False, "error": "unauthorized"}), 401
-    return jsonify({"ok": True, "config": _get_config()})
-
+    return jsonify({"ok": True, **_alerts_payload()})
 
-@app.post("/api/config")
-def api_update_config():
+@app.put("/api/alerts")
+def api_replace_alerts():
     if not _authorized(request):
         return jsonify({"ok": False, "error": "unauthorized"}), 401
     data = request.get_json(silent=True) or {}
     if not isinstance(data, dict):
         return jsonify({"ok": False, "error": "invalid payload"}), 400
+    updates = {f"alert_{key}": data[key] for key in ("rules", "webhook", "file") if key in data}
     try:
-        cfg = _update_config(data)
+        _update_config(updates)
     except ValueError as exc:
         return jsonify({"ok": False, "error": str(exc)}), 400
-    return jsonify({"ok": True, "config": cfg})
-
+    return jsonify({"ok": True, **_alerts_payload()})
 
-@app.get("/api/metrics")
-def api_metrics():
+@app.post("/api/alerts/test")
+def api_test_alert():
     if not _authorized(request):
         return jsonify({"ok": False, "error": "unauthorized"}), 401
-    try:
-        load1, load5, load15 = os.getloadavg()
-    except OSError:
-        load1 = load5 = load15 = 0.0
+    cfg = _get_config()
+    if not (cfg["alert_webhook"] or cfg["alert_file"]):
+        return jsonify({"ok": False, "error": "no alert webhook or file configured"}), 400
+    now = time.time()
+    _ALERTS.enqueue({
+        "rule": "test", "service": _inst().service, "ts": now, "count": 1, "window": 0, "span": 0.0,
+        "message": "Test notification from Rust Panel", "sinks": list(ALERT_SINKS),
+        "summary": f"[{_inst().service}] test alert from Rust Panel",
+    })
+    return jsonify({"ok": True}), 202
 
-    metrics = {
-        "ok": True,
-        "load": {"1": load1, "5": load5, "15": load15},
-        "memory": _memory_usage(),
-        "disk": _disk_usage(FILE_ROOT),
-    }
-    return jsonify(metrics)
+# --- RCON ---
+# Rust's WebRCON is a WebSocket at ws://host:port/<password>. Commands are
+# JSON {"Identifier", "Message", "Name"}; replies echo the Identifier, while
+# console output arrives unsolicited with Identifier 0 or -1. One connection
+# is shared by every panel user: callers are matched to replies by their
+# Identifier, and console messages go to a ring that SSE clients follow.
+RCON_TIMEOUT = 10.0
+RCON_CONSOLE_LINES = 2000
+RCON_PING_INTERVAL = 30.0
+RCON_RECONNECT_MAX = 30.0
+_WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
 
+class _RconError(Exception):
+    pass
 
-@app.get("/api/backups")
-def api_list_backups():
-    if not _authorized(request):
-        return jsonify({"ok": False, "error": "unauthorized"}), 401
-    backups = _list_backups()
-    return jsonify({"ok": True, "backups": backups, "path": _relative(_ensure_backup_dir())})
+class _WebSocket:
+    """Minimal RFC 6455 client: text frames out (masked), text/ping/close in."""
 
+    def __init__(self, host: str, port: int, path: str, timeout: float):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self._send_lock = Lock()
+        self._reader = self.sock.makefile("rb")
+        try:
+            self._handshake(host, port, path)
+        except BaseException:
+            self._reader.close()
+            self.sock.close()
+            raise
+        self.sock.settimeout(None)
 
-@app.post("/api/backups")
-def api_create_backup():
+    def _handshake(self, host: str, port: int, path: str) -> None:
+        key = base64.b64encode(os.urandom(16))
+        self.sock.sendall(
+            f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key.decode()}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode()
+        )
+        # Read the response head line by line: a frame the server sends right after
+        # the 101 stays in the reader's buffer for recv_text().
+        lines, size = [], 0
+        while True:
+            line = self._reader.readline(65536)
+            if not line:
+                raise _RconError("connection closed during handshake")
+            size += len(line)
+            if size > 65536:
+                raise _RconError("oversized handshake response")
+            if line in (b"\r\n", b"\n"):
+                break
+            lines.append(line.decode("latin-1").rstrip("\r\n"))
+        if not lines or len(lines[0].split()) < 2 or lines[0].split()[1] != "101":
+            raise _RconError(f"handshake rejected: {lines[0]} (wrong password?)")
+        headers = {k.strip().lower(): v.strip() for k, _, v in (line.partition(":") for line in lines[1:])}
+        expected = base64.b64encode(hashlib.sha1(key + _WS_GUID).digest()).decode()
+        if headers.get("sec-websocket-accept") != expected:
+            raise _RconError("handshake failed: bad Sec-WebSocket-Accept")
+
+    def _send_frame(self, opcode: int, payload: bytes) -> None:
+        header = bytearray([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header.append(0x80 | length)
+        elif length < 1 << 16:
+            header.append(0x80 | 126)
+            header += struct.pack("!H", length)
+        else:
+            header.append(0x80 | 127)
+            header += struct.pack("!Q", length)
+        mask = os.urandom(4)
+        masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        with self._send_lock:
+            self.sock.sendall(bytes(header) + mask + masked)
+
+    def send_text(self, text: str) -> None:
+        self._send_frame(0x1, text.encode("utf-8"))
+
+    def ping(self) -> None:
+        self._send_frame(0x9, b"")
+
+    def _read_exact(self, count: int) -> bytes:
+        data = self._reader.read(count)
+        if data is None or len(data) < count:
+            raise _RconError("connection closed")
+        return data
+
+    def recv_text(self) -> str:
+        """Block until a complete text message arrives; answers pings on the way."""
+        fragments: list[bytes] = []
+        while True:
+            first, second = self._read_exact(2)
+            opcode, fin = first & 0x0F, first & 0x80
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", self._read_exact(2))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", self._read_exact(8))[0]
+            mask = self._read_exact(4) if second & 0x80 else None
+            payload = self._read_exact(length) if length else b""
+            if mask:
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+            if opcode == 0x8:
+                with contextlib.suppress(OSError):
+                    self._send_frame(0x8, payload[:2])
+                raise _RconError("server closed the connection")
+            if opcode == 0x9:
+                self._send_frame(0xA, payload)
+                continue
+            if opcode == 0xA:
+                continue
+            if opcode in (0x1, 0x2, 0x0):
+                fragments.append(payload)
+                if fin:
+                    return b"".join(fragments).decode("utf-8", errors="replace")
+
+    def close(self) -> None:
+        with contextlib.suppress(OSError):
+            self.sock.shutdown(socket.SHUT_RDWR)
+        with contextlib.suppress(OSError):
+            self.sock.close()
+
+
+class _RconClient:
+    """Shared, self-healing WebRCON connection."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._ws: _WebSocket | None = None
+        self._target: tuple[str, int, str] | None = None
+        self._generation = 0
+        self._pending: dict[int, list] = {}  # identifier -> [Event, reply]
+        self._ids = itertools.count(1)
+        self._thread: Thread | None = None
+        self._wake = Event()
+        self.console = _LineRing(RCON_CONSOLE_LINES)
+        self.connected_since: float | None = None
+        self.last_error: str | None = None
+
+    def configure(self, host: str, port: int, password: str) -> None:
+        target = (host, int(port), password) if password else None
+        with self._lock:
+            if target == self._target:
+                return
+            self._target = target
+            self._generation += 1
+            ws, self._ws = self._ws, None
+        if ws:
+            ws.close()
+        self._wake.set()
+
+    @property
+    def configured(self) -> bool:
+        return self._target is not None
+
+    def poke(self) -> None:
+        """Skip the current reconnect backoff (e.g. right after starting the server)."""
+        self.ensure_started()
+        self._wake.set()
+
+    def ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None and self._target is not None:
+                self._thread = Thread(target=self._supervise, name="rcon", daemon=True)
+                self._thread.start()
+
+    def state(self) -> dict:
+        target = self._target
+        return {
+            "configured": target is not None,
+            "host": target[0] if target else None,
+            "port": target[1] if target else None,
+            "connected": self._ws is not None,
+            "connected_since": self.connected_since,
+            "last_error": self.last_error,
+        }
+
+    def command(self, text: str, timeout: float = RCON_TIMEOUT) -> dict:
+        """Send a console command and wait for the reply carrying its Identifier."""
+        if not self.configured:
+            raise _RconError("RCON is not configured")
+        self.ensure_started()
+        deadline = time.monotonic() + timeout
+        ws = self._ws
+        while ws is None:
+            if time.monotonic() >= deadline:
+                raise _RconError(f"not connected: {self.last_error or 'connecting'}")
+            self._wake.set()
+            time.sleep(0.1)
+            ws = self._ws
+        identifier = next(self._ids) % 2_000_000_000 + 1
+        slot = [Event(), None]
+        self._pending[identifier] = slot
+        try:
+            ws.send_text(json.dumps({"Identifier": identifier, "Message": text, "Name": "RustPanel"}))
+            if not slot[0].wait(max(0.0, deadline - time.monotonic())):
+                raise TimeoutError(f"no reply to {text.split()[0] if text.split() else text!r} within {timeout:g}s")
+        except OSError as exc:
+            raise _RconError(str(exc)) from exc
+        finally:
+            self._pending.pop(identifier, None)
+        if isinstance(slot[1], Exception):
+            raise slot[1]
+        return slot[1]
+
+    def _fail_pending(self, error: Exception) -> None:
+        for slot in list(self._pending.values()):
+            slot[1] = error
+            slot[0].set()
+
+    def _supervise(self) -> None:
+        delay = 1.0
+        while True:
+            with self._lock:
+                target, generation = self._target, self._generation
+            if target is None:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            host, port, password = target
+            try:
+                ws = _WebSocket(host, port, f"/{password}", timeout=RCON_TIMEOUT)
+            except (OSError, _RconError) as exc:
+                self.last_error = str(exc) or type(exc).__name__
+                self._wake.wait(delay)
+                self._wake.clear()
+                delay = min(delay * 2, RCON_RECONNECT_MAX)
+                continue
+            with self._lock:
+                if generation != self._generation:
+                    ws.close()  # reconfigured while connecting
+                    continue
+                self._ws = ws
+            delay = 1.0
+            self.connected_since = time.time()
+            self.last_error = None
+            pinger = Thread(target=self._keepalive, args=(ws,), name="rcon-ping", daemon=True)
+            pinger.start()
+            try:
+                self._read_loop(ws)
+            except (OSError, _RconError, ValueError) as exc:
+                self.last_error = str(exc) or type(exc).__name__
+            finally:
+                with self._lock:
+                    if self._ws is ws:
+                        self._ws = None
+                ws.close()
+                self.connected_since = None
+                self._fail_pending(_RconError(f"connection lost: {self.last_error}"))
+
+    def _keepalive(self, ws: _WebSocket) -> None:
+        while self._ws is ws:
+            time.sleep(RCON_PING_INTERVAL)
+            if self._ws is not ws:
+                return
+            try:
+                ws.ping()
+            except OSError:
+                ws.close()  # unblocks the reader, which reconnects
+                return
+
+    def _read_loop(self, ws: _WebSocket) -> None:
+        while True:
+            raw = ws.recv_text()
+            try:
+                message = json.loads(raw)
+            except ValueError:
+                message = {"Message": raw, "Identifier": 0, "Type": "Generic"}
+            identifier = message.get("Identifier")
+            slot = self._pending.get(identifier) if isinstance(identifier, int) and identifier > 0 else None
+            if slot is not None:
+                slot[1] = {"message": message.get("Message", ""), "type": message.get("Type", "Generic")}
+                slot[0].set()
+                continue
+            self.console.append(json.dumps({
+                "ts": time.time(),
+                "type": message.get("Type", "Generic"),
+                "message": message.get("Message", ""),
+            }))
+
+
+_RCON_CLIENTS: dict[str, _RconClient] = {}
+_RCON_CLIENTS_LOCK = Lock()
+
+def _rcon(server: str | None = None) -> _RconClient:
+    """The RCON connection of a server (the current one by default), kept in step with its settings."""
+    inst = _inst(server)
+    with _RCON_CLIENTS_LOCK:
+        client = _RCON_CLIENTS.get(inst.name)
+        if client is None:
+            client = _RCON_CLIENTS[inst.name] = _RconClient()
+    client.configure(inst.cfg["rcon_host"], inst.cfg["rcon_port"], inst.cfg["rcon_password"])
+    return client
+
+def _retire_rcon_clients(active: set[str]) -> None:
+    with _RCON_CLIENTS_LOCK:
+        stale = [_RCON_CLIENTS.pop(name) for name in list(_RCON_CLIENTS) if name not in active]
+    for client in stale:
+        client.configure("", 0, "")  # drops the connection; the supervisor then idles
+
+@app.get("/api/rcon")
+def rcon_state():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    rcon = _rcon()
+    rcon.ensure_started()
+    return jsonify({"ok": True, "rcon": rcon.state()})
+
+@app.post("/api/rcon")
+def rcon_command():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    data = request.get_json(silent=True) or {}
+    command = data.get("command") if isinstance(data, dict) else None
+    if not isinstance(command, str) or not command.strip():
+        return jsonify({"ok": False, "error": "missing command"}), 400
+    try:
+        timeout = max(0.5, min(float(data.get("timeout", RCON_TIMEOUT)), 120.0))
+    except (TypeError, ValueError):
+        return jsonify({"ok": False, "error": "invalid timeout"}), 400
+    try:
+        reply = _rcon().command(command.strip(), timeout=timeout)
+    except TimeoutError as exc:
+        return jsonify({"ok": False, "error": str(exc)}), 504
+    except _RconError as exc:
+        return jsonify({"ok": False, "error": str(exc)}), 503
+    return jsonify({"ok": True, "response": reply["message"], "type": reply["type"]})
+
+@app.get("/api/rcon/stream")
+def rcon_stream():
+    if not _authorized(request):
+        return Response("unauthorized\n", status=401)
+    rcon = _rcon()
+    rcon.ensure_started()
+    try:
+        n = max(0, min(int(request.args.get("n", "100")), RCON_CONSOLE_LINES))
+    except ValueError:
+        n = 100
+    last_id = _parse_event_id(request.headers.get("Last-Event-ID") or request.args.get("last_id"))
+    if last_id is not None and last_id <= rcon.console.head:
+        cursor, backlog = last_id, None
+    else:
+        cursor, backlog = 0, n
+
+    def stream():
+        yield "retry: 3000\n\n"
+        yield from _sse_lines(rcon.console, cursor, backlog)
+
+    return _sse_response(stream())
+
+# --- Background jobs ---
+JOB_WORKERS = max(1, int(os.environ.get("RUSTPANEL_JOB_WORKERS", "2")))
+# Graceful start/stop/restart get their own pool so they never queue behind backups or extracts.
+LIFECYCLE_WORKERS = max(1, int(os.environ.get("RUSTPANEL_LIFECYCLE_WORKERS", "2")))
+JOB_OUTPUT_LINES = 5000
+JOB_HISTORY = 50
+JOB_ACTIVE_STATES = {"queued", "running"}
+_JOB_DURATIONS = _Histogram(("kind", "state"), (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200))
+
+class _JobCancelled(Exception):
+    pass
+
+class _Progress:
+    """Work counters for a job, with derived throughput and ETA."""
+
+    def __init__(self, phase: str = ""):
+        self.phase = phase
+        self.total_bytes: int | None = None
+        self.total_files: int | None = None
+        self.bytes = 0
+        self.files = 0
+        self.started = time.time()
+
+    def to_dict(self) -> dict:
+        elapsed = max(time.time() - self.started, 1e-6)
+        rate = self.bytes / elapsed
+        eta = None
+        if self.total_bytes and rate > 0:
+            eta = max(self.total_bytes - self.bytes, 0) / rate
+        percent = min(self.bytes / self.total_bytes * 100, 100.0) if self.total_bytes else None
+        return {
+            "phase": self.phase,
+            "elapsed": elapsed,
+            "bytes": self.bytes,
+            "total_bytes": self.total_bytes,
+            "files": self.files,
+            "total_files": self.total_files,
+            "percent": percent,
+            "throughput": rate,
+            "eta": eta,
+        }
+
+class _Job:
+    """A long-running task executed on the job pool with incrementally captured output."""
+
+    def __init__(self, kind: str, title: str, key: str | None = None, meta: dict | None = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.title = title
+        self.key = key
+        self.meta = meta or {}
+        self.server = _inst().name
+        self.state = "queued"
+        self.exit: int | None = None
+        self.error: str | None = None
+        self.result: dict | None = None
+        self.progress: _Progress | None = None
+        self.created = time.time()
+        self.started: float | None = None
+        self.finished: float | None = None
+        self.output = _LineRing(JOB_OUTPUT_LINES)
+        self._cancel = Event()
+        self._cancel_hooks: list = []
+
+    @property
+    def active(self) -> bool:
+        return self.state in JOB_ACTIVE_STATES
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+        for hook in list(self._cancel_hooks):
+            with contextlib.suppress(Exception):
+                hook()
+
+    def on_cancel(self, hook) -> None:
+        self._cancel_hooks.append(hook)
+        if self.cancelled:
+            hook()
+
+    def check_cancelled(self) -> None:
+        if self._cancel.is_set():
+            raise _JobCancelled()
+
+    def sleep(self, seconds: float) -> None:
+        """Wait up to `seconds`, raising _JobCancelled as soon as the job is cancelled."""
+        if seconds > 0 and self._cancel.wait(seconds):
+            raise _JobCancelled()
+
+    def log(self, text: str) -> None:
+        for line in text.splitlines() or [""]:
+            self.output.append(line)
+
+    def to_dict(self, *, output: bool = False) -> dict:
+        end = self.finished or time.time()
+        data = {
+            "id": self.id,
+            "kind": self.kind,
+            "title": self.title,
+            "server": self.server,
+            "state": self.state,
+            "ok": self.state == "succeeded",
+            "exit": self.exit,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "duration": (end - self.started) if self.started else None,
+            "cursor": self.output.head,
+            **self.meta,
+        }
+        if self.progress is not None:
+            data["progress"] = self.progress.to_dict()
+        if self.result is not None:
+            data["result"] = self.result
+        if output:
+            _, lines = self.output.read_after(0)
+            data["output"] = "\n".join(line for _, line in lines)
+        return data
+
+
+_JOBS: dict[str, _Job] = {}
+_JOBS_LOCK = Lock()
+_JOB_POOL = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+_LIFECYCLE_POOL = ThreadPoolExecutor(max_workers=LIFECYCLE_WORKERS, thread_name_prefix="lifecycle")
+
+def _submit_job(kind: str, title: str, target, *, key: str | None = None,
+                meta: dict | None = None, pool: ThreadPoolExecutor | None = None) -> tuple[_Job, bool]:
+    """Queue `target(job)` on `pool` (the shared job pool by default); returns (job, created).
+
+    A job submitted with the same `key` as one that is still queued or
+    running for the same server is coalesced onto the existing job instead
+    of starting another. The job runs with that server as the current one.
+    """
+    job, created = _register_job(kind, title, key, meta)
+    if created:
+        (pool or _JOB_POOL).submit(_execute_job, job, target)
+    return job, created
+
+def _register_job(kind: str, title: str, key: str | None, meta: dict | None) -> tuple[_Job, bool]:
+    server = _inst().name
+    with _JOBS_LOCK:
+        if key is not None:
+            for existing in _JOBS.values():
+                if existing.key == key and existing.server == server and existing.active:
+                    return existing, False
+        job = _Job(kind, title, key, meta)
+        _JOBS[job.id] = job
+        finished = [j for j in _JOBS.values() if not j.active]
+        for old in sorted(finished, key=lambda j: j.created)[:-JOB_HISTORY or None]:
+            _JOBS.pop(old.id, None)
+    return job, True
+
+def _execute_job(job: _Job, target) -> None:
+    job.state = "running"
+    job.started = time.time()
+    token = _CURRENT_INSTANCE.set(job.server)
+    try:
+        job.check_cancelled()
+        code = target(job)
+        job.exit = code
+        job.state = "succeeded" if code == 0 else "failed"
+        if code != 0 and job.cancelled:
+            job.state = "cancelled"
+    except _JobCancelled:
+        job.log("[panel] cancelled")
+        job.state = "cancelled"
+    except Exception as exc:  # noqa: BLE001 - surfaced to the API caller
+        job.error = str(exc)
+        job.log(f"[panel] {type(exc).__name__}: {exc}")
+        job.state = "failed"
+    finally:
+        _CURRENT_INSTANCE.reset(token)
+        job.finished = time.time()
+        job.output.close()
+        _JOB_DURATIONS.observe(job.finished - job.started, job.kind, job.state)
+
+@contextlib.contextmanager
+def _inline_job(kind: str, title: str, meta: dict | None = None):
+    """Track work done on the request thread as a job, so /api/jobs shows its progress and it can be cancelled.
+
+    Exceptions mark the job failed (or cancelled) and propagate to the caller.
+    """
+    job, _ = _register_job(kind, title, None, meta)
+    job.state = "running"
+    job.started = time.time()
+    try:
+        yield job
+        job.exit = 0
+        job.state = "succeeded"
+    except _JobCancelled:
+        job.log("[panel] cancelled")
+        job.state = "cancelled"
+        raise
+    except BaseException as exc:
+        job.error = str(exc) or type(exc).__name__
+        job.log(f"[panel] {type(exc).__name__}: {job.error}")
+        job.state = "failed"
+        raise
+    finally:
+        job.finished = time.time()
+        job.output.close()
+        _JOB_DURATIONS.observe(job.finished - job.started, job.kind, job.state)
+
+def _get_job(job_id: str) -> _Job | None:
+    with _JOBS_LOCK:
+        return _JOBS.get(job_id)
+
+def _run_streaming(cmd: list[str], job: _Job, *, cancellable: bool = True) -> int:
+    """Run a command, appending its combined output to the job as it is produced."""
+    started = time.perf_counter()
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                                bufsize=1, errors="replace", env=_inst().env)
+    except OSError as exc:
+        job.log(f"[panel] {exc}")
+        return 127
+    if cancellable:
+        job.on_cancel(proc.terminate)
+    for line in proc.stdout:
+        job.output.append(line.rstrip("\n"))
+    code = proc.wait()
+    _SPAWNS.observe(time.perf_counter() - started, _spawn_label(cmd))
+    return code
+
+def _run_steps(job: _Job, steps: list[tuple[str, list[str]]]) -> int:
+    """Run named commands in order, stopping at the first failure."""
+    code = 0
+    for name, cmd in steps:
+        job.check_cancelled()
+        job.log(f"==> {name}")
+        code = _run_streaming(cmd, job)
+        job.log(f"<== {name} exit {code}")
+        if code != 0:
+            break
+    return code
+
+def _job_response(job: _Job, created: bool):
+    return jsonify({"ok": True, "job": job.to_dict(), "coalesced": not created}), 202 if created else 200
+
+@app.get("/api/jobs")
+def api_list_jobs():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    server = _inst().name
+    with _JOBS_LOCK:
+        jobs = sorted((j for j in _JOBS.values() if j.server == server), key=lambda j: j.created, reverse=True)
+    return jsonify({"ok": True, "jobs": [job.to_dict() for job in jobs]})
+
+@app.get("/api/jobs/<job_id>")
+def api_get_job(job_id: str):
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    job = _get_job(job_id)
+    if job is None:
+        return jsonify({"ok": False, "error": "not found"}), 404
+    return jsonify({"ok": True, "job": job.to_dict(output=True)})
+
+@app.post("/api/jobs/<job_id>/cancel")
+def api_cancel_job(job_id: str):
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    job = _get_job(job_id)
+    if job is None:
+        return jsonify({"ok": False, "error": "not found"}), 404
+    if not job.active:
+        return jsonify({"ok": False, "error": f"job already {job.state}"}), 409
+    job.cancel()
+    return jsonify({"ok": True, "job": job.to_dict()})
+
+@app.get("/api/jobs/<job_id>/stream")
+def api_stream_job(job_id: str):
+    if not _authorized(request):
+        return Response("unauthorized\n", status=401)
+    job = _get_job(job_id)
+    if job is None:
+        return Response("not found\n", status=404)
+    cursor = _parse_event_id(request.headers.get("Last-Event-ID") or request.args.get("last_id")) or 0
+
+    def stream():
+        yield "retry: 3000\n\n"
+        yield from _sse_lines(job.output, cursor)
+        yield f"event: end\ndata: {json.dumps(job.to_dict())}\n\n"
+
+    return _sse_response(stream())
+
+# --- Update checks ---
+# Both update scripts have a --check mode that prints `installed=` / `latest=`
+# without touching the install: the Rust build id from the appmanifest versus
+# SteamCMD's app info for the public branch, and the recorded Oxide release
+# versus the one the ZIP URL currently resolves to. Asking SteamCMD takes a
+# few seconds, so answers are cached for UPDATE_CHECK_TTL.
+UPDATE_CHECK_TTL = int(os.environ.get("RUSTPANEL_UPDATE_CHECK_TTL", "900"))
+UPDATE_CHECK_TIMEOUT = 120
+
+def _update_check_cmd(target: str, url: str | None) -> list[str]:
+    if target == "rust":
+        return ["sudo", "/usr/local/bin/rust_update.sh", "--check"]
+    return ["sudo", "/usr/local/bin/oxide_update.sh", "--check", url or DEFAULT_OXIDE_ZIP]
+
+class _UpdateChecker:
+    """TTL cache of installed-vs-latest answers per server, one check in flight per target."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._locks: dict[tuple, threading.Lock] = {}
+        self._results: dict[tuple, dict] = {}
+
+    def get(self, target: str, url: str | None = None, *, refresh: bool = False, server: str | None = None) -> dict:
+        inst = _inst(server)
+        key = (inst.name, target, url or DEFAULT_OXIDE_ZIP) if target == "oxide" else (inst.name, target)
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            cached = self._results.get(key)
+            if cached and not refresh:
+                ttl = self.ttl if cached["error"] is None else min(self.ttl, 60)
+                if time.time() - cached["checked"] < ttl:
+                    return cached
+            result = self._check(target, _update_check_cmd(target, url), inst.env)
+            self._results[key] = result
+            return result
+
+    def invalidate(self, target: str) -> None:
+        server = _inst().name
+        with self._lock:
+            for key in [k for k in self._results if k[:2] == (server, target)]:
+                del self._results[key]
+
+    @staticmethod
+    def _check(target: str, cmd: list[str], env: dict) -> dict:
+        values: dict[str, str] = {}
+        error = None
+        started = time.perf_counter()
+        try:
+            proc = subprocess.run(cmd, capture_output=True, text=True, env=env, timeout=UPDATE_CHECK_TIMEOUT)
+        except (OSError, subprocess.TimeoutExpired) as exc:
+            proc, error = None, str(exc)
+        _SPAWNS.observe(time.perf_counter() - started, _spawn_label(cmd))
+        if proc is not None:
+            for line in proc.stdout.splitlines():
+                key, sep, value = line.partition("=")
+                if sep and key in {"installed", "latest"}:
+                    values[key] = value.strip()
+            if proc.returncode != 0:
+                tail = (proc.stderr or proc.stdout).strip().splitlines()
+                error = tail[-1] if tail else f"exit {proc.returncode}"
+        installed = values.get("installed") or None
+        latest = values.get("latest") or None
+        return {
+            "target": target,
+            "installed": installed,
+            "latest": latest,
+            "current": installed == latest if installed and latest else None,
+            "checked": time.time(),
+            "error": error,
+        }
+
+_UPDATES = _UpdateChecker(UPDATE_CHECK_TTL)
+
+@app.get("/api/updates")
+def api_updates():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    refresh = _coerce_bool(request.args.get("refresh", False))
+    url = (request.args.get("oxide_url") or "").strip() or DEFAULT_OXIDE_ZIP
+    server = _inst().name
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        rust = pool.submit(_UPDATES.get, "rust", refresh=refresh, server=server)
+        oxide = pool.submit(_UPDATES.get, "oxide", url, refresh=refresh, server=server)
+        return jsonify({"ok": True, "rust": rust.result(), "oxide": oxide.result(), "ttl": UPDATE_CHECK_TTL})
+
+def _run_update_steps(job: _Job, steps: list[tuple[str, list[str]]]) -> int:
+    """Run update steps, then forget cached checks since the installed versions moved."""
+    try:
+        return _run_steps(job, steps)
+    finally:
+        _UPDATES.invalidate("rust")
+        _UPDATES.invalidate("oxide")
+
+# --- Artifact cache ---
+# Oxide/Carbon ZIPs are fetched by the panel into CACHE_DIR/artifacts, keyed by
+# URL. A repeat install sends If-None-Match / If-Modified-Since and reuses the
+# cached file on 304. Downloads stream into a per-request temp file and are
+# checked (Content-Length, optional expected SHA-256, every ZIP member's CRC)
+# before being renamed into place under their SHA-256; cached files are
+# re-hashed before reuse. oxide_update.sh then installs from the local file.
+ARTIFACT_DIR = CACHE_DIR / "artifacts"
+ARTIFACT_KEEP = 5
+ARTIFACT_TIMEOUT = 60
+_ARTIFACT_LOCK = threading.Lock()
+_ARTIFACT_LOCKS: dict[str, threading.Lock] = {}
+
+class _ArtifactError(Exception):
+    pass
+
+class _RedirectLog(urllib.request.HTTPRedirectHandler):
+    """Remembers each redirect target so a release tag survives the CDN hop."""
+
+    def __init__(self):
+        super().__init__()
+        self.chain: list[str] = []
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        self.chain.append(newurl)
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+def _release_id(chain: list[str], headers) -> str | None:
+    """Same identity oxide_update.sh derives: release tag, else ETag, else Last-Modified + size."""
+    for url in chain:
+        match = re.search(r"/releases/download/([^/]+)/", url)
+        if match:
+            return match.group(1)
+    if headers.get("ETag"):
+        return f"etag:{headers['ETag']}"
+    if headers.get("Last-Modified"):
+        return f"modified:{headers['Last-Modified']} size:{headers.get('Content-Length', '')}"
+    return None
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _artifact_meta_path(url: str) -> Path:
+    return ARTIFACT_DIR / f"{hashlib.sha256(url.encode()).hexdigest()[:24]}.json"
+
+def _download_artifact(resp, job: _Job, sha256: str | None) -> tuple[Path, str, int]:
+    total = int(resp.headers.get("Content-Length") or 0) or None
+    job.progress = _Progress("downloading")
+    job.progress.total_bytes = total
+    digest = hashlib.sha256()
+    fd, tmp = tempfile.mkstemp(dir=ARTIFACT_DIR, prefix=".download-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            for block in iter(lambda: resp.read(1 << 16), b""):
+                job.check_cancelled()
+                fh.write(block)
+                digest.update(block)
+                job.progress.bytes += len(block)
+        size = job.progress.bytes
+        if total is not None and size != total:
+            raise _ArtifactError(f"download truncated: {size} of {total} bytes")
+        checksum = digest.hexdigest()
+        if sha256 and checksum != sha256:
+            raise _ArtifactError(f"checksum mismatch: expected {sha256}, got {checksum}")
+        try:
+            with zipfile.ZipFile(tmp) as archive:
+                bad = archive.testzip()
+        except zipfile.BadZipFile:
+            raise _ArtifactError("download is not a ZIP archive") from None
+        if bad is not None:
+            raise _ArtifactError(f"corrupt ZIP member: {bad}")
+        os.chmod(tmp, 0o644)
+        blob = ARTIFACT_DIR / f"{checksum}.zip"
+        os.replace(tmp, blob)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+    return blob, checksum, size
+
+def _fetch_artifact(url: str, job: _Job, *, sha256: str | None = None) -> dict:
+    """Return the cached artifact for url, downloading it only when it changed upstream."""
+    ARTIFACT_DIR.mkdir(parents=True, exist_ok=True)
+    with _ARTIFACT_LOCK:
+        lock = _ARTIFACT_LOCKS.setdefault(url, threading.Lock())
+    with lock:
+        meta_path = _artifact_meta_path(url)
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            meta = {}
+        cached = ARTIFACT_DIR / meta["file"] if meta.get("file") else None
+        if cached is not None and not (cached.is_file() and _file_sha256(cached) == meta.get("sha256")):
+            job.log(f"cached {cached.name} is missing or fails verification; downloading again")
+            cached = None
+
+        req = urllib.request.Request(url, headers={"User-Agent": "rust-panel"})
+        if cached is not None:
+            if meta.get("etag"):
+                req.add_header("If-None-Match", meta["etag"])
+            if meta.get("last_modified"):
+                req.add_header("If-Modified-Since", meta["last_modified"])
+        redirects = _RedirectLog()
+        try:
+            resp = urllib.request.build_opener(redirects).open(req, timeout=ARTIFACT_TIMEOUT)
+        except urllib.error.HTTPError as exc:
+            if exc.code != 304 or cached is None:
+                raise _ArtifactError(f"download failed: HTTP {exc.code} {exc.reason}") from None
+            resp = None
+        except (urllib.error.URLError, OSError) as exc:
+            raise _ArtifactError(f"download failed: {getattr(exc, 'reason', exc)}") from None
+
+        if resp is None:
+            if sha256 and meta["sha256"] != sha256:
+                raise _ArtifactError(f"checksum mismatch: expected {sha256}, got {meta['sha256']}")
+            os.utime(cached)
+            job.log(f"not modified upstream; using cached {cached.name}")
+            release = _release_id(redirects.chain, {}) or meta.get("release")
+            return {"path": cached, "sha256": meta["sha256"], "release": release, "cached": True}
+
+        with resp:
+            blob, checksum, size = _download_artifact(resp, job, sha256)
+            headers = resp.headers
+        meta = {
+            "url": url,
+            "file": blob.name,
+            "sha256": checksum,
+            "size": size,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "release": _release_id(redirects.chain, headers),
+            "fetched": time.time(),
+        }
+        _atomic_write(meta_path, lambda fh: fh.write(json.dumps(meta, indent=2).encode()))
+        job.log(f"downloaded {size} bytes, sha256 {checksum}")
+        _prune_artifacts(keep=blob.name)
+        return {"path": blob, "sha256": checksum, "release": meta["release"], "cached": False}
+
+def _prune_artifacts(keep: str) -> None:
+    """Keep the ARTIFACT_KEEP most recently used files and the metadata pointing at them."""
+    blobs = sorted(ARTIFACT_DIR.glob("*.zip"), key=lambda p: p.stat().st_mtime, reverse=True)
+    kept = {p.name for p in blobs[:ARTIFACT_KEEP]} | {keep}
+    for blob in blobs:
+        if blob.name not in kept:
+            with contextlib.suppress(OSError):
+                blob.unlink()
+    for meta_path in ARTIFACT_DIR.glob("*.json"):
+        try:
+            name = json.loads(meta_path.read_text()).get("file")
+        except (OSError, ValueError):
+            name = None
+        if name not in kept:
+            with contextlib.suppress(OSError):
+                meta_path.unlink()
+
+def _install_oxide(job: _Job, url: str, *, force: bool = False, sha256: str | None = None) -> int:
+    """Fetch the Oxide ZIP through the artifact cache, then install it from the local copy."""
+    job.check_cancelled()
+    job.log("==> Oxide download")
+    try:
+        artifact = _fetch_artifact(url, job, sha256=sha256)
+    except _ArtifactError as exc:
+        job.log(f"[panel] {exc}")
+        job.log("<== Oxide download failed")
+        return 1
+    job.log(f"<== Oxide download {artifact['release'] or artifact['sha256'][:12]}")
+    cmd = ["sudo", "/usr/local/bin/oxide_update.sh"]
+    if force:
+        cmd.append("--force")
+    cmd += ["--zip", str(artifact["path"])]
+    if artifact["release"]:
+        cmd += ["--release", artifact["release"]]
+    return _run_update_steps(job, [("Oxide update", cmd)])
+
+def _expected_sha256(data: dict) -> str | None:
+    value = (data.get("sha256") or "").strip().lower()
+    if value and not re.fullmatch(r"[0-9a-f]{64}", value):
+        raise ValueError("sha256 must be 64 hex digits")
+    return value or None
+
+# --- Rust auto-update (via SteamCMD) ---
+def _rust_update_step(*, validate: bool = True, force: bool = False) -> tuple[str, list[str]]:
+    cmd = ["sudo", "/usr/local/bin/rust_update.sh"]
+    if not validate:  # opt-in fast path: skip SteamCMD's re-hash of every installed file
+        cmd.append("--no-validate")
+    if force:
+        cmd.append("--force")
+    return ("Rust update", cmd)
+
+@app.post("/api/update_rust")
+def update_rust():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+
+    data = request.get_json(silent=True) or {}
+    steps = [_rust_update_step(validate=_coerce_bool(data.get("validate", True)),
+                               force=_coerce_bool(data.get("force", False)))]
+    job, created = _submit_job("update_rust", "Update Rust", lambda job: _run_update_steps(job, steps), key="update_rust")
+    return _job_response(job, created)
+
+
+@app.post("/api/install_rust")
+def install_rust():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+
+    steps = [("Rust install", ["sudo", "/usr/local/bin/rust_install.sh"])]
+    job, created = _submit_job("install_rust", "Install Rust", lambda job: _run_steps(job, steps), key="install_rust")
+    return _job_response(job, created)
+
+# --- Oxide/uMod/Carbon installer ---
+@app.post("/api/update_oxide")
+def update_oxide():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+
+    data = request.get_json(silent=True) or {}
+    url = data.get("url", "").strip() or DEFAULT_OXIDE_ZIP
+
+    force = _coerce_bool(data.get("force", False))
+    try:
+        sha256 = _expected_sha256(data)
+    except ValueError as exc:
+        return jsonify({"ok": False, "error": str(exc)}), 400
+
+    cfg = _get_config()
+    steps = []
+    if cfg.get("auto_download_rust_with_oxide"):
+        steps.append(_rust_update_step(validate=_coerce_bool(data.get("validate", True))))
+
+    def run(job: _Job) -> int:
+        code = _run_update_steps(job, steps) if steps else 0
+        return code or _install_oxide(job, url, force=force, sha256=sha256)
+
+    job, created = _submit_job("update_oxide", "Update Oxide", run, key="update_oxide")
+    return _job_response(job, created)
+
+@app.post("/api/oxide/rollback")
+def rollback_oxide():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+
+    steps = [("Oxide rollback", ["sudo", "/usr/local/bin/oxide_update.sh", "--rollback"])]
+    job, created = _submit_job("rollback_oxide", "Roll back Oxide", lambda job: _run_update_steps(job, steps),
+                               key="update_oxide")
+    return _job_response(job, created)
+
+
+# --- Graceful restart ---
+# POST /api/restart|stop|start with {"graceful": true} runs the lifecycle as a
+# job instead of a bare systemctl call: warn players, save over RCON and wait
+# for the save to land, stop, optionally update, start, then wait until the
+# server is actually accepting players. Every phase is timed, and the job
+# result carries the real downtime (stop issued -> ready).
+LIFECYCLE_COUNTDOWN = 60
+LIFECYCLE_SAVE_TIMEOUT = 180
+LIFECYCLE_READY_TIMEOUT = 900
+LIFECYCLE_NOTICES = (1800, 900, 600, 300, 120, 60, 30, 10, 5, 4, 3, 2, 1)
+LIFECYCLE_MESSAGE = "Server {action} in {time}"
+READY_MARKER = os.environ.get("RUSTPANEL_READY_MARKER", "Server startup complete")
+SAVE_DONE = re.compile(r"^Saved [\d,.]+ ents")
+
+class _Phases:
+    """Ordered, timed phases recorded on job.meta so /api/jobs shows them live."""
+
+    def __init__(self, job: _Job):
+        self.job = job
+        self.items: list[dict] = job.meta.setdefault("phases", [])
+
+    @contextlib.contextmanager
+    def __call__(self, name: str):
+        entry = {"name": name, "state": "running", "started": time.time(), "duration": None}
+        self.items.append(entry)
+        self.job.progress = _Progress(name)
+        self.job.log(f"==> {name}")
+        try:
+            yield entry
+        except BaseException as exc:
+            entry["state"] = "cancelled" if isinstance(exc, _JobCancelled) else "failed"
+            raise
+        else:
+            if entry["state"] == "running":
+                entry["state"] = "done"
+        finally:
+            entry["duration"] = time.time() - entry["started"]
+            self.job.log(f"<== {name} {entry['state']} in {entry['duration']:.1f}s")
+
+class _LifecycleError(Exception):
+    pass
+
+def _format_countdown(seconds: int) -> str:
+    if seconds >= 60 and seconds % 60 == 0:
+        minutes = seconds // 60
+        return f"{minutes} minute{'s' if minutes != 1 else ''}"
+    return f"{seconds} second{'s' if seconds != 1 else ''}"
+
+def _service_active() -> bool:
+    _STATUS.refresh(timeout=5)
+    state = _STATUS.get(_inst().service, timeout=0) or {}
+    return state.get("active_state") in {"active", "activating", "reloading"}
+
+def _countdown(job: _Job, seconds: int, verb: str, template: str) -> None:
+    deadline = time.monotonic() + seconds
+    for notice in [seconds] + [n for n in LIFECYCLE_NOTICES if n < seconds]:
+        job.sleep(deadline - notice - time.monotonic())
+        message = template.format(action=verb, time=_format_countdown(notice))
+        try:
+            _rcon().command(f"say {message}", timeout=5)
+            job.log(f"say: {message}")
+        except (_RconError, TimeoutError) as exc:
+            job.log(f"[panel] broadcast failed: {exc}")
+    job.sleep(deadline - time.monotonic())
+
+def _save_world(job: _Job, timeout: float) -> None:
+    """Issue server.save and wait for the game to report the save as written."""
+    rcon = _rcon()
+    cursor = rcon.console.head
+    started = time.monotonic()
+    reply = rcon.command("server.save", timeout=min(timeout, RCON_TIMEOUT))
+    if reply["message"]:
+        job.log(reply["message"])
+    while True:
+        cursor, lines = rcon.console.read_after(cursor)
+        for _, raw in lines:
+            with contextlib.suppress(ValueError, TypeError):
+                message = json.loads(raw).get("message", "")
+                if SAVE_DONE.search(message):
+                    job.log(message)
+                    return
+        if time.monotonic() - started > timeout:
+            raise _LifecycleError(f"no save confirmation within {timeout:g}s")
+        job.sleep(0.5)
+
+def _wait_ready(job: _Job, entry: dict, since_cursor: int, timeout: float) -> None:
+    """Wait for the startup marker in the journal, or for RCON to answer serverinfo."""
+    service, rcon = _inst().service, _rcon()
+    hub = _journal_hub(service)
+    cursor = since_cursor
+    started = time.monotonic()
+    rcon_started = time.time()
+    rcon.poke()
+    while True:
+        cursor, lines = hub.lines.read_after(cursor)
+        for _, line in lines:
+            if READY_MARKER and READY_MARKER in line:
+                entry["signal"] = "log"
+                job.log(f"ready: {line}")
+                return
+        if rcon.configured and (rcon.connected_since or 0) >= rcon_started:
+            with contextlib.suppress(_RconError, TimeoutError):
+                rcon.command("serverinfo", timeout=3)
+                entry["signal"] = "rcon"
+                job.log("ready: RCON answered serverinfo")
+                return
+        state = _STATUS.get(service, timeout=0) or {}
+        if state.get("active_state") == "failed":
+            raise _LifecycleError(f"{service} failed while starting ({state.get('result')})")
+        if time.monotonic() - started > timeout:
+            raise _LifecycleError(f"server not ready after {timeout:g}s")
+        job.sleep(1.0)
+
+def _pending_updates(job: _Job, options: dict) -> dict[str, bool]:
+    """Targets that still need updating, mapped to whether they are known to be outdated."""
+    pending = {}
+    for target in options["update"]:
+        check = _UPDATES.get(target, options["oxide_url"] if target == "oxide" else None, refresh=True)
+        if check["current"]:
+            job.log(f"{target}: {check['installed']} is the latest")
+            continue
+        note = f" ({check['error']})" if check["error"] else ""
+        job.log(f"{target}: {check['installed'] or 'unknown'} installed, {check['latest'] or 'unknown'} available{note}")
+        pending[target] = check["current"] is False
+    return pending
+
+def _run_lifecycle_job(job: _Job, action: str, options: dict) -> int:
+    service = _inst().service
+    phase = _Phases(job)
+    timings: dict = {}
+    job.result = timings
+    outdated = {target: False for target in options["update"]}
+    if options["update"] and options["only_if_outdated"]:
+        with phase("check"):
+            outdated = _pending_updates(job, options)
+        if not outdated:
+            job.log("[panel] everything is up to date; not restarting")
+            timings["skipped"] = True
+            return 0
+    running = _service_active()
+    if action in {"restart", "stop"} and running:
+        rcon_ok = _rcon().configured
+        if not rcon_ok:
+            job.log("[panel] RCON is not configured: no countdown or save before stopping")
+        if rcon_ok and options["countdown"]:
+            with phase("countdown"):
+                _countdown(job, options["countdown"], "restarting" if action == "restart" else "shutting down",
+                           options["message"])
+        if rcon_ok:
+            with phase("save"):
+                try:
+                    _save_world(job, options["save_timeout"])
+                except (_RconError, TimeoutError, _LifecycleError) as exc:
+                    if not options["force"]:
+                        raise _LifecycleError(f"save failed, server left running: {exc}") from exc
+                    job.log(f"[panel] save failed ({exc}); continuing because force is set")
+    elif action in {"restart", "stop"}:
+        job.log(f"{service} is not running; skipping countdown and save")
+    elif running:
+        job.log(f"{service} is already running")
+        return 0
+
+    down_since = None
+    if action in {"restart", "stop"}:
+        with phase("stop") as entry:
+            down_since = time.time()
+            code = _run_streaming(["sudo", "systemctl", "stop", service], job, cancellable=False)
+            _STATUS.refresh(timeout=0)
+            if code != 0:
+                entry["state"] = "failed"
+                return code
+        if action == "stop":
+            timings["downtime_started"] = down_since
+            return 0
+
+    code = 0
+    try:
+        if outdated:
+            with phase("update") as entry:
+                # A target the check just found outdated skips the script's own re-check.
+                if "rust" in outdated:
+                    code = _run_update_steps(job, [_rust_update_step(validate=options["validate"], force=outdated["rust"])])
+                if code == 0 and "oxide" in outdated:
+                    code = _install_oxide(job, options["oxide_url"], force=outdated["oxide"])
+                if code != 0:
+                    entry["state"] = "failed"
+                    job.log("[panel] update failed; starting the previous build")
+    finally:
+        # Never leave the server down because an update failed or was cancelled.
+        with phase("start") as entry:
+            cursor = _journal_hub(service).lines.head
+            start_code = _run_streaming(["sudo", "systemctl", "start", service], job, cancellable=False)
+            _STATUS.refresh(timeout=0)
+            if start_code != 0:
+                entry["state"] = "failed"
+    if start_code != 0:
+        return start_code
+    with phase("ready") as entry:
+        _wait_ready(job, entry, cursor, options["ready_timeout"])
+    if down_since is not None:
+        timings["downtime"] = time.time() - down_since
+    timings["total"] = time.time() - job.started
+    return code
+
+def _lifecycle_options(action: str, data: dict) -> dict:
+    def bounded(key: str, default: int, upper: int) -> int:
+        value = data.get(key, default)
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{key} must be a number") from None
+        if not 0 <= value <= upper:
+            raise ValueError(f"{key} must be between 0 and {upper}")
+        return value
+
+    update = data.get("update") or []
+    if isinstance(update, str):
+        update = [update]
+    if action != "restart" and update:
+        raise ValueError("updates can only run as part of a restart")
+    if not isinstance(update, list) or any(u not in {"rust", "oxide"} for u in update):
+        raise ValueError("update must be a list of: rust, oxide")
+    message = data.get("message") or LIFECYCLE_MESSAGE
+    if not isinstance(message, str):
+        raise ValueError("message must be a string")
+    try:
+        message.format(action="", time="")
+    except (KeyError, IndexError, ValueError):
+        raise ValueError("message may only use {action} and {time}") from None
+    return {
+        "countdown": bounded("countdown", LIFECYCLE_COUNTDOWN, 3600),
+        "save_timeout": bounded("save_timeout", LIFECYCLE_SAVE_TIMEOUT, 3600),
+        "ready_timeout": bounded("ready_timeout", LIFECYCLE_READY_TIMEOUT, 7200),
+        "message": message,
+        "update": update,
+        "oxide_url": (data.get("oxide_url") or "").strip() or DEFAULT_OXIDE_ZIP,
+        "force": _coerce_bool(data.get("force", False)),
+        "validate": _coerce_bool(data.get("validate", True)),
+        "only_if_outdated": _coerce_bool(data.get("only_if_outdated", False)),
+    }
+
+def _start_lifecycle(action: str, options: dict) -> tuple[_Job, bool]:
+    titles = {"restart": "Graceful restart", "stop": "Graceful stop", "start": "Start and wait until ready"}
+    return _submit_job(
+        action, titles[action], lambda job: _run_lifecycle_job(job, action, options),
+        key="lifecycle", meta={"options": {k: v for k, v in options.items() if k != "oxide_url"}},
+        pool=_LIFECYCLE_POOL,
+    )
+
+def _submit_lifecycle(action: str, data: dict):
+    try:
+        options = _lifecycle_options(action, data)
+    except ValueError as exc:
+        return jsonify({"ok": False, "error": str(exc)}), 400
+    return _job_response(*_start_lifecycle(action, options))
+
+
+@app.get("/api/config")
+def api_get_config():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    return jsonify({"ok": True, "config": _public_config(_get_config())})
+
+
+@app.post("/api/config")
+def api_update_config():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"ok": False, "error": "invalid payload"}), 400
+    try:
+        cfg = _update_config(data)
+    except ValueError as exc:
+        return jsonify({"ok": False, "error": str(exc)}), 400
+    return jsonify({"ok": True, "config": _public_config(cfg)})
+
+
+# --- Metrics ---
+# A single background thread samples the host and the game server process
+# once per METRICS_INTERVAL into fixed-size array rings at three resolutions
+# (raw samples, 1 minute and 15 minute averages). Requests only read the
+# rings, so the cost of /api/metrics does not grow with the number of tabs.
+METRICS_INTERVAL = float(os.environ.get("RUSTPANEL_METRICS_INTERVAL", "1"))
+METRIC_FIELDS = (
+    "load1", "load5", "load15", "cpu_percent",
+    "mem_used", "mem_percent", "disk_used", "disk_percent",
+    "proc_cpu_percent", "proc_rss", "proc_threads", "proc_fds",
+    "proc_read_bps", "proc_write_bps",
+    # From the game's own `serverinfo`, only on samples where a fresh poll landed.
+    "game_fps", "game_players", "game_queued", "game_joining", "game_entities",
+    "game_memory_bytes", "game_net_in", "game_net_out", "game_uptime",
+)
+METRIC_RESOLUTIONS = (  # (seconds per point, points kept)
+    (1, 3600),     # 1 hour
+    (60, 1440),    # 1 day
+    (900, 2688),   # 28 days
+)
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+class _SeriesRing:
+    """Fixed-size ring of (timestamp, one float per field), stored column-wise in arrays."""
+
+    def __init__(self, step: int, size: int, fields: tuple[str, ...]):
+        self.step = step
+        self.size = size
+        self.times = array("d", bytes(8 * size))
+        self.columns = {name: array("d", [math.nan]) * size for name in fields}
+        self.count = 0
+        self.head = 0  # next slot to write
+
+    def append(self, ts: float, values: dict) -> None:
+        slot = self.head
+        self.times[slot] = ts
+        for name, column in self.columns.items():
+            column[slot] = values.get(name, math.nan)
+        self.head = (slot + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def _slot(self, index: int) -> int:
+        return (self.head - self.count + index) % self.size
+
+    def oldest(self) -> float | None:
+        return self.times[self._slot(0)] if self.count else None
+
+    def query(self, since: float, until: float, fields) -> tuple[list, dict]:
+        class _Times:  # lets bisect search the ring in logical order
+            def __len__(_):
+                return self.count
+            def __getitem__(_, index):
+                return self.times[self._slot(index)]
+        times = _Times()
+        lo = bisect.bisect_left(times, since)
+        hi = bisect.bisect_right(times, until)
+        slots = [self._slot(i) for i in range(lo, hi)]
+        series = {
+            name: [None if math.isnan(v) else v for v in (self.columns[name][i] for i in slots)]
+            for name in fields
+        }
+        return [self.times[i] for i in slots], series
+
+
+class _Downsampler:
+    """Averages samples into step-sized buckets and flushes each bucket into a ring."""
+
+    def __init__(self, ring: _SeriesRing):
+        self.ring = ring
+        self.bucket = None
+        self.sums: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+
+    def add(self, ts: float, values: dict) -> None:
+        bucket = int(ts // self.ring.step)
+        if self.bucket is not None and bucket != self.bucket:
+            self.flush()
+        self.bucket = bucket
+        for name, value in values.items():
+            if not math.isnan(value):
+                self.sums[name] = self.sums.get(name, 0.0) + value
+                self.counts[name] = self.counts.get(name, 0) + 1
+
+    def flush(self) -> None:
+        if self.bucket is None:
+            return
+        means = {name: self.sums[name] / self.counts[name] for name in self.sums}
+        self.ring.append(float(self.bucket * self.ring.step), means)
+        self.bucket = None
+        self.sums, self.counts = {}, {}
+
+
+def _read_proc(path: str) -> str | None:
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as fh:
+            return fh.read()
+    except OSError:
+        return None
+
+def _host_cpu_times() -> tuple[int, int] | None:
+    """(busy, total) jiffies from the aggregate line of /proc/stat."""
+    text = _read_proc("/proc/stat")
+    if not text or not text.startswith("cpu "):
+        return None
+    values = [int(v) for v in text.split("\n", 1)[0].split()[1:]]
+    idle = values[3] + (values[4] if len(values) > 4 else 0)
+    total = sum(values[:8])
+    return total - idle, total
+
+def _process_tree(pid: int) -> list[int]:
+    """pid plus its descendants (start scripts usually exec RustDedicated as a child)."""
+    pids, queue = [], [pid]
+    while queue and len(pids) < 256:
+        current = queue.pop()
+        pids.append(current)
+        try:
+            tasks = os.listdir(f"/proc/{current}/task")
+        except OSError:
+            continue
+        for task in tasks:
+            children = _read_proc(f"/proc/{current}/task/{task}/children")
+            if children:
+                queue.extend(int(c) for c in children.split())
+    return pids
+
+def _process_sample(pid: int) -> dict:
+    """Cumulative counters and gauges summed over the service's process tree."""
+    cpu_ticks = rss = threads = fds = read_bytes = write_bytes = 0
+    found = io_found = fd_found = False
+    for proc in _process_tree(pid):
+        stat = _read_proc(f"/proc/{proc}/stat")
+        if not stat:
+            continue
+        found = True
+        fields = stat.rsplit(")", 1)[1].split()  # skip "pid (comm)", comm may contain spaces
+        cpu_ticks += int(fields[11]) + int(fields[12])
+        threads += int(fields[17])
+        rss += int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+        with contextlib.suppress(OSError):
+            fds += len(os.listdir(f"/proc/{proc}/fd"))
+            fd_found = True
+        io = _read_proc(f"/proc/{proc}/io")
+        if io:
+            io_found = True
+            for line in io.splitlines():
+                key, _, value = line.partition(":")
+                if key == "read_bytes":
+                    read_bytes += int(value)
+                elif key == "write_bytes":
+                    write_bytes += int(value)
+    if not found:
+        return {}
+    sample = {"cpu_seconds": cpu_ticks / _CLK_TCK, "rss": rss, "threads": threads}
+    if fd_found:
+        sample["fds"] = fds
+    if io_found:
+        sample["read_bytes"], sample["write_bytes"] = read_bytes, write_bytes
+    return sample
+
+
+class _MetricsCollector:
+    def __init__(self, interval: float, server: str):
+        self.interval = interval
+        self.server = server
+        self._cond = Condition()
+        self._thread: Thread | None = None
+        self.rings = [_SeriesRing(step, size, METRIC_FIELDS) for step, size in METRIC_RESOLUTIONS]
+        self._downsamplers = [_Downsampler(ring) for ring in self.rings[1:]]
+        self._latest: dict | None = None
+        self._prev_cpu = None
+        self._prev_proc = None  # (pid, monotonic, sample)
+        self._stop = Event()
+
+    def ensure_started(self) -> None:
+        with self._cond:
+            if self._thread is None:
+                self._thread = Thread(target=self._loop, name=f"metrics-{self.server}", daemon=True)
+                self._thread.start()
+
+    def latest(self, timeout: float = 5.0) -> dict | None:
+        self.ensure_started()
+        with self._cond:
+            self._cond.wait_for(lambda: self._latest is not None, timeout=timeout)
+            return self._latest
+
+    def history(self, fields, since: float, until: float, step: int | None = None) -> dict:
+        with self._cond:
+            if step is None:
+                # Finest resolution that still reaches back to `since`.
+                ring = next(
+                    (r for r in self.rings if r.count and r.oldest() <= since),
+                    max(self.rings, key=lambda r: r.count * r.step if r.count else 0),
+                )
+            else:
+                ring = next(r for r in self.rings if r.step == step)
+            times, series = ring.query(since, until, fields)
+        return {"resolution": ring.step, "timestamps": times, "series": series}
+
+    def _process_metrics(self, now: float) -> tuple[dict, dict]:
+        state = _STATUS.get(_inst(self.server).service, timeout=0) or {}
+        pid = state.get("main_pid") or 0
+        if not pid:
+            self._prev_proc = None
+            return {}, {}
+        sample = _process_sample(pid)
+        if not sample:
+            self._prev_proc = None
+            return {}, {}
+        values = {"proc_rss": sample["rss"], "proc_threads": sample["threads"]}
+        if "fds" in sample:
+            values["proc_fds"] = sample["fds"]
+        prev = self._prev_proc
+        if prev and prev[0] == pid and now > prev[1]:
+            elapsed = now - prev[1]
+            values["proc_cpu_percent"] = (sample["cpu_seconds"] - prev[2]["cpu_seconds"]) / elapsed * 100
+            if "read_bytes" in sample and "read_bytes" in prev[2]:
+                values["proc_read_bps"] = max(0, sample["read_bytes"] - prev[2]["read_bytes"]) / elapsed
+                values["proc_write_bps"] = max(0, sample["write_bytes"] - prev[2]["write_bytes"]) / elapsed
+        self._prev_proc = (pid, now, sample)
+        summary = {
+            "pid": pid,
+            "cpu_percent": values.get("proc_cpu_percent"),
+            "rss": sample["rss"],
+            "threads": sample["threads"],
+            "fds": sample.get("fds"),
+            "read_bps": values.get("proc_read_bps"),
+            "write_bps": values.get("proc_write_bps"),
+        }
+        return values, summary
+
+    def _sample(self) -> tuple[dict, dict]:
+        now = time.monotonic()
+        try:
+            load1, load5, load15 = os.getloadavg()
+        except OSError:
+            load1 = load5 = load15 = 0.0
+        memory = _memory_usage()
+        disk = _disk_usage(_inst(self.server).file_root)
+        values = {
+            "load1": load1, "load5": load5, "load15": load15,
+            "mem_used": memory["used"], "mem_percent": memory["percent"],
+            "disk_used": disk["used"], "disk_percent": disk["percent"],
+        }
+        cpu = _host_cpu_times()
+        cpu_percent = None
+        if cpu and self._prev_cpu and cpu[1] > self._prev_cpu[1]:
+            cpu_percent = (cpu[0] - self._prev_cpu[0]) / (cpu[1] - self._prev_cpu[1]) * 100
+            values["cpu_percent"] = cpu_percent
+        self._prev_cpu = cpu
+        proc_values, process = self._process_metrics(now)
+        values.update(proc_values)
+        serverinfo = _serverinfo(self.server)
+        values.update(serverinfo.take_values())
+        snapshot = {
+            "load": {"1": load1, "5": load5, "15": load15},
+            "cpu": {"percent": cpu_percent},
+            "memory": memory,
+            "disk": disk,
+            "process": process or None,
+            "game": serverinfo.get(),
+        }
+        return values, snapshot
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                values, snapshot = self._sample()
+            except Exception as exc:  # keep sampling; one bad read must not kill history
+                app.logger.warning("metrics sample failed: %s", exc)
+            else:
+                ts = time.time()
+                values = {name: float(value) for name, value in values.items()}
+                with self._cond:
+                    self.rings[0].append(ts, values)
+                    for downsampler in self._downsamplers:
+                        downsampler.add(ts, values)
+                    self._latest = {**snapshot, "sampled_at": ts}
+                    self._cond.notify_all()
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+
+_METRICS_COLLECTORS: dict[str, _MetricsCollector] = {}
+_METRICS_COLLECTORS_LOCK = Lock()
+
+def _metrics(server: str | None = None) -> _MetricsCollector:
+    name = _inst(server).name
+    with _METRICS_COLLECTORS_LOCK:
+        collector = _METRICS_COLLECTORS.get(name)
+        if collector is None:
+            collector = _METRICS_COLLECTORS[name] = _MetricsCollector(METRICS_INTERVAL, name)
+    return collector
+
+@app.before_request
+def _start_collectors():
+    _SCHEDULER.ensure_started()
+    for name, inst in list(_INSTANCES.items()):
+        _STATUS.watch(inst.service)  # one `systemctl show` covers every server
+        _metrics(name).ensure_started()
+        _rcon(name).ensure_started()
+        _serverinfo(name).ensure_started()
+        _log_ingester(inst.service)
+
+@app.get("/api/metrics")
+def api_metrics():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    latest = _metrics().latest()
+    if latest is None:
+        return jsonify({"ok": False, "error": "metrics unavailable"}), 503
+    return jsonify({"ok": True, **latest})
+
+@app.get("/api/metrics/history")
+def api_metrics_history():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    fields = [f for f in request.args.get("fields", "").split(",") if f] or list(METRIC_FIELDS)
+    unknown = [f for f in fields if f not in METRIC_FIELDS]
+    if unknown:
+        return jsonify({"ok": False, "error": f"unknown fields: {', '.join(unknown)}"}), 400
+    now = time.time()
+    try:
+        # since/until accept epoch seconds, or negative offsets from now (since=-3600).
+        since = float(request.args.get("since", -3600))
+        until = float(request.args.get("until", now))
+        step = request.args.get("resolution", "auto")
+        step = None if step == "auto" else int(step)
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid range"}), 400
+    since = now + since if since < 0 else since
+    until = now + until if until <= 0 else until
+    if step is not None and step not in {r[0] for r in METRIC_RESOLUTIONS}:
+        return jsonify({"ok": False, "error": "invalid resolution"}), 400
+    collector = _metrics()
+    collector.ensure_started()
+    return jsonify({"ok": True, "fields": fields, **collector.history(fields, since, until, step)})
+
+
+# --- Server telemetry ---
+# One poller per server asks the game for `serverinfo` over that server's
+# shared RCON connection every SERVERINFO_INTERVAL; dashboards, /metrics and the metrics rings all
+# read its cache, so viewers never translate into RCON traffic.
+SERVERINFO_INTERVAL = max(2.0, float(os.environ.get("RUSTPANEL_SERVERINFO_INTERVAL", "10")))
+SERVERINFO_METRICS = {  # serverinfo key -> metrics ring field
+    "Framerate": "game_fps",
+    "Players": "game_players",
+    "Queued": "game_queued",
+    "Joining": "game_joining",
+    "EntityCount": "game_entities",
+    "NetworkIn": "game_net_in",
+    "NetworkOut": "game_net_out",
+    "Uptime": "game_uptime",
+}
+
+def _serverinfo_values(info: dict) -> dict:
+    values = {}
+    for key, field in SERVERINFO_METRICS.items():
+        if isinstance(info.get(key), (int, float)) and not isinstance(info.get(key), bool):
+            values[field] = float(info[key])
+    if isinstance(info.get("Memory"), (int, float)):
+        values["game_memory_bytes"] = float(info["Memory"]) * 1024 * 1024  # reported in MB
+    return values
+
+class _ServerInfoPoller:
+    def __init__(self, interval: float, server: str):
+        self.interval = interval
+        self.server = server
+        self._lock = Lock()
+        self._thread: Thread | None = None
+        self._info: dict | None = None
+        self._polled_at: float | None = None
+        self._error: str | None = None
+        self._unread: dict = {}
+        self._stop = Event()
+
+    def ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = Thread(target=self._loop, name=f"serverinfo-{self.server}", daemon=True)
+                self._thread.start()
+
+    def get(self) -> dict:
+        with self._lock:
+            age = time.time() - self._polled_at if self._polled_at else None
+            return {
+                "serverinfo": self._info,
+                "polled_at": self._polled_at,
+                "age": age,
+                "stale": age is None or age > self.interval * 3,
+                "error": self._error,
+            }
+
+    def take_values(self) -> dict:
+        """Ring values from a poll that has not been recorded yet (empty otherwise)."""
+        with self._lock:
+            values, self._unread = self._unread, {}
+            return values
+
+    def _poll(self) -> None:
+        reply = _rcon(self.server).command("serverinfo", timeout=min(self.interval, RCON_TIMEOUT))
+        info = json.loads(reply["message"])
+        if not isinstance(info, dict):
+            raise ValueError("unexpected serverinfo reply")
+        with self._lock:
+            self._info = info
+            self._polled_at = time.time()
+            self._error = None
+            self._unread = _serverinfo_values(info)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                if _rcon(self.server).configured:
+                    self._poll()
+            except (_RconError, TimeoutError, ValueError) as exc:
+                with self._lock:
+                    self._error = str(exc)
+            self._stop.wait(max(0.5, self.interval - (time.monotonic() - started)))
+
+
+_SERVERINFO_POLLERS: dict[str, _ServerInfoPoller] = {}
+_SERVERINFO_POLLERS_LOCK = Lock()
+
+def _serverinfo(server: str | None = None) -> _ServerInfoPoller:
+    name = _inst(server).name
+    with _SERVERINFO_POLLERS_LOCK:
+        poller = _SERVERINFO_POLLERS.get(name)
+        if poller is None:
+            poller = _SERVERINFO_POLLERS[name] = _ServerInfoPoller(SERVERINFO_INTERVAL, name)
+    return poller
+
+@app.get("/api/serverinfo")
+def api_serverinfo():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    poller = _serverinfo()
+    poller.ensure_started()
+    state = poller.get()
+    response = jsonify({"ok": not state["stale"], **state})
+    response.set_etag(f"{state['polled_at']}:{state['error']}")
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+
+# --- Prometheus / OpenMetrics ---
+# /metrics renders only what the collectors above already hold in memory:
+# the metrics rings, the status sampler cache, the cached backup listing and
+# the job/request histograms. A scrape never forks or walks the disk.
+# Server-specific families describe the default server, or the one named by
+# ?server= (scrape each server as its own target with `params`).
+HTTP_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+_HTTP_LATENCY = _Histogram(("method", "route"), HTTP_LATENCY_BUCKETS)
+_HTTP_RESPONSES: dict[tuple[str, str, str], int] = {}
+_HTTP_RESPONSES_LOCK = Lock()
+OPENMETRICS_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def _record_request(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        # Label by URL rule, not path, so /api/jobs/<job_id> stays one series.
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        _HTTP_LATENCY.observe(time.perf_counter() - started, request.method, route)
+        key = (request.method, route, str(response.status_code))
+        with _HTTP_RESPONSES_LOCK:
+            _HTTP_RESPONSES[key] = _HTTP_RESPONSES.get(key, 0) + 1
+    return response
+
+def _om_escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _om_value(value) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+class _OpenMetrics:
+    def __init__(self):
+        self.lines: list[str] = []
+
+    def _sample(self, name: str, labels: dict, value) -> None:
+        if labels:
+            rendered = ",".join(f'{key}="{_om_escape(val)}"' for key, val in labels.items())
+            self.lines.append(f"{name}{{{rendered}}} {_om_value(value)}")
+        else:
+            self.lines.append(f"{name} {_om_value(value)}")
+
+    def family(self, name: str, kind: str, help_text: str, samples, unit: str = "") -> None:
+        samples = [(labels, value) for labels, value in samples if value is not None]
+        if not samples:
+            return
+        self.lines.append(f"# TYPE {name} {kind}")
+        if unit:
+            self.lines.append(f"# UNIT {name} {unit}")
+        self.lines.append(f"# HELP {name} {help_text}")
+        suffix = "_total" if kind == "counter" else ""
+        for labels, value in samples:
+            self._sample(name + suffix, labels, value)
+
+    def histogram(self, name: str, help_text: str, histogram: _Histogram, unit: str = "") -> None:
+        series = histogram.snapshot()
+        if not series:
+            return
+        self.lines.append(f"# TYPE {name} histogram")
+        if unit:
+            self.lines.append(f"# UNIT {name} {unit}")
+        self.lines.append(f"# HELP {name} {help_text}")
+        for labels, values in series:
+            for bound, count in zip(histogram.buckets, values):
+                self._sample(f"{name}_bucket", {**labels, "le": _om_value(float(bound))}, count)
+            self._sample(f"{name}_bucket", {**labels, "le": "+Inf"}, values[-1])
+            self._sample(f"{name}_sum", labels, values[-2])
+            self._sample(f"{name}_count", labels, values[-1])
+
+    def render(self) -> str:
+        return "\n".join(self.lines + ["# EOF", ""])
+
+def _render_openmetrics() -> str:
+    om = _OpenMetrics()
+    latest = _metrics().latest(timeout=0) or {}
+
+    load = latest.get("load") or {}
+    om.family("rustpanel_host_load", "gauge", "Host load average.",
+              [({"period": f"{period}m"}, load.get(period)) for period in ("1", "5", "15")])
+    cpu = (latest.get("cpu") or {}).get("percent")
+    om.family("rustpanel_host_cpu_ratio", "gauge", "Host CPU utilisation over the last sample.",
+              [({}, cpu / 100 if cpu is not None else None)], unit="ratio")
+    memory = latest.get("memory") or {}
+    om.family("rustpanel_host_memory_bytes", "gauge", "Host memory.",
+              [({"kind": kind}, memory.get(kind)) for kind in ("total", "used", "available")], unit="bytes")
+    disk = latest.get("disk") or {}
+    om.family("rustpanel_host_disk_bytes", "gauge", "Filesystem holding the file root.",
+              [({"kind": kind}, disk.get(kind)) for kind in ("total", "used", "free")], unit="bytes")
+
+    state = _STATUS.get(_inst().service, timeout=0) or {}
+    unit = {"unit": state.get("unit") or _inst().service}
+    if state:
+        active = state.get("active_state") or "unknown"
+        om.family("rustpanel_service_up", "gauge", "1 when the Rust systemd unit is active.",
+                  [(unit, active == "active")])
+        om.family("rustpanel_service_state", "stateset", "systemd ActiveState of the Rust unit.",
+                  [({**unit, "rustpanel_service_state": name}, active == name)
+                   for name in ("active", "activating", "deactivating", "inactive", "failed", "reloading", "unknown")])
+        om.family("rustpanel_service_restarts", "counter", "Automatic restarts systemd performed (NRestarts).",
+                  [(unit, state.get("restarts"))])
+        om.family("rustpanel_service_start_time_seconds", "gauge", "When the current main process started.",
+                  [(unit, state.get("started_at"))], unit="seconds")
+
+    process = latest.get("process") or {}
+    if process:
+        cpu = process.get("cpu_percent")
+        om.family("rustpanel_process_cpu_ratio", "gauge", "CPU used by the Rust process tree (1.0 = one core).",
+                  [({}, cpu / 100 if cpu is not None else None)], unit="ratio")
+        om.family("rustpanel_process_resident_memory_bytes", "gauge", "Resident memory of the Rust process tree.",
+                  [({}, process.get("rss"))], unit="bytes")
+        om.family("rustpanel_process_threads", "gauge", "Threads in the Rust process tree.",
+                  [({}, process.get("threads"))])
+        om.family("rustpanel_process_open_fds", "gauge", "Open file descriptors in the Rust process tree.",
+                  [({}, process.get("fds"))])
+        om.family("rustpanel_process_io_bytes_per_second", "gauge", "Disk I/O of the Rust process tree.",
+                  [({"direction": "read"}, process.get("read_bps")), ({"direction": "write"}, process.get("write_bps"))])
+
+    game = latest.get("game") or {}
+    info = game.get("serverinfo") or {}
+    if info and not game.get("stale"):
+        values = _serverinfo_values(info)
+        om.family("rustpanel_game_fps", "gauge", "Server framerate reported by serverinfo.",
+                  [({}, values.get("game_fps"))])
+        om.family("rustpanel_game_players", "gauge", "Players by connection state.",
+                  [({"state": "online"}, values.get("game_players")),
+                   ({"state": "queued"}, values.get("game_queued")),
+                   ({"state": "joining"}, values.get("game_joining"))])
+        om.family("rustpanel_game_entities", "gauge", "Entities in the world.", [({}, values.get("game_entities"))])
+        om.family("rustpanel_game_memory_bytes", "gauge", "Managed memory reported by the game.",
+                  [({}, values.get("game_memory_bytes"))], unit="bytes")
+        om.family("rustpanel_game_network_bytes_per_second", "gauge", "Game network traffic.",
+                  [({"direction": "in"}, values.get("game_net_in")), ({"direction": "out"}, values.get("game_net_out"))])
+        om.family("rustpanel_game_uptime_seconds", "gauge", "Seconds since the game server started.",
+                  [({}, values.get("game_uptime"))], unit="seconds")
+
+    backups = _list_backups()
+    by_kind: dict[str, list[dict]] = {}
+    for info in backups:
+        by_kind.setdefault(info.get("kind", "archive"), []).append(info)
+    om.family("rustpanel_backups", "gauge", "Backups present in the backup directory.",
+              [({"kind": kind}, len(items)) for kind, items in by_kind.items()])
+    om.family("rustpanel_backup_size_bytes", "gauge", "Total size of all backups (restored size for incremental).",
+              [({"kind": kind}, sum(i.get("size") or 0 for i in items)) for kind, items in by_kind.items()], unit="bytes")
+    if backups:
+        newest = backups[0]
+        om.family("rustpanel_backup_last_size_bytes", "gauge", "Size of the newest backup.",
+                  [({"kind": newest.get("kind", "archive")}, newest.get("size"))], unit="bytes")
+        om.family("rustpanel_backup_last_timestamp_seconds", "gauge", "When the newest backup was written.",
+                  [({"kind": newest.get("kind", "archive")}, newest.get("modified"))], unit="seconds")
+
+    om.histogram("rustpanel_job_duration_seconds",
+                 "Duration of finished background jobs (backups, restores, SteamCMD and Oxide updates).",
+                 _JOB_DURATIONS, unit="seconds")
+    with _JOBS_LOCK:
+        active_jobs: dict[str, int] = {}
+        for job in _JOBS.values():
+            if job.active:
+                active_jobs[job.kind] = active_jobs.get(job.kind, 0) + 1
+    om.family("rustpanel_jobs_active", "gauge", "Queued or running background jobs.",
+              [({"kind": kind}, count) for kind, count in active_jobs.items()] or [({}, 0)])
+
+    om.histogram("rustpanel_http_request_duration_seconds", "Panel request latency by route.",
+                 _HTTP_LATENCY, unit="seconds")
+    with _HTTP_RESPONSES_LOCK:
+        responses = list(_HTTP_RESPONSES.items())
+    om.family("rustpanel_http_responses", "counter", "Panel responses by route and status code.",
+              [({"method": m, "route": r, "code": c}, n) for (m, r, c), n in responses])
+    om.family("rustpanel_http_streams_open", "gauge", "Open event streams (each holds a request thread).",
+              [({}, _SSE_OPEN)])
+    om.histogram("rustpanel_subprocess_duration_seconds", "Child processes the panel ran, by program.",
+                 _SPAWNS, unit="seconds")
+    return om.render()
+
+@app.get("/metrics")
+def openmetrics():
+    if not _authorized(request):
+        return Response("unauthorized\n", status=401, mimetype="text/plain",
+                        headers={"WWW-Authenticate": 'Bearer realm="rustpanel"'})
+    return Response(_render_openmetrics(), content_type=OPENMETRICS_TYPE)
+
+# The same counters as JSON with bucket-bound p50/p99, for a quick look or
+# the bench/ load runner without a Prometheus server.
+_PANEL_STARTED = time.monotonic()
+
+def _histogram_summary(histogram: _Histogram) -> list[dict]:
+    rows = []
+    for labels, series in histogram.snapshot():
+        count, total = series[-1], series[-2]
+        rows.append({**labels, "count": count, "total_seconds": round(total, 6),
+                     "mean": total / count if count else None,
+                     "p50": histogram.quantile(series, 0.5), "p99": histogram.quantile(series, 0.99)})
+    return sorted(rows, key=lambda row: row["total_seconds"], reverse=True)
+
+@app.get("/api/admin/stats")
+def api_admin_stats():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    uptime = time.monotonic() - _PANEL_STARTED
+    spawns = _histogram_summary(_SPAWNS)
+    return jsonify({
+        "ok": True,
+        "uptime": uptime,
+        "threads": threading.active_count(),
+        "streams": {"open": _SSE_OPEN, "max": SSE_MAX_STREAMS or None},
+        "requests": _histogram_summary(_HTTP_LATENCY),
+        "spawns": spawns,
+        "spawns_per_second": sum(row["count"] for row in spawns) / uptime if uptime else 0.0,
+    })
+
+
+@app.get("/api/backups")
+def api_list_backups():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    backups = _active_backups() + _list_backups()
+    return jsonify({"ok": True, "backups": backups, "path": _relative(_ensure_backup_dir())})
+
+
+@app.post("/api/backups")
+def api_create_backup():
     if not _authorized(request):
         return jsonify({"ok": False, "error": "unauthorized"}), 401
     data = request.get_json(silent=True) or {}
     label = data.get("label") if isinstance(data, dict) else None
+    mode = data.get("mode") if isinstance(data, dict) else None
+    try:
+        job, created = _start_backup(label if isinstance(label, str) else None, mode)
+    except ValueError as exc:
+        return jsonify({"ok": False, "error": str(exc)}), 400
+    return _job_response(job, created)
+
+def _start_backup(label: str | None, mode: str | None = None, *, prune: bool = False) -> tuple[_Job, bool]:
+    """Queue a backup job (coalesced with any running backup); optionally apply retention afterwards."""
+    mode = mode or _get_config()["backup_mode"]
+    if mode not in _CHOICE_SETTINGS["backup_mode"]:
+        raise ValueError("invalid mode")
+    codec = _backup_codec()
+    suffix = SNAPSHOT_SUFFIX if mode == "incremental" else _ARCHIVE_CODECS[codec]
     backup_dir = _ensure_backup_dir()
-    name = _new_backup_name(label if isinstance(label, str) else None)
+    name = _new_backup_name(label, suffix)
     target = backup_dir / name
     counter = 1
     while target.exists():
-        target = backup_dir / f"{name[:-7]}-{counter}.tar.gz"
+        target = backup_dir / f"{name[:-len(suffix)]}-{counter}{suffix}"
         counter += 1
 
-    try:
-        _create_backup_archive(target)
-        created = time.time()
-        stat = target.stat()
-    except (OSError, tarfile.TarError) as exc:
-        with contextlib.suppress(OSError):
-            if target.exists():
-                target.unlink()
-        return jsonify({"ok": False, "error": str(exc)}), 500
+    def run(job: _Job) -> int:
+        code = _run_backup_job(job, target, mode)
+        if code == 0 and prune:
+            _prune_backups(job)
+        return code
 
-    return jsonify(
-        {
-            "ok": True,
-            "backup": {
-                "name": target.name,
-                "size": stat.st_size,
-                "modified": stat.st_mtime,
-                "created": created,
-            },
-        }
-    )
+    return _submit_job("backup", f"Backup {target.name}", run, key="backup", meta={"backup": target.name})
 
 
 @app.delete("/api/backups/<name>")
@@ -455,8 +3862,1145 @@ def api_delete_backup(name: str):
     except OSError as exc:
         return jsonify({"ok": False, "error": str(exc)}), 500
 
+    if not path.name.endswith(SNAPSHOT_SUFFIX):
+        return jsonify({"ok": True, "reclaimed": None})
+    # The chunk store stays locked for a whole snapshot run, so reclaim off the request thread.
+    job, created = _submit_job("backup_gc", "Reclaim backup chunks", _run_backup_gc_job, key="backup_gc")
+    return _job_response(job, created)
+
+
+@app.get("/api/backups/<name>/download")
+def api_download_backup(name: str):
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    try:
+        path = _backup_file_path(name)
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid name"}), 400
+
+    if not path.exists() or not path.is_file():
+        return jsonify({"ok": False, "error": "not found"}), 404
+
+    if path.name.endswith(SNAPSHOT_SUFFIX):
+        # Incremental backups have no archive on disk; stream one assembled from the chunk store.
+        download = path.name[: -len(SNAPSHOT_SUFFIX)] + ".tar"
+        headers = {"Content-Disposition": f'attachment; filename="{download}"', "Accept-Ranges": "none"}
+        return Response(_snapshot_tar_stream(path), mimetype="application/x-tar", headers=headers)
+    # send_file answers Range/If-Range requests and hands the file to the
+    # server's wsgi.file_wrapper, which uses sendfile() where available.
+    return send_file(path, as_attachment=True, download_name=path.name, conditional=True, max_age=0)
+
+
+@app.post("/api/backups/<name>/restore")
+def api_restore_backup(name: str):
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    try:
+        path = _backup_file_path(name)
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid name"}), 400
+
+    if not path.exists() or not path.is_file():
+        return jsonify({"ok": False, "error": "not found"}), 404
+
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"ok": False, "error": "expected a JSON object"}), 400
+    paths = data.get("paths") or []
+    if not isinstance(paths, list) or not all(isinstance(p, str) for p in paths):
+        return jsonify({"ok": False, "error": "paths must be a list of strings"}), 400
+    try:
+        prefixes = _restore_prefixes(paths)
+    except ValueError as exc:
+        return jsonify({"ok": False, "error": str(exc)}), 400
+
+    job, created = _submit_job(
+        "restore", f"Restore {path.name}", lambda job: _run_restore_job(job, path, prefixes),
+        key="restore", meta={"backup": path.name, "paths": prefixes},
+    )
+    return _job_response(job, created)
+
+# --- Backup download / restore ---
+RESTORE_COPY_SIZE = 1024 * 1024
+
+def _snapshot_tar_stream(path: Path):
+    """Yield an uncompressed tar of a snapshot, reading one chunk at a time."""
+    store = path.parent / BACKUP_STORE_NAME
+    for item in _iter_snapshot(path):
+        info = tarfile.TarInfo(item["p"])
+        info.mode = item.get("mode", 0o644)
+        info.mtime = item.get("m", 0) / 1e9
+        if "l" in item:
+            info.type, info.linkname = tarfile.SYMTYPE, item["l"]
+        elif item.get("d"):
+            info.type = tarfile.DIRTYPE
+        else:
+            info.size = item["s"]
+        yield info.tobuf(format=tarfile.PAX_FORMAT)
+        if info.isfile():
+            for digest in item["c"]:
+                yield _read_chunk(store, digest)
+            remainder = info.size % tarfile.BLOCKSIZE
+            if remainder:
+                yield tarfile.NUL * (tarfile.BLOCKSIZE - remainder)
+    yield tarfile.NUL * (tarfile.BLOCKSIZE * 2)
+
+def _restore_prefixes(paths: list[str]) -> list[str]:
+    prefixes = []
+    for raw in paths:
+        rel = raw.strip().strip("/")
+        while rel.startswith("./"):
+            rel = rel[2:]
+        if not rel or rel == ".":
+            return []  # restoring the root means everything
+        target = _safe_path(rel)
+        rel = _relative(target)
+        if rel.split("/")[0] == BACKUP_DIR_NAME:
+            raise ValueError("cannot restore into the backups directory")
+        prefixes.append(rel)
+    return prefixes
+
+def _restore_selected(name: str, prefixes: list[str]) -> bool:
+    name = name.strip("/")
+    while name.startswith("./"):
+        name = name[2:]
+    if not name or name == ".":
+        return False
+    if name.split("/")[0] == BACKUP_DIR_NAME:
+        return False
+    if not prefixes:
+        return True
+    return any(name == p or name.startswith(p + "/") for p in prefixes)
+
+class _CountingReader:
+    """Wraps the raw archive so restore progress can be reported in compressed bytes."""
+
+    def __init__(self, fh, job: _Job):
+        self._fh = fh
+        self._job = job
+
+    def read(self, size=-1):
+        self._job.check_cancelled()
+        data = self._fh.read(size)
+        self._job.progress.bytes += len(data)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def readable(self):
+        return True
+
+@contextlib.contextmanager
+def _open_archive_stream(path: Path, job: _Job):
+    """Open a backup archive for sequential reading, whatever its compression."""
+    with path.open("rb") as raw:
+        counted = _CountingReader(raw, job)
+        name = path.name
+        if name.endswith(".tar.zst"):
+            if zstandard is None:
+                raise OSError("zstandard is not installed")
+            with zstandard.ZstdDecompressor().stream_reader(counted, read_across_frames=True) as fh:
+                with tarfile.open(fileobj=fh, mode="r|") as tar:
+                    yield tar
+        elif name.endswith(".tar.lz4"):
+            if lz4frame is None:
+                raise OSError("lz4 is not installed")
+            with lz4frame.LZ4FrameFile(counted, mode="rb") as fh:
+                with tarfile.open(fileobj=fh, mode="r|") as tar:
+                    yield tar
+        elif name.endswith((".tar.gz", ".tgz")):
+            # GzipFile rather than tarfile's "r|gz": parallel archives are multi-member gzip.
+            with gzip.GzipFile(fileobj=counted, mode="rb") as fh:
+                with tarfile.open(fileobj=fh, mode="r|", bufsize=RESTORE_COPY_SIZE) as tar:
+                    yield tar
+        else:
+            # Plain tar, or bzip2/xz for archives uploaded through the file manager.
+            with tarfile.open(fileobj=counted, mode="r|*", bufsize=RESTORE_COPY_SIZE) as tar:
+                yield tar
+
+def _restore_archive(job: _Job, path: Path, prefixes: list[str]) -> None:
+    job.progress.total_bytes = path.stat().st_size
+    extract_kwargs = {"filter": "data"} if hasattr(tarfile, "data_filter") else {}
+    root = _inst().file_root
+    with _open_archive_stream(path, job) as tar:
+        for member in tar:
+            if not _restore_selected(member.name, prefixes):
+                continue
+            if not hasattr(tarfile, "data_filter"):
+                _safe_path(member.name)
+                if member.issym() or member.islnk():
+                    _safe_path(str(Path(member.name).parent / member.linkname))
+            tar.extract(member, root, **extract_kwargs)
+            if member.isfile():
+                job.progress.files += 1
+
+def _restore_snapshot(job: _Job, path: Path, prefixes: list[str]) -> None:
+    store = path.parent / BACKUP_STORE_NAME
+    header = _read_snapshot_header(path)
+    job.progress.total_bytes = header.get("bytes") if not prefixes else None
+    dir_times = []
+    for item in _iter_snapshot(path):
+        rel = item["p"]
+        if not _restore_selected(rel, prefixes):
+            continue
+        job.check_cancelled()
+        # Resolve the parent only: the entry itself may be (or replace) a symlink.
+        target = _safe_path(str(Path(rel).parent)) / Path(rel).name
+        if item.get("d"):
+            target.mkdir(parents=True, exist_ok=True)
+            with contextlib.suppress(OSError):
+                target.chmod(item.get("mode", 0o755))
+            dir_times.append((target, item.get("m")))
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if "l" in item:
+            _safe_path(str(Path(rel).parent / item["l"]))
+            if target.is_symlink() or target.exists():
+                target.unlink()
+            target.symlink_to(item["l"])
+            continue
+        tmp = target.with_name(f".{target.name}.restore-{uuid.uuid4().hex[:8]}")
+        try:
+            with tmp.open("wb") as fh:
+                for digest in item["c"]:
+                    job.check_cancelled()
+                    data = _read_chunk(store, digest)
+                    fh.write(data)
+                    job.progress.bytes += len(data)
+            tmp.chmod(item.get("mode", 0o644))
+            os.utime(tmp, ns=(item["m"], item["m"]))
+            os.replace(tmp, target)
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                tmp.unlink()
+        job.progress.files += 1
+    # Directory mtimes last, since populating them bumps the mtime.
+    for target, mtime in dir_times:
+        if mtime:
+            with contextlib.suppress(OSError):
+                os.utime(target, ns=(mtime, mtime))
+
+def _run_restore_job(job: _Job, path: Path, prefixes: list[str]) -> int:
+    job.progress = _Progress("stopping")
+    inst = _inst()
+    scope = ", ".join(prefixes) if prefixes else "everything"
+    job.log(f"Restoring {scope} from {path.name} into {inst.file_root}")
+    code = _run_steps(job, [("Stop service", ["sudo", "systemctl", "stop", inst.service])])
+    _STATUS.refresh(timeout=0)
+    if code != 0:
+        return code
+    job.progress.phase = "extracting"
+    try:
+        if path.name.endswith(SNAPSHOT_SUFFIX):
+            _restore_snapshot(job, path, prefixes)
+        else:
+            _restore_archive(job, path, prefixes)
+        job.log(f"Restored {job.progress.files} files")
+    except _JobCancelled:
+        job.log("[panel] restore cancelled; files restored so far were kept")
+        raise
+    finally:
+        # Whatever happened, do not leave the server down.
+        job.progress.phase = "starting"
+        job.log("==> Start service")
+        code = _run_streaming(["sudo", "systemctl", "start", inst.service], job, cancellable=False)
+        job.log(f"<== Start service exit {code}")
+        _STATUS.refresh(timeout=0)
+    job.progress.phase = "done"
+    return code
+
+
+# --- Save snapshots ---
+# A save snapshot copies only server/<identity>/ (the .map, .sav and
+# player.*.db files) instead of the whole install: server.save over RCON,
+# wait until the save files stop changing, then copy the directory with the
+# cheapest method the filesystem offers. A file unchanged since the previous
+# snapshot is hardlinked to that copy, a changed one is reflinked (FICLONE:
+# instant and free on btrfs/xfs) or copied extent by extent, leaving holes
+# as holes. Snapshots are plain directories under backups/saves/<identity>/.
+SAVE_SNAPSHOT_DIR = "saves"
+SAVE_FILE_PATTERNS = ("*.map", "*.sav", "*.sav.*", "player.*.db", "player.*.db-*")
+SAVE_QUIET_SECONDS = 2.0  # save files unchanged this long are considered written
+SAVE_QUIET_TIMEOUT = 120
+SAVE_SNAPSHOT_ATTEMPTS = 3  # retries when a file changes while it is being copied
+SAVE_META_NAME = ".snapshot.json"
+FICLONE = 0x40049409  # linux/fs.h _IOW(0x94, 9, int)
+
+def _server_identity() -> str:
+    """The configured identity, else the only directory under server/."""
+    identity = _get_config()["server_identity"]
+    if identity:
+        return identity
+    server_dir = Path(_inst().cfg["rust_dir"]) / "server"
+    try:
+        names = sorted(entry.name for entry in os.scandir(server_dir) if entry.is_dir() and not entry.name.startswith("."))
+    except OSError:
+        names = []
+    if len(names) != 1:
+        found = ", ".join(names) if names else "none"
+        raise ValueError(f"set server_identity: cannot tell which directory under {server_dir} is the server ({found})")
+    return names[0]
+
+def _identity_dir() -> Path:
+    return Path(_inst().cfg["rust_dir"]) / "server" / _server_identity()
+
+def _saves_dir(identity: str) -> Path:
+    return _ensure_backup_dir() / SAVE_SNAPSHOT_DIR / identity
+
+def _save_file_state(directory: Path) -> dict[str, tuple[int, int]]:
+    state = {}
+    with contextlib.suppress(FileNotFoundError):
+        for entry in os.scandir(directory):
+            if entry.is_file(follow_symlinks=False) and any(fnmatch.fnmatch(entry.name, p) for p in SAVE_FILE_PATTERNS):
+                st = entry.stat(follow_symlinks=False)
+                state[entry.name] = (st.st_size, st.st_mtime_ns)
+    return state
+
+def _wait_save_quiet(job: _Job, directory: Path, quiet: float, timeout: float) -> dict:
+    """Poll the save files until none has changed for `quiet` seconds."""
+    started = time.monotonic()
+    last, stable_since = _save_file_state(directory), started
+    while True:
+        now = time.monotonic()
+        if now - stable_since >= quiet:
+            return last
+        if now - started > timeout:
+            raise _LifecycleError(f"save files still changing after {timeout:g}s")
+        job.sleep(0.25)
+        state = _save_file_state(directory)
+        if state != last:
+            last, stable_since = state, time.monotonic()
+
+def _copy_range(src_fd: int, dst_fd: int, offset: int, length: int) -> None:
+    end = offset + length
+    try:
+        while offset < end:
+            copied = os.copy_file_range(src_fd, dst_fd, end - offset, offset, offset)
+            if copied == 0:
+                return
+            offset += copied
+    except (AttributeError, OSError):  # no copy_file_range, or not across these filesystems
+        while offset < end:
+            data = os.pread(src_fd, min(RESTORE_COPY_SIZE, end - offset), offset)
+            if not data:
+                return
+            os.pwrite(dst_fd, data, offset)
+            offset += len(data)
+
+def _sparse_copy(src_fd: int, dst_fd: int, size: int) -> int:
+    """Copy only the data extents of a file; returns the bytes actually copied."""
+    copied = offset = 0
+    while offset < size:
+        try:
+            start = os.lseek(src_fd, offset, os.SEEK_DATA)
+            end = min(os.lseek(src_fd, start, os.SEEK_HOLE), size)
+        except OSError as exc:
+            if exc.errno == errno.ENXIO:
+                break  # only a hole is left
+            start, end = offset, size  # SEEK_DATA unsupported: treat the rest as data
+        _copy_range(src_fd, dst_fd, start, end - start)
+        copied += end - start
+        offset = end
+    os.ftruncate(dst_fd, size)
+    return copied
+
+def _clone_file(src: Path, dst: Path, st: os.stat_result) -> tuple[str, int]:
+    """Write `dst` as a copy of `src`: reflink when possible, else a sparse copy. Returns (method, bytes)."""
+    with src.open("rb") as fsrc, dst.open("wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            method, written = "reflinked", 0
+        except OSError:
+            method, written = "copied", _sparse_copy(fsrc.fileno(), fdst.fileno(), st.st_size)
+    os.chmod(dst, S_IMODE(st.st_mode))
+    os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+    return method, written
+
+class _SaveChanged(Exception):
+    pass
+
+def _copy_save_tree(job: _Job, source: Path, target: Path, previous: Path | None) -> dict:
+    """Copy `source` into `target`, linking files unchanged since `previous`. Returns per-method counts."""
+    counts = {"linked": 0, "reflinked": 0, "copied": 0, "bytes": 0, "copied_bytes": 0}
+    seen: dict[str, tuple[int, int]] = {}
+    for dirpath, dirnames, filenames in os.walk(source):
+        rel_dir = Path(dirpath).relative_to(source)
+        (target / rel_dir).mkdir(exist_ok=True)
+        for name in filenames:
+            job.check_cancelled()
+            src, rel = Path(dirpath) / name, rel_dir / name
+            st = src.lstat()
+            if not S_ISREG(st.st_mode):
+                continue
+            seen[str(rel)] = (st.st_size, st.st_mtime_ns)
+            counts["bytes"] += st.st_size
+            dst = target / rel
+            if previous is not None:
+                with contextlib.suppress(OSError):
+                    old = (previous / rel).lstat()
+                    if (old.st_size, old.st_mtime_ns) == (st.st_size, st.st_mtime_ns):
+                        os.link(previous / rel, dst)
+                        counts["linked"] += 1
+                        job.progress.files += 1
+                        continue
+            method, written = _clone_file(src, dst, st)
+            counts[method] += 1
+            counts["copied_bytes"] += written
+            job.progress.files += 1
+            job.progress.bytes += st.st_size
+    # Rust rewrites saves in place, so a file touched mid-copy means this copy is torn.
+    changed = [rel for rel, old in seen.items() if not _same_stat(source / rel, old)]
+    if changed:
+        raise _SaveChanged(changed)
+    return counts
+
+def _same_stat(path: Path, expected: tuple[int, int]) -> bool:
+    try:
+        st = path.lstat()
+    except OSError:
+        return False
+    return (st.st_size, st.st_mtime_ns) == expected
+
+def _list_save_snapshots(identity: str | None = None) -> list[dict]:
+    try:
+        identity = identity or _server_identity()
+    except ValueError:
+        return []
+    base = _ensure_backup_dir() / SAVE_SNAPSHOT_DIR / identity
+    snapshots = []
+    with contextlib.suppress(FileNotFoundError):
+        for entry in os.scandir(base):
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            try:
+                meta = json.loads((Path(entry.path) / SAVE_META_NAME).read_text())
+            except (OSError, ValueError):
+                meta = {}
+            snapshots.append({"name": entry.name, "identity": identity,
+                              "modified": meta.get("created") or entry.stat().st_mtime, **meta})
+    snapshots.sort(key=lambda info: info["modified"], reverse=True)
+    return snapshots
+
+def _prune_save_snapshots(job: _Job, identity: str) -> None:
+    keep = _get_config()["save_snapshot_keep"]
+    if not keep:
+        return
+    for info in _list_save_snapshots(identity)[keep:]:
+        shutil.rmtree(_saves_dir(identity) / info["name"], ignore_errors=True)
+        job.log(f"Removed old save snapshot {info['name']}")
+
+def _run_save_snapshot_job(job: _Job, identity: str, name: str, options: dict) -> int:
+    phase = _Phases(job)
+    source = _identity_dir()
+    if not source.is_dir():
+        raise _LifecycleError(f"{source} does not exist")
+    if _service_active() and _rcon().configured and options["save"]:
+        with phase("save"):
+            try:
+                _save_world(job, options["save_timeout"])
+            except (_RconError, TimeoutError, _LifecycleError) as exc:
+                if not options["force"]:
+                    raise _LifecycleError(f"save failed, no snapshot taken: {exc}") from exc
+                job.log(f"[panel] save failed ({exc}); snapshotting the files on disk because force is set")
+    elif options["save"]:
+        job.log("[panel] server not running or RCON not configured; snapshotting the files on disk")
+    saves = _saves_dir(identity)
+    saves.mkdir(parents=True, exist_ok=True)
+    previous = next((saves / info["name"] for info in _list_save_snapshots(identity)), None)
+    target = saves / name
+    partial = saves / f".{name}.partial"
+    for attempt in range(1, SAVE_SNAPSHOT_ATTEMPTS + 1):
+        with phase("quiesce"):
+            _wait_save_quiet(job, source, options["quiet"], SAVE_QUIET_TIMEOUT)
+        with phase("copy"):
+            shutil.rmtree(partial, ignore_errors=True)
+            job.progress.phase = "copy"
+            try:
+                counts = _copy_save_tree(job, source, partial, previous)
+                break
+            except _SaveChanged as exc:
+                if attempt == SAVE_SNAPSHOT_ATTEMPTS:
+                    shutil.rmtree(partial, ignore_errors=True)
+                    raise _LifecycleError(f"save files kept changing while copying: {', '.join(exc.args[0])}") from None
+                job.log(f"[panel] {', '.join(exc.args[0])} changed while copying; retrying")
+            except BaseException:
+                shutil.rmtree(partial, ignore_errors=True)
+                raise
+    meta = {"created": time.time(), "source": str(source), **counts}
+    (partial / SAVE_META_NAME).write_text(json.dumps(meta))
+    os.replace(partial, target)
+    job.result = {"name": name, "identity": identity, **meta}
+    job.log(f"Snapshot {name}: {counts['linked']} linked, {counts['reflinked']} reflinked, "
+            f"{counts['copied']} copied ({counts['copied_bytes']} of {counts['bytes']} bytes written)")
+    _prune_save_snapshots(job, identity)
+    return 0
+
+def _save_snapshot_options(data: dict) -> dict:
+    quiet = data.get("quiet", SAVE_QUIET_SECONDS)
+    save_timeout = data.get("save_timeout", LIFECYCLE_SAVE_TIMEOUT)
+    try:
+        quiet, save_timeout = float(quiet), float(save_timeout)
+    except (TypeError, ValueError):
+        raise ValueError("quiet and save_timeout must be numbers") from None
+    if not 0 <= quiet <= 60 or not 0 < save_timeout <= 3600:
+        raise ValueError("quiet must be 0-60 and save_timeout 1-3600 seconds")
+    return {"save": _coerce_bool(data.get("save", True)), "force": _coerce_bool(data.get("force", False)),
+            "quiet": quiet, "save_timeout": save_timeout}
+
+def _start_save_snapshot(label: str | None, options: dict) -> tuple[_Job, bool]:
+    identity = _server_identity()
+    slug = _sanitize_backup_slug(label)
+    name = datetime.now().strftime("%Y%m%d-%H%M%S") + (f"-{slug}" if slug else "")
+    return _submit_job(
+        "save_snapshot", f"Save snapshot {identity}/{name}",
+        lambda job: _run_save_snapshot_job(job, identity, name, options),
+        key="save-snapshot", meta={"snapshot": name, "identity": identity},
+    )
+
+def _save_snapshot_path(name: str) -> Path:
+    if not name or name.startswith(".") or any(ch not in _BACKUP_ALLOWED for ch in name):
+        raise ValueError("invalid name")
+    return _saves_dir(_server_identity()) / name
+
+def _run_save_restore_job(job: _Job, snapshot: Path) -> int:
+    inst, target = _inst(), _identity_dir()
+    job.progress = _Progress("stopping")
+    job.log(f"Restoring save snapshot {snapshot.name} into {target}")
+    code = _run_steps(job, [("Stop service", ["sudo", "systemctl", "stop", inst.service])])
+    _STATUS.refresh(timeout=0)
+    if code != 0:
+        return code
+    job.progress.phase = "copying"
+    try:
+        for dirpath, _, filenames in os.walk(snapshot):
+            rel_dir = Path(dirpath).relative_to(snapshot)
+            (target / rel_dir).mkdir(parents=True, exist_ok=True)
+            for name in filenames:
+                if rel_dir == Path(".") and name == SAVE_META_NAME:
+                    continue
+                job.check_cancelled()
+                src = Path(dirpath) / name
+                dst = target / rel_dir / name
+                # Never write through to the snapshot: a fresh inode, renamed over the live file.
+                tmp = dst.with_name(f".{name}.restore-{uuid.uuid4().hex[:8]}")
+                try:
+                    _clone_file(src, tmp, src.stat())
+                    os.replace(tmp, dst)
+                finally:
+                    with contextlib.suppress(FileNotFoundError):
+                        tmp.unlink()
+                job.progress.files += 1
+        job.log(f"Restored {job.progress.files} files")
+    finally:
+        job.progress.phase = "starting"
+        job.log("==> Start service")
+        code = _run_streaming(["sudo", "systemctl", "start", inst.service], job, cancellable=False)
+        job.log(f"<== Start service exit {code}")
+        _STATUS.refresh(timeout=0)
+    job.progress.phase = "done"
+    return code
+
+@app.get("/api/saves")
+def api_list_saves():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    try:
+        identity = _server_identity()
+    except ValueError as exc:
+        return jsonify({"ok": False, "error": str(exc)}), 409
+    return jsonify({"ok": True, "identity": identity, "snapshots": _list_save_snapshots(identity)})
+
+@app.post("/api/saves")
+def api_create_save_snapshot():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"ok": False, "error": "expected a JSON object"}), 400
+    label = data.get("label")
+    try:
+        options = _save_snapshot_options(data)
+        job, created = _start_save_snapshot(label if isinstance(label, str) else None, options)
+    except ValueError as exc:
+        return jsonify({"ok": False, "error": str(exc)}), 400
+    return _job_response(job, created)
+
+@app.delete("/api/saves/<name>")
+def api_delete_save_snapshot(name: str):
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    try:
+        path = _save_snapshot_path(name)
+    except ValueError as exc:
+        return jsonify({"ok": False, "error": str(exc)}), 400
+    if not path.is_dir():
+        return jsonify({"ok": False, "error": "not found"}), 404
+    try:
+        shutil.rmtree(path)
+    except OSError as exc:
+        return jsonify({"ok": False, "error": str(exc)}), 500
+    return jsonify({"ok": True})
+
+@app.post("/api/saves/<name>/restore")
+def api_restore_save_snapshot(name: str):
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    try:
+        path = _save_snapshot_path(name)
+    except ValueError as exc:
+        return jsonify({"ok": False, "error": str(exc)}), 400
+    if not path.is_dir():
+        return jsonify({"ok": False, "error": "not found"}), 404
+    job, created = _submit_job(
+        "restore", f"Restore save {path.name}", lambda job: _run_save_restore_job(job, path),
+        key="restore", meta={"snapshot": path.name},
+    )
+    return _job_response(job, created)
+
+
+# --- Scheduler ---
+# Schedules live in the config (`schedules`, `backup_retention`) and are
+# evaluated by one thread in the server's local time. Each firing submits an
+# ordinary job, so overlap prevention is the job key: a scheduled backup that
+# comes due while any backup (manual or scheduled) is running is recorded as
+# skipped rather than queued behind it.
+SCHEDULE_TASKS = {
+    "backup": "Create a backup, then apply the retention policy",
+    "prune": "Apply the backup retention policy",
+    "snapshot": "Save the world and snapshot server/<identity>",
+    "restart": "Graceful restart",
+    "update": "Graceful restart with Rust/Oxide updates",
+}
+SCHEDULE_JITTER_MAX = 3600
+SCHEDULE_HISTORY = 200
+SCHEDULE_LABEL = "auto"  # slug of scheduled backups; retention scope "auto" only prunes these
+RETENTION_PERIODS = (("hourly", "%Y%m%d%H"), ("daily", "%Y%m%d"), ("weekly", "%G%V"))
+_CRON_MACROS = {
+    "@hourly": "0 * * * *", "@daily": "0 0 * * *", "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0", "@monthly": "0 0 1 * *", "@yearly": "0 0 1 1 *", "@annually": "0 0 1 1 *",
+}
+_CRON_NAMES = (
+    {},
+    {},
+    {},
+    {name: i + 1 for i, name in enumerate(("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"))},
+    {name: i for i, name in enumerate(("sun", "mon", "tue", "wed", "thu", "fri", "sat"))},
+)
+_CRON_BOUNDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+class _Cron:
+    """Standard 5-field cron expression (minute hour day-of-month month day-of-week)."""
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = _CRON_MACROS.get(expression.strip().lower(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression needs 5 fields: {expression!r}")
+        parsed = [self._field(text, i) for i, text in enumerate(fields)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {d % 7 for d in weekdays}  # 7 is Sunday too
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _field(text: str, index: int) -> set[int]:
+        low, high = _CRON_BOUNDS[index]
+        names = _CRON_NAMES[index]
+
+        def number(token: str) -> int:
+            token = token.lower()
+            value = names[token] if token in names else int(token)
+            if not low <= value <= high:
+                raise ValueError(f"{value} is out of range {low}-{high}")
+            return value
+
+        values: set[int] = set()
+        for part in text.split(","):
+            base, _, step_text = part.partition("/")
+            step = int(step_text) if step_text else 1
+            if step < 1:
+                raise ValueError(f"invalid step in {part!r}")
+            if base == "*":
+                start, end = low, high
+            elif "-" in base:
+                start, end = (number(t) for t in base.split("-", 1))
+            else:
+                start = number(base)
+                end = high if step_text else start
+            if start > end:
+                raise ValueError(f"invalid range {part!r}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        in_month = moment.day in self.days
+        in_week = moment.isoweekday() % 7 in self.weekdays
+        if self.any_day and self.any_weekday:
+            return True
+        if self.any_day:
+            return in_week
+        if self.any_weekday:
+            return in_month
+        return in_month or in_week  # cron ORs the two day fields when both are set
+
+    def next_after(self, moment: datetime) -> datetime:
+        t = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        for _ in range(200_000):
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        raise ValueError(f"cron expression never matches: {self.expression!r}")
+
+def _validate_schedules(value) -> list[dict]:
+    if isinstance(value, str):
+        try:
+            value = json.loads(value or "[]")
+        except ValueError as exc:
+            raise ValueError(f"Schedules must be valid JSON: {exc}") from None
+    if not isinstance(value, list):
+        raise ValueError("Schedules must be a list")
+    schedules, seen = [], set()
+    for index, item in enumerate(value):
+        if not isinstance(item, dict):
+            raise ValueError(f"Schedule #{index + 1} must be an object")
+        task = item.get("task")
+        if task not in SCHEDULE_TASKS:
+            raise ValueError(f"Schedule #{index + 1}: task must be one of: {', '.join(sorted(SCHEDULE_TASKS))}")
+        schedule_id = _sanitize_backup_slug(str(item.get("id") or f"{task}-{index + 1}")).replace("_", "-")
+        if not schedule_id or schedule_id in seen:
+            raise ValueError(f"Schedule #{index + 1}: id must be unique")
+        seen.add(schedule_id)
+        cron = str(item.get("cron", "")).strip()
+        try:
+            _Cron(cron).next_after(datetime.now())
+        except ValueError as exc:
+            raise ValueError(f"Schedule {schedule_id}: {exc}") from None
+        jitter = _coerce_int(item.get("jitter", 0), "jitter", 0, SCHEDULE_JITTER_MAX)
+        options = item.get("options") or {}
+        if not isinstance(options, dict):
+            raise ValueError(f"Schedule {schedule_id}: options must be an object")
+        try:
+            if task in {"restart", "update"}:
+                _lifecycle_options("restart", _schedule_lifecycle_data(task, options))
+            if task == "backup" and options.get("mode") not in (None, *_CHOICE_SETTINGS["backup_mode"]):
+                raise ValueError("invalid backup mode")
+            if task == "snapshot":
+                _save_snapshot_options(options)
+        except ValueError as exc:
+            raise ValueError(f"Schedule {schedule_id}: {exc}") from None
+        schedules.append({
+            "id": schedule_id,
+            "task": task,
+            "cron": cron,
+            "enabled": _coerce_bool(item.get("enabled", True)),
+            "jitter": jitter,
+            "options": options,
+        })
+    return schedules
+
+def _validate_retention(value) -> dict:
+    if not isinstance(value, dict):
+        raise ValueError("Backup retention must be an object")
+    retention = {name: _coerce_int(value.get(name, 0), f"{name} retention", 0, 1000) for name, _ in RETENTION_PERIODS}
+    scope = value.get("scope", "auto")
+    if scope not in {"auto", "all"}:
+        raise ValueError("Retention scope must be 'auto' (scheduled backups only) or 'all'")
+    retention["scope"] = scope
+    return retention
+
+def _validate_structured(key: str, value):
+    validators = {"schedules": _validate_schedules, "backup_retention": _validate_retention,
+                  "alert_rules": _validate_alert_rules}
+    return validators[key](value)
+
+def _schedule_lifecycle_data(task: str, options: dict) -> dict:
+    data = dict(options)
+    if task == "update":
+        data.setdefault("update", ["rust", "oxide"])
+        data.setdefault("only_if_outdated", True)
+    return data
+
+def _retention_keep(backups: list[dict], retention: dict) -> set[str]:
+    """Names to keep: the newest backup in each of the last N hours/days/weeks."""
+    keep: set[str] = set()
+    for period, fmt in RETENTION_PERIODS:
+        limit = retention.get(period, 0)
+        buckets: set[str] = set()
+        for info in backups:  # newest first
+            bucket = datetime.fromtimestamp(info["modified"]).strftime(fmt)
+            if bucket in buckets:
+                continue
+            if len(buckets) >= limit:
+                break
+            buckets.add(bucket)
+            keep.add(info["name"])
+    return keep
+
+def _prune_backups(job: _Job | None = None) -> dict:
+    """Delete backups outside the retention policy; a policy of all zeros keeps everything."""
+    retention = _get_config()["backup_retention"]
+    if not any(retention.get(period) for period, _ in RETENTION_PERIODS):
+        if job:
+            job.log("Retention: no policy configured, keeping all backups")
+        return {"deleted": [], "reclaimed": None}
+    pattern = re.compile(rf"^backup-\d{{8}}-\d{{6}}-{SCHEDULE_LABEL}(-\d+)?\.")
+    backups = [b for b in _list_backups() if retention["scope"] == "all" or pattern.match(b["name"])]
+    keep = _retention_keep(backups, retention)
+    backup_dir = _ensure_backup_dir()
+    deleted = []
+    for info in backups:
+        if info["name"] in keep:
+            continue
+        with contextlib.suppress(OSError, ValueError):
+            _backup_file_path(info["name"]).unlink()
+            deleted.append(info["name"])
+    reclaimed = None
+    if any(name.endswith(SNAPSHOT_SUFFIX) for name in deleted):
+        reclaimed = _gc_backup_store(backup_dir)
+    if job:
+        job.log(f"Retention: kept {len(keep)}, deleted {len(deleted)}" + (f": {', '.join(deleted)}" if deleted else ""))
+        if reclaimed:
+            job.log(f"Retention: reclaimed {reclaimed['bytes']} bytes in {reclaimed['chunks']} chunks")
+    return {"deleted": deleted, "reclaimed": reclaimed}
+
+def _run_prune_job(job: _Job) -> int:
+    _prune_backups(job)
+    return 0
+
+def _run_backup_gc_job(job: _Job) -> int:
+    job.result = _gc_backup_store(_ensure_backup_dir())
+    job.log(f"reclaimed {job.result['bytes']} bytes in {job.result['chunks']} chunks")
+    return 0
+
+def _start_scheduled(schedule: dict) -> tuple[_Job, bool]:
+    task, options = schedule["task"], schedule["options"]
+    if task == "backup":
+        return _start_backup(SCHEDULE_LABEL, options.get("mode"), prune=True)
+    if task == "prune":
+        return _submit_job("prune", "Prune backups", _run_prune_job, key="backup")
+    if task == "snapshot":
+        return _start_save_snapshot(SCHEDULE_LABEL, _save_snapshot_options(options))
+    return _start_lifecycle("restart", _lifecycle_options("restart", _schedule_lifecycle_data(task, options)))
+
+
+class _Scheduler:
+    def __init__(self, history_file: Path):
+        self.history_file = history_file
+        self._lock = Lock()
+        self._wake = Event()
+        self._thread: Thread | None = None
+        self._next: dict[tuple[str, str], tuple[tuple, datetime]] = {}  # (server, id) -> (definition, fire time incl. jitter)
+        self._running: dict[str, tuple[dict, _Job]] = {}
+        self.history: deque[dict] = deque(self._load_history(), maxlen=SCHEDULE_HISTORY)
+
+    def _load_history(self) -> list[dict]:
+        try:
+            data = json.loads(self.history_file.read_text())
+        except (OSError, ValueError):
+            return []
+        return data if isinstance(data, list) else []
+
+    def _save_history(self) -> None:
+        with contextlib.suppress(OSError):
+            self.history_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.history_file.with_suffix(".tmp")
+            tmp.write_text(json.dumps(list(self.history)))
+            tmp.replace(self.history_file)
+
+    def ensure_started(self) -> None:
+        with self._lock:
+            # A forked server worker inherits the handle but not the thread.
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(target=self._loop, name="scheduler", daemon=True)
+                self._thread.start()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def next_run(self, schedule: dict) -> datetime | None:
+        with self._lock:
+            entry = self._next.get((_inst().name, schedule["id"]))
+        if entry and entry[0] == (schedule["cron"], schedule["jitter"], schedule["task"]):
+            return entry[1]
+        return _Cron(schedule["cron"]).next_after(datetime.now())  # not planned yet
+
+    def records(self, limit: int = SCHEDULE_HISTORY, server: str | None = None) -> list[dict]:
+        """Most recent runs first, optionally only those of one server."""
+        with self._lock:
+            records = [r for r in self.history if server is None or r.get("server", DEFAULT_INSTANCE) == server]
+        return records[-limit:][::-1]
+
+    def run(self, schedule: dict, scheduled_for: datetime | None = None) -> dict:
+        """Fire a schedule now and record the run."""
+        record = {
+            "id": uuid.uuid4().hex[:12],
+            "schedule": schedule["id"],
+            "server": _inst().name,
+            "task": schedule["task"],
+            "scheduled_for": (scheduled_for or datetime.now()).timestamp(),
+            "started": time.time(),
+            "finished": None,
+            "duration": None,
+            "state": "running",
+            "job": None,
+            "detail": None,
+        }
+        try:
+            job, created = _start_scheduled(schedule)
+        except ValueError as exc:
+            record.update(state="failed", detail=str(exc), finished=time.time())
+        else:
+            record["job"] = job.id
+            if created:
+                with self._lock:
+                    self._running[record["id"]] = (record, job)
+            else:
+                record.update(state="skipped", finished=time.time(),
+                              detail=f"{job.kind} job {job.id} was already running")
+        with self._lock:
+            self.history.append(record)
+        self._save_history()
+        self._wake.set()
+        return record
+
+    def _reap(self) -> None:
+        finished = False
+        with self._lock:
+            for record_id, (record, job) in list(self._running.items()):
+                if job.active:
+                    continue
+                del self._running[record_id]
+                record.update(
+                    state=job.state,
+                    finished=job.finished,
+                    duration=(job.finished - job.started) if job.started and job.finished else None,
+                    detail=job.error,
+                )
+                finished = True
+        if finished:
+            self._save_history()
+
+    def _plan(self, server: str, schedules: list[dict], now: datetime) -> list[tuple[dict, datetime]]:
+        """Refresh fire times for one server's changed schedules; return the ones that are due."""
+        due = []
+        with self._lock:
+            active = {(server, s["id"]) for s in schedules if s["enabled"]}
+            for key in list(self._next):
+                if key[0] == server and key not in active:
+                    del self._next[key]
+            for schedule in schedules:
+                if not schedule["enabled"]:
+                    continue
+                key = (server, schedule["id"])
+                definition = (schedule["cron"], schedule["jitter"], schedule["task"])
+                entry = self._next.get(key)
+                if entry is None or entry[0] != definition:
+                    entry = self._next[key] = (definition, self._fire_time(schedule, now))
+                if entry[1] <= now:
+                    due.append((schedule, entry[1]))
+                    self._next[key] = (definition, self._fire_time(schedule, now))
+        return due
+
+    @staticmethod
+    def _fire_time(schedule: dict, now: datetime) -> datetime:
+        # Jitter spreads schedules that share a cron line (e.g. several servers at 04:00).
+        return _Cron(schedule["cron"]).next_after(now) + timedelta(seconds=random.uniform(0, schedule["jitter"]))
+
+    def _loop(self) -> None:
+        while True:
+            self._wake.clear()
+            now = datetime.now()
+            instances = dict(_INSTANCES)
+            with self._lock:
+                for key in [k for k in self._next if k[0] not in instances]:
+                    del self._next[key]
+            for name, inst in instances.items():
+                try:
+                    with _using_instance(name):
+                        for schedule, fire_time in self._plan(name, inst.cfg["schedules"], now):
+                            self.run(schedule, fire_time)
+                except Exception as exc:  # a bad schedule must not stop the others
+                    app.logger.warning("scheduler (%s): %s", name, exc)
+            try:
+                self._reap()
+            except Exception as exc:
+                app.logger.warning("scheduler: %s", exc)
+            with self._lock:
+                upcoming = [entry[1] for entry in self._next.values()]
+                waiting = bool(self._running)
+            timeout = 60.0
+            if upcoming:
+                timeout = min(timeout, max(0.5, (min(upcoming) - datetime.now()).total_seconds()))
+            if waiting:
+                timeout = min(timeout, 5.0)
+            self._wake.wait(timeout)
+
+
+_SCHEDULER = _Scheduler(CACHE_DIR / "schedule-history.json")
+# Started by the serving process (main() or gunicorn's post_worker_init), not at import:
+# a gunicorn master that imported the app would otherwise fire every schedule a second time.
+
+def _schedules_payload() -> dict:
+    cfg = _get_config()
+    last: dict[str, dict] = {}
+    for record in _SCHEDULER.records(server=_inst().name):
+        last.setdefault(record["schedule"], record)
+    schedules = []
+    for schedule in cfg["schedules"]:
+        next_run = _SCHEDULER.next_run(schedule) if schedule["enabled"] else None
+        schedules.append({
+            **schedule,
+            "description": SCHEDULE_TASKS[schedule["task"]],
+            "next_run": next_run.timestamp() if next_run else None,
+            "last_run": last.get(schedule["id"]),
+        })
+    return {"schedules": schedules, "retention": cfg["backup_retention"], "tasks": SCHEDULE_TASKS}
+
+@app.get("/api/schedules")
+def api_list_schedules():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    _SCHEDULER.ensure_started()
+    return jsonify({"ok": True, **_schedules_payload()})
+
+@app.put("/api/schedules")
+def api_replace_schedules():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"ok": False, "error": "invalid payload"}), 400
+    updates = {key: data[key] for key in ("schedules", "retention") if key in data}
+    if "retention" in updates:
+        updates["backup_retention"] = updates.pop("retention")
+    try:
+        _update_config(updates)
+    except ValueError as exc:
+        return jsonify({"ok": False, "error": str(exc)}), 400
+    return jsonify({"ok": True, **_schedules_payload()})
+
+@app.post("/api/schedules/<schedule_id>/run")
+def api_run_schedule(schedule_id: str):
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    schedule = next((s for s in _get_config()["schedules"] if s["id"] == schedule_id), None)
+    if schedule is None:
+        return jsonify({"ok": False, "error": "not found"}), 404
+    return jsonify({"ok": True, "run": _SCHEDULER.run(schedule)})
+
+@app.get("/api/schedules/history")
+def api_schedule_history():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    try:
+        limit = max(1, min(int(request.args.get("limit", "50")), SCHEDULE_HISTORY))
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid limit"}), 400
+    return jsonify({"ok": True, "history": _SCHEDULER.records(limit, _inst().name)})
+
+
+# --- Servers ---
+def _sync_instances() -> None:
+    """Bring the per-server collectors in line with _INSTANCES after a config change."""
+    services = {inst.service for inst in _INSTANCES.values()}
+    _retire_log_ingesters(services)
+    _retire_journal_hubs(services)
+    _STATUS.retire(services)
+    _retire_rcon_clients(set(_INSTANCES))
+    for name in list(_RCON_CLIENTS):
+        _rcon(name)  # picks up changed RCON settings
+    for registry, lock in ((_METRICS_COLLECTORS, _METRICS_COLLECTORS_LOCK),
+                           (_SERVERINFO_POLLERS, _SERVERINFO_POLLERS_LOCK)):
+        with lock:
+            stale = [registry.pop(name) for name in list(registry) if name not in _INSTANCES]
+        for collector in stale:
+            collector.stop()
+    _ALERTS.configure(CONFIG["alert_rules"], CONFIG["alert_webhook"], CONFIG["alert_file"])
+    _SCHEDULER.wake()
+
+def _instance_summary(inst: _Instance) -> dict:
+    return {
+        "name": inst.name,
+        "default": inst.name == DEFAULT_INSTANCE,
+        "service": inst.service,
+        "rust_dir": inst.cfg["rust_dir"],
+        "file_root": str(inst.file_root),
+        "overrides": sorted(CONFIG["instances"].get(inst.name, {})),
+    }
+
+@app.get("/api/instances")
+def api_list_instances():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    return jsonify({"ok": True, "instances": [_instance_summary(inst) for inst in _INSTANCES.values()]})
+
+@app.put("/api/instances/<name>")
+def api_save_instance(name: str):
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"ok": False, "error": "invalid payload"}), 400
+    created = name not in _INSTANCES
+    try:
+        cfg = _save_instance(name, data)
+    except ValueError as exc:
+        return jsonify({"ok": False, "error": str(exc)}), 400
+    return jsonify({"ok": True, "instance": _instance_summary(_INSTANCES[name]),
+                    "config": _public_config(cfg)}), 201 if created else 200
+
+@app.delete("/api/instances/<name>")
+def api_delete_instance(name: str):
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    if name == DEFAULT_INSTANCE:
+        return jsonify({"ok": False, "error": "the default server cannot be removed"}), 400
+    try:
+        _delete_instance(name)
+    except KeyError:
+        return jsonify({"ok": False, "error": "not found"}), 404
     return jsonify({"ok": True})
 
+@app.get("/api/dashboard")
+def api_dashboard():
+    """Every server's state in one response, served from the shared samplers' caches."""
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+    instances = list(_INSTANCES.values())
+    for inst in instances:
+        _STATUS.watch(inst.service)
+    with _JOBS_LOCK:
+        active = [job for job in _JOBS.values() if job.active]
+    servers, host = [], None
+    for inst in instances:
+        state = _STATUS.get(inst.service)
+        latest = _metrics(inst.name).latest(timeout=0) or {}
+        game = _serverinfo(inst.name).get()
+        if host is None and latest:
+            host = {key: latest.get(key) for key in ("load", "cpu", "memory", "sampled_at")}
+        servers.append({
+            **_instance_summary(inst),
+            "status": state,
+            "running": (state or {}).get("active_state") == "active",
+            "process": latest.get("process"),
+            "disk": latest.get("disk"),
+            "game": None if game["stale"] else game["serverinfo"],
+            "rcon": _rcon(inst.name).state(),
+            "jobs": [job.to_dict() for job in active if job.server == inst.name],
+        })
+    return jsonify({"ok": True, "servers": servers, "host": host})
+
+
 # --- File manager ---
 BANNED_EXTS = {".dll", ".exe", ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".tiff", ".svg",
 ".dds", ".tga", ".psd", ".mp3", ".wav", ".ogg", ".flac", ".mp4", ".avi", ".mov", ".mkv", ".pak",
@@ -504,7 +5048,7 @@ def _ensure_backup_dir() -> Path:
 def _backup_file_path(name: str) -> Path:
     if not name or any(ch not in _BACKUP_ALLOWED for ch in name):
         raise ValueError("invalid name")
-    if not name.endswith(".tar.gz"):
+    if not name.endswith((*ARCHIVE_SUFFIXES, SNAPSHOT_SUFFIX)):
         raise ValueError("invalid name")
     return _safe_path(f"{BACKUP_DIR_NAME}/{name}")
 
@@ -516,32 +5060,461 @@ def _sanitize_backup_slug(label: str | None) -> str:
     return slug.strip("-_")[:48]
 
 
-def _new_backup_name(label: str | None = None) -> str:
+def _new_backup_name(label: str | None = None, suffix: str = ARCHIVE_SUFFIX) -> str:
     base = datetime.utcnow().strftime("backup-%Y%m%d-%H%M%S")
     slug = _sanitize_backup_slug(label)
     if slug:
         base = f"{base}-{slug}"
-    return f"{base}.tar.gz"
+    return f"{base}{suffix}"
 
 
-def _create_backup_archive(destination: Path) -> None:
+# --- Backup compression ---
+# Archives are compressed in independent blocks on a thread pool: gzip and
+# lz4 blocks become concatenated members/frames (which `tar`, `gzip -d` and
+# `lz4 -d` read back as one stream), zstd uses the library's own workers.
+BACKUP_BLOCK_SIZE = 1024 * 1024
+_ARCHIVE_CODECS = {"gzip": ".tar.gz", "zstd": ".tar.zst", "lz4": ".tar.lz4", "none": ".tar"}
+
+def _backup_codec() -> str:
+    codec = _get_config()["backup_compression"]
+    if (codec == "zstd" and zstandard is None) or (codec == "lz4" and lz4frame is None):
+        return "gzip"
+    return codec
+
+def _backup_threads() -> int:
+    threads = _get_config()["backup_threads"]
+    return threads or max(1, (os.cpu_count() or 2) // 2)
+
+def _codec_level(codec: str, level: int) -> int:
+    limits = {"gzip": (0, 9), "zstd": (1, 22), "lz4": (0, 16)}
+    low, high = limits.get(codec, (0, 0))
+    return min(max(level, low), high)
+
+def _block_compressor(codec: str, level: int):
+    level = _codec_level(codec, level)
+    if codec == "gzip":
+        return lambda block: gzip.compress(block, compresslevel=level, mtime=0)
+    if codec == "lz4":
+        return lambda block: lz4frame.compress(block, compression_level=level)
+    return None
+
+class _ParallelBlockWriter:
+    """File-like sink that compresses fixed-size blocks concurrently, writing them in order."""
+
+    def __init__(self, fileobj, compress, pool: ThreadPoolExecutor, depth: int):
+        self._fh = fileobj
+        self._compress = compress
+        self._pool = pool
+        self._depth = depth
+        self._buffer = bytearray()
+        self._pending: deque = deque()
+
+    def write(self, data) -> int:
+        self._buffer += data
+        while len(self._buffer) >= BACKUP_BLOCK_SIZE:
+            self._submit(bytes(self._buffer[:BACKUP_BLOCK_SIZE]))
+            del self._buffer[:BACKUP_BLOCK_SIZE]
+        return len(data)
+
+    def _submit(self, block: bytes) -> None:
+        self._pending.append(self._pool.submit(self._compress, block))
+        while len(self._pending) > self._depth:
+            self._fh.write(self._pending.popleft().result())
+
+    def close(self) -> None:
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        while self._pending:
+            self._fh.write(self._pending.popleft().result())
+
+def _lower_thread_priority() -> None:
+    """Drop the calling thread to nice 19 and the idle I/O class (Linux priorities are per-thread)."""
+    tid = threading.get_native_id()
+    with contextlib.suppress(OSError, AttributeError):
+        os.setpriority(os.PRIO_PROCESS, tid, 19)
+    started = time.perf_counter()
+    with contextlib.suppress(OSError):
+        subprocess.run(["ionice", "-c", "3", "-p", str(tid)], capture_output=True, check=False)
+    _SPAWNS.observe(time.perf_counter() - started, "ionice")
+
+def _with_backup_priority(func, *args):
+    """Run a backup step, on a throwaway low-priority thread when so configured.
+
+    Priorities cannot be raised again without privileges, so the work never
+    runs on a pooled request or job thread.
+    """
+    if not _get_config()["backup_low_priority"]:
+        return func(*args)
+    outcome = {}
+
+    def runner():
+        _lower_thread_priority()
+        try:
+            outcome["result"] = func(*args)
+        except BaseException as exc:  # noqa: BLE001 - re-raised on the caller's thread
+            outcome["error"] = exc
+
+    # The thread starts with an empty context; carry the current server over.
+    worker = Thread(target=contextvars.copy_context().run, args=(runner,), name="backup", daemon=True)
+    worker.start()
+    worker.join()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("result")
+
+def _backup_pool() -> ThreadPoolExecutor:
+    initializer = _lower_thread_priority if _get_config()["backup_low_priority"] else None
+    return ThreadPoolExecutor(max_workers=_backup_threads(), thread_name_prefix="backup", initializer=initializer)
+
+class _ProgressSink:
+    """Counts uncompressed tar bytes into the job's progress and honours cancellation."""
+
+    def __init__(self, sink, job: "_Job | None"):
+        self._sink = sink
+        self._job = job
+
+    def write(self, data) -> int:
+        if self._job is not None:
+            self._job.check_cancelled()
+            self._job.progress.bytes += len(data)
+        return self._sink.write(data)
+
+def _create_backup_archive(destination: Path, job: "_Job | None" = None) -> dict:
     destination.parent.mkdir(parents=True, exist_ok=True)
+    codec = _backup_codec()
+    level = _get_config()["backup_level"]
+    threads = _backup_threads()
+    started = time.time()
 
     def _filter(info: tarfile.TarInfo) -> tarfile.TarInfo | None:
         parts = [p for p in Path(info.name).parts if p not in {"."}]
         if parts and parts[0] == BACKUP_DIR_NAME:
             return None
+        if job is not None and info.isfile():
+            job.progress.files += 1
         return info
 
-    with tarfile.open(destination, "w:gz") as tar:
-        tar.add(FILE_ROOT, arcname=".", filter=_filter)
+    with destination.open("wb") as fh, _backup_pool() as pool:
+        if codec == "zstd":
+            cctx = zstandard.ZstdCompressor(level=_codec_level(codec, level), threads=threads)
+            sink = cctx.stream_writer(fh, closefd=False)
+        elif codec == "none":
+            sink = fh
+        else:
+            sink = _ParallelBlockWriter(fh, _block_compressor(codec, level), pool, depth=threads * 2)
+        with tarfile.open(fileobj=_ProgressSink(sink, job), mode="w|", bufsize=BACKUP_BLOCK_SIZE) as tar:
+            tar.add(_inst().file_root, arcname=".", filter=_filter)
+        if sink is not fh:
+            sink.close()
+    return {"compression": codec, "duration": time.time() - started}
+
+
+# Incremental backups: every regular file is split into fixed-size chunks
+# stored once under `.store/chunks/<xx>/<sha256>`; a backup is a gzipped
+# NDJSON manifest (`*.snap`) whose first line is a summary and whose other
+# lines list paths with their size, mtime and chunk digests. Files whose
+# size and mtime match the previous manifest reuse its digests unread.
+
+def _chunk_path(store: Path, digest: str) -> Path:
+    return store / "chunks" / digest[:2] / digest
+
+_CHUNK_TAGS = {"gzip": b"z", "zstd": b"s", "lz4": b"4", "none": b"n"}
+
+def _pack_chunk(data: bytes, codec: str, level: int) -> bytes:
+    level = _codec_level(codec, level)
+    if codec == "zstd":
+        packed = zstandard.ZstdCompressor(level=level).compress(data)
+    elif codec == "lz4":
+        packed = lz4frame.compress(data, compression_level=level)
+    elif codec == "gzip":
+        packed = zlib.compress(data, level)
+    else:
+        packed = data
+    # One-byte codec tag; data that does not shrink (already compressed) is kept as-is.
+    if codec == "none" or len(packed) >= len(data):
+        return b"n" + data
+    return _CHUNK_TAGS[codec] + packed
+
+def _store_chunk(store: Path, data: bytes, codec: str, level: int) -> tuple[str, int]:
+    """Hash and store a chunk unless it already exists; returns (digest, bytes written)."""
+    digest = hashlib.sha256(data).hexdigest()
+    path = _chunk_path(store, digest)
+    if path.exists():
+        return digest, 0
+    payload = _pack_chunk(data, codec, level)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{digest}.{uuid.uuid4().hex[:8]}.tmp")
+    tmp.write_bytes(payload)
+    os.replace(tmp, path)
+    return digest, len(payload)
+
+def _read_chunk(store: Path, digest: str) -> bytes:
+    payload = _chunk_path(store, digest).read_bytes()
+    tag, body = payload[:1], payload[1:]
+    if tag == b"z":
+        return zlib.decompress(body)
+    if tag == b"n":
+        return body
+    if tag == b"s" and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompress(body)
+    if tag == b"4" and lz4frame is not None:
+        return lz4frame.decompress(body)
+    raise OSError(f"chunk {digest}: codec {tag!r} is not available")
+
+def _read_snapshot_header(path: Path) -> dict:
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        return json.loads(fh.readline())
+
+def _iter_snapshot(path: Path):
+    """Yield the manifest entries (not the header) of a snapshot."""
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        fh.readline()
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+def _walk_backup_tree(root: Path):
+    """Yield (relative path, DirEntry) for everything under root except the backups dir."""
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        try:
+            with os.scandir(root / rel_dir if rel_dir else root) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        for entry in entries:
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            if rel == BACKUP_DIR_NAME:
+                continue
+            yield rel, entry
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(rel)
+
+def _latest_snapshot(backup_dir: Path) -> Path | None:
+    snapshots = [p for p in backup_dir.glob(f"*{SNAPSHOT_SUFFIX}") if p.is_file()]
+    if not snapshots:
+        return None
+    return max(snapshots, key=lambda p: p.stat().st_mtime)
+
+def _snapshot_file(ctx: dict, path: Path, previous: dict | None) -> list[str]:
+    st = path.stat()
+    stats, job = ctx["stats"], ctx["job"]
+    if previous and previous.get("s") == st.st_size and previous.get("m") == st.st_mtime_ns:
+        stats["reused_files"] += 1
+        if job is not None:
+            job.progress.bytes += st.st_size
+        return previous["c"]
+    pool, depth = ctx["pool"], ctx["depth"]
+    digests: list[str] = []
+    pending: deque = deque()
+
+    def collect(future):
+        digest, written = future.result()
+        digests.append(digest)
+        stats["added_bytes"] += written
+
+    with path.open("rb") as fh:
+        while True:
+            data = fh.read(BACKUP_CHUNK_SIZE)
+            if not data:
+                break
+            if job is not None:
+                job.check_cancelled()
+                job.progress.bytes += len(data)
+            stats["read_bytes"] += len(data)
+            pending.append(pool.submit(_store_chunk, ctx["store"], data, ctx["codec"], ctx["level"]))
+            while len(pending) > depth:
+                collect(pending.popleft())
+    while pending:
+        collect(pending.popleft())
+    return digests
+
+_BACKUP_STORE_LOCK = Lock()
+
+def _create_snapshot(destination: Path, job: "_Job | None" = None) -> dict:
+    """Write an incremental backup manifest of the file root and return its summary."""
+    backup_dir = destination.parent
+    store = backup_dir / BACKUP_STORE_NAME
+    with _BACKUP_STORE_LOCK:
+        latest = _latest_snapshot(backup_dir)
+        previous = {e["p"]: e for e in _iter_snapshot(latest) if "c" in e} if latest else {}
+        stats = {"files": 0, "bytes": 0, "read_bytes": 0, "added_bytes": 0, "reused_files": 0}
+        codec = _backup_codec()
+        pool = _backup_pool()
+        ctx = {"store": store, "pool": pool, "depth": _backup_threads() * 2, "codec": codec,
+               "level": _get_config()["backup_level"], "stats": stats, "job": job}
+        started = time.time()
+        entries = []
+        with pool:
+            _snapshot_tree(ctx, entries, previous)
+        header = {
+            "format": 1,
+            "name": destination.name,
+            "root": str(_inst().file_root),
+            "created": started,
+            "duration": time.time() - started,
+            "chunk_size": BACKUP_CHUNK_SIZE,
+            "compression": codec,
+            **stats,
+        }
+        tmp = destination.with_name(f".{destination.name}.tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as fh:
+            fh.write(json.dumps(header) + "\n")
+            for item in entries:
+                fh.write(json.dumps(item, separators=(",", ":")) + "\n")
+        os.replace(tmp, destination)
+    return header
+
+def _snapshot_tree(ctx: dict, entries: list, previous: dict) -> None:
+    stats = ctx["stats"]
+    for rel, entry in _walk_backup_tree(_inst().file_root):
+        try:
+            st = entry.stat(follow_symlinks=False)
+            if entry.is_symlink():
+                entries.append({"p": rel, "l": os.readlink(entry.path), "mode": st.st_mode & 0o7777})
+            elif entry.is_dir(follow_symlinks=False):
+                entries.append({"p": rel, "d": 1, "mode": st.st_mode & 0o7777, "m": st.st_mtime_ns})
+            elif entry.is_file(follow_symlinks=False):
+                chunks = _snapshot_file(ctx, Path(entry.path), previous.get(rel))
+                entries.append({"p": rel, "s": st.st_size, "m": st.st_mtime_ns,
+                                "mode": st.st_mode & 0o7777, "c": chunks})
+                stats["files"] += 1
+                stats["bytes"] += st.st_size
+                if ctx["job"] is not None:
+                    ctx["job"].progress.files += 1
+        except OSError:
+            # Files can vanish or become unreadable mid-walk (logs rotate);
+            # skip them rather than failing the whole backup.
+            continue
+
+def _gc_backup_store(backup_dir: Path) -> dict:
+    """Delete chunks no remaining snapshot references."""
+    store = backup_dir / BACKUP_STORE_NAME
+    removed = {"chunks": 0, "bytes": 0}
+    with _BACKUP_STORE_LOCK:
+        live: set[str] = set()
+        for snap in backup_dir.glob(f"*{SNAPSHOT_SUFFIX}"):
+            for item in _iter_snapshot(snap):
+                live.update(item.get("c", ()))
+        chunk_root = store / "chunks"
+        if not chunk_root.is_dir():
+            return removed
+        for bucket in chunk_root.iterdir():
+            if not bucket.is_dir():
+                continue
+            for chunk in bucket.iterdir():
+                if chunk.name in live:
+                    continue
+                with contextlib.suppress(OSError):
+                    size = chunk.stat().st_size
+                    chunk.unlink()
+                    removed["chunks"] += 1
+                    removed["bytes"] += size
+    return removed
+
+def _backup_info(path: Path, stat: os.stat_result, summary: dict | None = None) -> dict:
+    info = {"name": path.name, "size": stat.st_size, "modified": stat.st_mtime, "kind": "archive"}
+    for codec, suffix in _ARCHIVE_CODECS.items():
+        if path.name.endswith(suffix):
+            info["compression"] = codec
+            break
+    if path.name.endswith(SNAPSHOT_SUFFIX):
+        if summary is None:
+            try:
+                summary = _read_snapshot_header(path)
+            except (OSError, ValueError):
+                summary = {}
+        info.update(
+            kind="incremental",
+            # `size` is what a restore yields; `stored` is what this backup added to the store.
+            size=summary.get("bytes", 0),
+            stored=summary.get("added_bytes", 0),
+            files=summary.get("files"),
+            duration=summary.get("duration"),
+            compression=summary.get("compression", "gzip"),
+        )
+    return info
+
+def _scan_backup_totals(job: _Job) -> None:
+    files = size = 0
+    for _, entry in _walk_backup_tree(_inst().file_root):
+        job.check_cancelled()
+        with contextlib.suppress(OSError):
+            if entry.is_file(follow_symlinks=False):
+                files += 1
+                size += entry.stat(follow_symlinks=False).st_size
+    job.progress.total_files = files
+    job.progress.total_bytes = size
+
+def _run_backup_job(job: _Job, target: Path, mode: str) -> int:
+    job.progress = _Progress("scanning")
+    job.log(f"Scanning {_inst().file_root} ...")
+    _scan_backup_totals(job)
+    progress = _Progress("archiving")
+    progress.total_files, progress.total_bytes = job.progress.total_files, job.progress.total_bytes
+    job.progress = progress
+    job.log(f"Backing up {progress.total_files} files ({progress.total_bytes} bytes) to {target.name}")
+    # Archives are written under a hidden temp name and renamed into place, so
+    # neither a crash nor a cancel can leave a truncated backup in the list.
+    partial = target.with_name(f".{target.name}.partial")
+    try:
+        if mode == "incremental":
+            summary = _with_backup_priority(_create_snapshot, target, job)
+        else:
+            summary = _with_backup_priority(_create_backup_archive, partial, job)
+            os.replace(partial, target)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            partial.unlink()
+        if mode == "incremental":
+            with contextlib.suppress(OSError):
+                _gc_backup_store(target.parent)
+        raise
+    job.progress.phase = "done"
+    job.result = _backup_info(target, target.stat(), summary) | {"created": time.time()}
+    job.log(f"Backup {target.name} complete")
+    return 0
+
+def _active_backups() -> list[dict]:
+    server = _inst().name
+    with _JOBS_LOCK:
+        jobs = [job for job in _JOBS.values() if job.kind == "backup" and job.server == server and job.active]
+    return [
+        {
+            "name": job.meta["backup"],
+            "in_progress": True,
+            "job": job.id,
+            "state": job.state,
+            "progress": job.progress.to_dict() if job.progress else None,
+            "modified": job.created,
+        }
+        for job in jobs
+    ]
 
+# Backups are only ever added, renamed into place or deleted, all of which
+# bump the directory's mtime, so the listing (and the snapshot headers read
+# for it) is reused until that changes.
+_BACKUP_LIST_CACHE: dict[str, tuple[tuple, list[dict]]] = {}  # backup dir -> (version, listing)
+_BACKUP_LIST_LOCK = Lock()
 
 def _list_backups() -> list[dict]:
     backup_dir = _ensure_backup_dir()
+    try:
+        st = backup_dir.stat()
+    except OSError:
+        return []
+    key = (st.st_ino, st.st_mtime_ns)
+    with _BACKUP_LIST_LOCK:
+        cached = _BACKUP_LIST_CACHE.get(str(backup_dir))
+        if cached and cached[0] == key:
+            return list(cached[1])
+
     backups = []
     try:
-        entries = sorted(backup_dir.glob("*.tar.gz"), key=lambda p: p.stat().st_mtime, reverse=True)
+        candidates = [p for p in backup_dir.iterdir() if p.name.endswith((*ARCHIVE_SUFFIXES, SNAPSHOT_SUFFIX))]
+        entries = sorted(candidates, key=lambda p: p.stat().st_mtime, reverse=True)
     except OSError:
         return backups
 
@@ -550,14 +5523,10 @@ def _list_backups() -> list[dict]:
             stat = path.stat()
         except OSError:
             continue
-        backups.append(
-            {
-                "name": path.name,
-                "size": stat.st_size,
-                "modified": stat.st_mtime,
-            }
-        )
-    return backups
+        backups.append(_backup_info(path, stat))
+    with _BACKUP_LIST_LOCK:
+        _BACKUP_LIST_CACHE[str(backup_dir)] = (key, backups)
+    return list(backups)
 
 @app.get("/api/fs/list")
 def fs_list():
@@ -573,20 +5542,153 @@ def fs_list():
     if not target.exists() or not target.is_dir():
         return jsonify({"ok": False, "error": "not found"}), 404
 
+    sort = request.args.get("sort", "name")
+    if sort not in FS_SORT_KEYS:
+        return jsonify({"ok": False, "error": "invalid sort"}), 400
+    descending = request.args.get("order", "asc") == "desc"
+    try:
+        limit = max(1, min(int(request.args.get("limit", FS_PAGE_SIZE)), FS_PAGE_MAX))
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid limit"}), 400
+
     try:
-        entries = _list_entries(target)
+        page = _list_entries(target, sort=sort, descending=descending, query=request.args.get("q", "").strip(),
+                             cursor=request.args.get("cursor", ""), limit=limit)
+    except ValueError as exc:
+        return jsonify({"ok": False, "error": str(exc)}), 400
     except OSError as exc:
         return jsonify({"ok": False, "error": str(exc)}), 500
-    relative = _relative(target) if target != FILE_ROOT else ""
-    parent = _relative(target.parent) if target != FILE_ROOT else None
-    return jsonify({"ok": True, "path": relative, "parent": parent, "entries": entries})
+    root = _inst().file_root
+    relative = _relative(target) if target != root else ""
+    parent = _relative(target.parent) if target != root else None
+    return jsonify({"ok": True, "path": relative, "parent": parent, **page})
 
 def _blocked_extension(path: Path) -> bool:
     return path.suffix.lower() in BANNED_EXTS
 
-def _read_text_file(path: Path) -> str:
-    with path.open("r", encoding="utf-8", errors="replace") as fh:
-        return fh.read()
+# Files up to FS_EDIT_LIMIT load whole into the editor. Anything larger is
+# read in byte ranges (offset/length) or as the last N lines, via mmap so a
+# range near the end of a multi-GB log costs the same as one at the start.
+FS_EDIT_LIMIT = 2 * 1024 * 1024
+FS_READ_MAX = 8 * 1024 * 1024
+FS_TAIL_DEFAULT = 1000
+FS_TAIL_MAX = 100_000
+
+def _utf8_boundary(buf, pos: int) -> int:
+    """Move pos back to the first byte of the UTF-8 sequence it points into."""
+    floor = max(0, pos - 3)
+    while floor < pos < len(buf) and 0x80 <= buf[pos] < 0xC0:
+        pos -= 1
+    return pos
+
+def _tail_start(buf, size: int, lines: int) -> int:
+    end = size - 1 if buf[size - 1] == 0x0A else size
+    start = end
+    for _ in range(lines):
+        idx = buf.rfind(b"\n", 0, start)
+        if idx < 0:
+            return 0
+        start = idx
+    return start + 1
+
+def _read_range(path: Path, offset: int = 0, length: int | None = None, tail: int | None = None) -> dict:
+    """Read a UTF-8 aligned slice of a file: a byte range, or its last `tail` lines."""
+    size = path.stat().st_size
+    if size == 0:
+        return {"content": "", "offset": 0, "length": 0, "size": 0}
+    with path.open("rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        size = len(buf)
+        if tail is not None:
+            start, end = _tail_start(buf, size, tail), size
+            if end - start > FS_READ_MAX:
+                cut = buf.find(b"\n", end - FS_READ_MAX, end)
+                start = cut + 1 if cut >= 0 else _utf8_boundary(buf, end - FS_READ_MAX)
+        else:
+            length = FS_READ_MAX if length is None else min(length, FS_READ_MAX)
+            start = _utf8_boundary(buf, min(offset, size))
+            end = _utf8_boundary(buf, min(start + length, size))
+            if end == start and start < size:
+                end = min(start + 4, size)  # always make progress on tiny ranges
+        data = buf[start:end]
+    return {"content": data.decode("utf-8", errors="replace"), "offset": start, "length": end - start, "size": size}
+
+def _is_exact_utf8(data: bytes) -> bool:
+    try:
+        data.decode("utf-8")
+    except UnicodeDecodeError:
+        return False
+    return True
+
+def _file_version(st: os.stat_result) -> dict:
+    return {"size": st.st_size, "mtime": st.st_mtime}
+
+def _atomic_write(target: Path, write) -> os.stat_result:
+    """Write through write(fh) into a temp file next to target, then os.replace it in."""
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            write(fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        with contextlib.suppress(OSError):
+            st = target.stat()
+            os.chmod(tmp, st.st_mode & 0o7777)
+            os.chown(tmp, st.st_uid, st.st_gid)
+        os.replace(tmp, target)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+    return target.stat()
+
+def _parse_patches(raw, size: int) -> list[tuple[int, int, bytes]]:
+    """Validate [{offset, length, text}] byte-range patches; they must not overlap."""
+    if not isinstance(raw, list) or not raw:
+        raise ValueError("patches must be a non-empty list")
+    patches = []
+    for item in raw:
+        if not isinstance(item, dict):
+            raise ValueError("invalid patch")
+        offset, length, text = item.get("offset"), item.get("length", 0), item.get("text", "")
+        if type(offset) is not int or type(length) is not int or not isinstance(text, str):
+            raise ValueError("invalid patch")
+        if offset < 0 or length < 0 or offset + length > size:
+            raise ValueError("patch out of range")
+        patches.append((offset, length, text.encode("utf-8")))
+    patches.sort(key=lambda p: p[0])
+    for (offset, length, _), (next_offset, _, _) in zip(patches, patches[1:]):
+        if offset + length > next_offset:
+            raise ValueError("patches overlap")
+    return patches
+
+def _copy_bytes(src, dst, count: int) -> None:
+    while count > 0:
+        chunk = src.read(min(count, 1024 * 1024))
+        if not chunk:
+            break
+        dst.write(chunk)
+        count -= len(chunk)
+
+def _write_patched(source: Path, patches: list[tuple[int, int, bytes]]):
+    def write(out):
+        with source.open("rb") as src:
+            pos = 0
+            for offset, length, data in patches:
+                _copy_bytes(src, out, offset - pos)
+                out.write(data)
+                pos = offset + length
+                src.seek(pos)
+            shutil.copyfileobj(src, out, 1024 * 1024)
+    return write
+
+def _optional_int(name: str, minimum: int = 0) -> int | None:
+    raw = request.args.get(name, "").strip()
+    if not raw:
+        return None
+    value = int(raw)
+    if value < minimum:
+        raise ValueError(name)
+    return value
 
 @app.get("/api/fs/file")
 def fs_get_file():
@@ -608,10 +5710,51 @@ def fs_get_file():
     if _blocked_extension(target):
         return jsonify({"ok": False, "error": "binary file"}), 400
 
-    if target.stat().st_size > 2 * 1024 * 1024:  # 2 MB limit
-        return jsonify({"ok": False, "error": "file too large"}), 400
+    try:
+        offset = _optional_int("offset")
+        length = _optional_int("length", 1)
+        tail = _optional_int("tail", 1)
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid range"}), 400
+
+    try:
+        st = target.stat()
+        if offset is None and length is None and tail is None:
+            if st.st_size <= FS_EDIT_LIMIT:
+                raw = target.read_bytes()
+                return jsonify({
+                    "ok": True,
+                    "content": raw.decode("utf-8", errors="replace"),
+                    "offset": 0,
+                    "length": len(raw),
+                    "partial": False,
+                    "exact": _is_exact_utf8(raw),
+                    **_file_version(st),
+                })
+            tail = FS_TAIL_DEFAULT  # too big to edit: show the end, like `tail`
+        chunk = _read_range(target, offset or 0, length, min(tail, FS_TAIL_MAX) if tail else None)
+    except OSError as exc:
+        return jsonify({"ok": False, "error": str(exc)}), 500
+
+    partial = chunk["offset"] > 0 or chunk["offset"] + chunk["length"] < chunk["size"]
+    return jsonify({"ok": True, **chunk, "partial": partial, "mtime": st.st_mtime})
+
+@app.get("/api/fs/raw")
+def fs_raw_file():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+
+    rel = request.args.get("path", "").strip()
+    try:
+        target = _safe_path(rel)
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid path"}), 400
+    if not rel or not target.is_file():
+        return jsonify({"ok": False, "error": "not found"}), 404
 
-    return jsonify({"ok": True, "content": _read_text_file(target)})
+    # Streams straight from disk with Range/ETag support, no JSON encoding.
+    download = _coerce_bool(request.args.get("download", "0"))
+    return send_file(target, as_attachment=download, download_name=target.name, conditional=True, max_age=0)
 
 @app.post("/api/fs/file")
 def fs_save_file():
@@ -621,9 +5764,12 @@ def fs_save_file():
     data = request.get_json(silent=True) or {}
     rel = data.get("path", "").strip()
     content = data.get("content")
+    patches = data.get("patches")
 
-    if not rel or content is None:
+    if not rel or (content is None and patches is None):
         return jsonify({"ok": False, "error": "missing path or content"}), 400
+    if content is not None and not isinstance(content, str):
+        return jsonify({"ok": False, "error": "content must be a string"}), 400
 
     try:
         target = _safe_path(rel)
@@ -637,13 +5783,836 @@ def fs_save_file():
         return jsonify({"ok": False, "error": "not found"}), 404
 
     try:
-        with target.open("w", encoding="utf-8") as fh:
-            fh.write(content)
+        st = target.stat()
+        base = data.get("base")
+        if patches is not None and not isinstance(base, dict):
+            return jsonify({"ok": False, "error": "patches require base size and mtime"}), 400
+        if isinstance(base, dict) and (base.get("size") != st.st_size or base.get("mtime") != st.st_mtime):
+            return jsonify({"ok": False, "error": "file changed on disk", **_file_version(st)}), 409
+        if patches is not None:
+            try:
+                parsed = _parse_patches(patches, st.st_size)
+            except ValueError as exc:
+                return jsonify({"ok": False, "error": str(exc)}), 400
+            st = _atomic_write(target, _write_patched(target, parsed))
+        else:
+            encoded = content.encode("utf-8")
+            st = _atomic_write(target, lambda fh: fh.write(encoded))
     except OSError as exc:
         return jsonify({"ok": False, "error": str(exc)}), 500
 
-    return jsonify({"ok": True})
+    return jsonify({"ok": True, **_file_version(st)})
+
+# --- Bulk file operations ---
+# Uploads are parsed straight off the socket: each multipart file part goes
+# into a temp file beside its destination and is renamed into place only
+# once the whole body has arrived, so a dropped connection leaves nothing
+# behind. Batch move/copy/delete and archive extraction run as jobs. All of
+# them count bytes into job progress and stop short of filling the disk.
+UPLOAD_MAX_BYTES = int(os.environ.get("RUSTPANEL_UPLOAD_MAX", str(8 * 1024 ** 3)))
+UPLOAD_MAX_PARTS = 1000
+UPLOAD_FORM_MEMORY = 1024 * 1024  # plain fields and the parser's buffer; file data never collects in memory
+EXTRACT_MAX_BYTES = int(os.environ.get("RUSTPANEL_EXTRACT_MAX", str(32 * 1024 ** 3)))
+EXTRACT_MAX_MEMBERS = 100_000
+FS_FREE_RESERVE = 256 * 1024 * 1024  # never fill the disk the game saves to
+FS_BATCH_ACTIONS = {"move": "moved", "copy": "copied", "delete": "deleted"}
+EXTRACT_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz", ".tar.zst", ".tar.lz4")
+
+def _write_budget(directory: Path, limit: int) -> int:
+    """Bytes that may still be written under `directory`: the limit, or free space minus the reserve."""
+    try:
+        free = shutil.disk_usage(directory).free - FS_FREE_RESERVE
+    except OSError:
+        return limit
+    return max(min(limit, free), 0)
+
+def _protected_path(target: Path) -> bool:
+    root = _inst().file_root
+    return target in {root, root / BACKUP_DIR_NAME, root / BACKUP_DIR_NAME / BACKUP_STORE_NAME}
+
+def _member_target(base: Path, name: str) -> Path | None:
+    """Where an upload or archive member called `name` lands under `base`; None for a bare directory entry."""
+    parts = [part for part in name.replace("\\", "/").split("/") if part not in {"", "."}]
+    if name.startswith(("/", "\\")) or ".." in parts:
+        raise ValueError(f"unsafe path: {name}")
+    if not parts:
+        return None
+    target = _safe_path(str(base.joinpath(*parts)))
+    if base not in target.parents:
+        raise ValueError(f"unsafe path: {name}")
+    return target
+
+def _process_umask() -> int:
+    """The umask, read from /proc where possible since os.umask() can only read it by changing it."""
+    for line in (_read_proc("/proc/self/status") or "").splitlines():
+        if line.startswith("Umask:"):
+            return int(line.split()[1], 8)
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+_UMASK = _process_umask()  # read once: umask is process-wide and request threads must not toggle it
+
+def _new_file_mode(target: Path) -> int:
+    with contextlib.suppress(OSError):
+        return S_IMODE(target.stat().st_mode)
+    return 0o666 & ~_UMASK
+
+def _replace_into(tmp: Path, target: Path) -> None:
+    os.chmod(tmp, _new_file_mode(target))
+    os.replace(tmp, target)
+
+class _UploadPart:
+    """One multipart file being received into a temp file next to its destination."""
+
+    def __init__(self, job: _Job, target: Path | None, limit: int):
+        self.job = job
+        self.target = target
+        self.limit = limit
+        self.size = 0
+        if target is None:
+            self.tmp, self.fh = None, tempfile.TemporaryFile()
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".upload")
+            self.tmp, self.fh = Path(tmp), os.fdopen(fd, "w+b")
+
+    def write(self, data: bytes) -> int:
+        self.job.check_cancelled()
+        self.size += len(data)
+        self.job.progress.bytes += len(data)
+        if self.job.progress.bytes > self.limit:
+            raise RequestEntityTooLarge(f"upload exceeds {self.limit} bytes")
+        return self.fh.write(data)
+
+    def seek(self, *args) -> int:
+        return self.fh.seek(*args)
+
+    def commit(self) -> dict:
+        self.fh.flush()
+        os.fsync(self.fh.fileno())
+        self.fh.close()
+        _replace_into(self.tmp, self.target)
+        self.tmp = None
+        self.job.progress.files += 1
+        return {"path": _relative(self.target), "size": self.size}
+
+    def discard(self) -> None:
+        self.fh.close()
+        if self.tmp is not None:
+            with contextlib.suppress(OSError):
+                self.tmp.unlink()
+
+@app.post("/api/fs/upload")
+def fs_upload():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+
+    try:
+        dest = _safe_path(request.args.get("path", "").strip() or ".")
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid path"}), 400
+    if not dest.is_dir():
+        return jsonify({"ok": False, "error": "not found"}), 404
+    if request.mimetype != "multipart/form-data":
+        return jsonify({"ok": False, "error": "expected multipart/form-data"}), 400
+    overwrite = _coerce_bool(request.args.get("overwrite", "0"))
+    limit = _write_budget(dest, UPLOAD_MAX_BYTES)
+    if request.content_length and request.content_length > limit:
+        return jsonify({"ok": False, "error": f"upload of {request.content_length} bytes exceeds the {limit} allowed"}), 413
+
+    parts: list[_UploadPart] = []
+    seen: set[Path] = set()
+
+    def stream_factory(total_content_length, content_type, filename, content_length=None):
+        # Browsers send an empty filename for an unused file input; its body is discarded.
+        target = _member_target(dest, filename) if filename else None
+        if target is not None:
+            if target in seen:
+                raise ValueError(f"{filename} appears twice in the upload")
+            if target.is_dir() or (target.exists() and not overwrite):
+                raise ValueError(f"{_relative(target)} already exists")
+            seen.add(target)
+        part = _UploadPart(job, target, limit)
+        parts.append(part)
+        return part
+
+    try:
+        with _inline_job("upload", f"Upload to /{_relative(dest)}", meta={"path": _relative(dest)}) as job:
+            job.progress = _Progress("receiving")
+            job.progress.total_bytes = request.content_length
+            parser = formparser.FormDataParser(stream_factory=stream_factory, max_form_memory_size=UPLOAD_FORM_MEMORY,
+                                               max_content_length=limit, silent=False, max_form_parts=UPLOAD_MAX_PARTS)
+            try:
+                parser.parse_from_environ(request.environ)
+                files = [part.commit() for part in parts if part.target is not None]
+            finally:
+                for part in parts:
+                    part.discard()
+            if not files:
+                raise ValueError("no files in the upload")
+            job.result = {"files": files, "bytes": sum(f["size"] for f in files)}
+            job.progress.phase = "done"
+            job.log(f"Uploaded {len(files)} files ({job.result['bytes']} bytes)")
+    except RequestEntityTooLarge as exc:
+        return jsonify({"ok": False, "error": exc.description}), 413
+    except ValueError as exc:
+        return jsonify({"ok": False, "error": str(exc)}), 400
+    except _JobCancelled:
+        return jsonify({"ok": False, "error": "cancelled"}), 409
+    except OSError as exc:
+        return jsonify({"ok": False, "error": str(exc)}), 500
+    return jsonify({"ok": True, "files": files, "job": job.to_dict()})
+
+def _tree_size(path: Path) -> tuple[int, int]:
+    if not path.is_dir() or path.is_symlink():
+        return 1, path.lstat().st_size
+    files = size = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            with contextlib.suppress(OSError):
+                size += os.lstat(os.path.join(dirpath, name)).st_size
+                files += 1
+    return files, size
+
+def _copy_entry(job: _Job, src: Path, dst: Path) -> None:
+    """Copy a file, symlink or tree with _clone_file, swapping each file into place atomically."""
+    if src.is_symlink():
+        link = dst.with_name(f".{dst.name}.{uuid.uuid4().hex[:8]}.copy")
+        link.symlink_to(os.readlink(src))
+        os.replace(link, dst)
+        job.progress.files += 1
+        return
+    if src.is_dir():
+        dst.mkdir(exist_ok=True)
+        for entry in os.scandir(src):
+            _copy_entry(job, Path(entry.path), dst / entry.name)
+        shutil.copystat(src, dst)
+        return
+    job.check_cancelled()
+    tmp = dst.with_name(f".{dst.name}.{uuid.uuid4().hex[:8]}.copy")
+    try:
+        st = src.stat()
+        _clone_file(src, tmp, st)
+        os.replace(tmp, dst)
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            tmp.unlink()
+    job.progress.files += 1
+    job.progress.bytes += st.st_size
+
+def _remove_entry(job: _Job, target: Path) -> None:
+    job.check_cancelled()
+    if target.is_dir() and not target.is_symlink():
+        shutil.rmtree(target)
+    else:
+        target.unlink()
+
+def _run_batch_job(job: _Job, action: str, items: list[tuple[Path, Path | None]], overwrite: bool) -> int:
+    done, failed = [], []
+    job.progress = _Progress("scanning")
+    totals = [_tree_size(src) for src, _ in items] if action == "copy" else []
+    job.progress = _Progress(action)
+    job.progress.total_files = sum(f for f, _ in totals) if totals else len(items)
+    job.progress.total_bytes = sum(b for _, b in totals) if totals else None
+    if action == "copy" and job.progress.total_bytes > _write_budget(items[0][1].parent, job.progress.total_bytes):
+        raise OSError(errno.ENOSPC, "not enough free space for the copy")
+    for src, dst in items:
+        rel = _relative(src)
+        try:
+            if action == "delete":
+                _remove_entry(job, src)
+                job.progress.files += 1
+            else:
+                if dst.exists() or dst.is_symlink():
+                    if not overwrite:
+                        raise FileExistsError(f"{_relative(dst)} already exists")
+                    if dst.is_dir() != src.is_dir():
+                        raise FileExistsError(f"{_relative(dst)} exists and is not a {'directory' if src.is_dir() else 'file'}")
+                if action == "copy":
+                    _copy_entry(job, src, dst)
+                elif dst.is_dir() and not dst.is_symlink():
+                    raise FileExistsError(f"{_relative(dst)} already exists")
+                else:
+                    # Same filesystem: an atomic rename. Across filesystems shutil copies then deletes.
+                    shutil.move(str(src), str(dst))
+                    job.progress.files += 1
+        except _JobCancelled:
+            raise
+        except OSError as exc:
+            failed.append({"path": rel, "error": str(exc)})
+            job.log(f"{action} {rel}: {exc}")
+            continue
+        done.append({"path": rel, **({"to": _relative(dst)} if dst is not None else {})})
+        job.log(f"{action} {rel}" + (f" -> {_relative(dst)}" if dst is not None else ""))
+    job.result = {"action": action, "done": done, "failed": failed}
+    # Reclaim the store chunks only deleted snapshots used, as DELETE /api/backups/<name> does.
+    backup_dir = _safe_path(BACKUP_DIR_NAME)
+    if action == "delete" and any(src.parent == backup_dir and src.name.endswith(SNAPSHOT_SUFFIX)
+                                  for src, _ in items if not src.exists()):
+        job.progress.phase = "reclaiming"
+        job.result["reclaimed"] = _gc_backup_store(backup_dir)
+    job.progress.phase = "done"
+    return 1 if failed else 0
+
+@app.post("/api/fs/batch")
+def fs_batch():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"ok": False, "error": "expected a JSON object"}), 400
+    action = data.get("action")
+    paths = data.get("paths")
+    if action not in FS_BATCH_ACTIONS:
+        return jsonify({"ok": False, "error": f"action must be one of: {', '.join(sorted(FS_BATCH_ACTIONS))}"}), 400
+    if not isinstance(paths, list) or not paths or not all(isinstance(p, str) and p.strip() for p in paths):
+        return jsonify({"ok": False, "error": "paths must be a non-empty list of paths"}), 400
+
+    try:
+        sources = [_safe_path(p.strip()) for p in paths]
+        dest = None
+        if action != "delete":
+            raw = data.get("destination")
+            if not isinstance(raw, str):
+                return jsonify({"ok": False, "error": "destination is required"}), 400
+            dest = _safe_path(raw.strip() or ".")
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid path"}), 400
+    if dest is not None and not dest.is_dir():
+        return jsonify({"ok": False, "error": "destination is not a directory"}), 404
+
+    items: list[tuple[Path, Path | None]] = []
+    targets: set[Path] = set()
+    for src in sources:
+        if not src.exists() and not src.is_symlink():
+            return jsonify({"ok": False, "error": f"{_relative(src)} not found"}), 404
+        if _protected_path(src):
+            return jsonify({"ok": False, "error": f"/{_relative(src)} cannot be {FS_BATCH_ACTIONS[action]}"}), 400
+        dst = None
+        if dest is not None:
+            dst = dest / src.name
+            if src.is_dir() and (dest == src or src in dest.parents):
+                return jsonify({"ok": False, "error": f"cannot {action} {_relative(src)} into itself"}), 400
+            if dst == src or dst in targets:
+                return jsonify({"ok": False, "error": f"{_relative(dst)} is the target of more than one path"}), 400
+            targets.add(dst)
+        items.append((src, dst))
+
+    overwrite = _coerce_bool(data.get("overwrite", False))
+    titles = {"move": "Move", "copy": "Copy", "delete": "Delete"}
+    where = f" to /{_relative(dest)}" if dest is not None else ""
+    job, created = _submit_job(
+        f"fs_{action}", f"{titles[action]} {len(items)} item{'s' if len(items) != 1 else ''}{where}",
+        lambda job: _run_batch_job(job, action, items, overwrite),
+        meta={"paths": [_relative(src) for src, _ in items]},
+    )
+    return _job_response(job, created)
+
+def _archive_kind(path: Path) -> str | None:
+    name = path.name.lower()
+    if name.endswith(".zip"):
+        return "zip"
+    if name.endswith(EXTRACT_SUFFIXES):
+        return "tar"
+    return None
+
+class _ExtractBudget:
+    """Running totals for one extraction, refusing archives that expand past the limit."""
+
+    def __init__(self, job: _Job, limit: int):
+        self.job = job
+        self.limit = limit
+        self.written = 0
+        self.members = 0
+        self.skipped: list[str] = []
+
+    def member(self) -> None:
+        self.members += 1
+        if self.members > EXTRACT_MAX_MEMBERS:
+            raise ValueError(f"archive has more than {EXTRACT_MAX_MEMBERS} entries")
+
+    def add(self, count: int) -> None:
+        self.written += count
+        if self.written > self.limit:
+            raise ValueError(f"archive expands to more than {self.limit} bytes")
+
+def _extract_file(budget: _ExtractBudget, fh, target: Path, mode: int | None, mtime: float | None,
+                  overwrite: bool) -> None:
+    if target.exists() or target.is_symlink():
+        if not overwrite or target.is_dir():
+            budget.skipped.append(_relative(target))
+            return
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".extract")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                budget.job.check_cancelled()
+                data = fh.read(RESTORE_COPY_SIZE)
+                if not data:
+                    break
+                budget.add(len(data))
+                out.write(data)
+        _replace_into(Path(tmp), target)
+        if mode is not None:
+            os.chmod(target, mode & 0o755 | 0o600)  # never setuid, always owner-writable
+        if mtime:
+            os.utime(target, (mtime, mtime))
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+    budget.job.progress.files += 1
+
+def _extract_zip(job: _Job, budget: _ExtractBudget, archive: Path, dest: Path, overwrite: bool) -> None:
+    with zipfile.ZipFile(archive) as zf:
+        infos = zf.infolist()
+        declared = sum(info.file_size for info in infos)
+        if declared > budget.limit:
+            raise ValueError(f"archive expands to {declared} bytes; {budget.limit} allowed")
+        job.progress.total_bytes = declared
+        job.progress.total_files = sum(1 for info in infos if not info.is_dir())
+        # The central directory lists every name up front, so reject a bad one before writing anything.
+        targets = [_member_target(dest, info.filename) for info in infos]
+        for info, target in zip(infos, targets):
+            budget.member()
+            if target is None:
+                continue
+            if info.is_dir():
+                target.mkdir(parents=True, exist_ok=True)
+                continue
+            if S_ISLNK(info.external_attr >> 16):
+                job.log(f"skipped {info.filename}: links are not extracted")
+                continue
+            mode = (info.external_attr >> 16) & 0o777 or None
+            mtime = time.mktime(info.date_time + (0, 0, -1))
+            with zf.open(info) as fh:
+                before = budget.written
+                _extract_file(budget, fh, target, mode, mtime, overwrite)
+            job.progress.bytes += budget.written - before
+
+def _extract_tar(job: _Job, budget: _ExtractBudget, archive: Path, dest: Path, overwrite: bool) -> None:
+    job.progress.total_bytes = archive.stat().st_size  # progress counts compressed bytes read
+    with _open_archive_stream(archive, job) as tar:
+        for member in tar:
+            budget.member()
+            target = _member_target(dest, member.name)
+            if target is None:
+                continue
+            if member.isdir():
+                target.mkdir(parents=True, exist_ok=True)
+            elif member.isfile():
+                _extract_file(budget, tar.extractfile(member), target, member.mode, member.mtime, overwrite)
+            else:
+                job.log(f"skipped {member.name}: links and special files are not extracted")
+
+def _run_extract_job(job: _Job, archive: Path, dest: Path, overwrite: bool) -> int:
+    job.progress = _Progress("extracting")
+    budget = _ExtractBudget(job, _write_budget(dest, EXTRACT_MAX_BYTES))
+    job.log(f"Extracting {archive.name} into /{_relative(dest)}")
+    try:
+        if _archive_kind(archive) == "zip":
+            _extract_zip(job, budget, archive, dest, overwrite)
+        else:
+            _extract_tar(job, budget, archive, dest, overwrite)
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError, zlib.error) as exc:
+        raise ValueError(f"not a readable archive: {exc}") from None
+    finally:
+        job.result = {"files": job.progress.files, "bytes": budget.written, "skipped": budget.skipped}
+    for rel in budget.skipped[:50]:
+        job.log(f"skipped {rel}: already exists")
+    job.log(f"Extracted {job.progress.files} files ({budget.written} bytes), {len(budget.skipped)} skipped")
+    job.progress.phase = "done"
+    return 0
+
+@app.post("/api/fs/extract")
+def fs_extract():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"ok": False, "error": "expected a JSON object"}), 400
+    rel = data.get("path")
+    if not isinstance(rel, str) or not rel.strip():
+        return jsonify({"ok": False, "error": "missing path"}), 400
+    try:
+        archive = _safe_path(rel.strip())
+        raw_dest = data.get("destination")
+        dest = _safe_path(raw_dest.strip() or ".") if isinstance(raw_dest, str) else archive.parent
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid path"}), 400
+    if not archive.is_file():
+        return jsonify({"ok": False, "error": "not found"}), 404
+    if _archive_kind(archive) is None:
+        return jsonify({"ok": False, "error": f"unsupported archive; expected one of: {', '.join(EXTRACT_SUFFIXES)}"}), 400
+    if dest.exists() and not dest.is_dir():
+        return jsonify({"ok": False, "error": "destination is not a directory"}), 400
+    if _protected_path(dest) and dest != _inst().file_root:
+        return jsonify({"ok": False, "error": "cannot extract into the backups directory"}), 400
+    dest.mkdir(parents=True, exist_ok=True)
+
+    overwrite = _coerce_bool(data.get("overwrite", False))
+    job, created = _submit_job(
+        "extract", f"Extract {archive.name} to /{_relative(dest)}",
+        lambda job: _run_extract_job(job, archive, dest, overwrite),
+        meta={"archive": _relative(archive), "destination": _relative(dest)},
+    )
+    return _job_response(job, created)
+
+# --- File search ---
+SEARCH_WORKERS = 4
+SEARCH_LIMIT = 200
+SEARCH_LIMIT_MAX = 5000
+SEARCH_MAX_FILE = 16 * 1024 * 1024
+SEARCH_MATCHES_PER_FILE = 50
+SEARCH_LINE_CHARS = 300
+# Config and plugin sources get a persistent trigram index so repeat
+# searches only open files that can possibly match.
+SEARCH_INDEX_GLOBS = ("oxide/config", "oxide/plugins", "carbon/configs", "carbon/plugins", "cfg", "server/*/cfg")
+SEARCH_INDEX_MAX_FILE = 4 * 1024 * 1024
+
+def _trigram_ids(data: bytes) -> set[int]:
+    data = data.lower()
+    return {int.from_bytes(data[i:i + 3], "big") for i in range(len(data) - 2)}
+
+def _required_literals(pattern: str, is_regex: bool) -> list[bytes]:
+    """ASCII literal runs (>= 3 chars) that every match of `pattern` must contain."""
+    if not is_regex:
+        runs = [pattern]
+    else:
+        try:
+            parsed = _re_parser.parse(pattern)
+        except (re.error, TypeError, ValueError):
+            return []
+        runs, current = [], []
+        for op, arg in parsed:
+            if op is _re_parser.LITERAL:
+                current.append(chr(arg))
+                continue
+            runs.append("".join(current))
+            current = []
+        runs.append("".join(current))
+    return [run.lower().encode() for run in runs if len(run) >= 3 and run.isascii()]
+
+class _SearchIndex:
+    """Trigram index over the text files in SEARCH_INDEX_GLOBS, persisted under CACHE_DIR."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        digest = hashlib.sha1(str(root).encode()).hexdigest()[:12]
+        self.path = CACHE_DIR / f"search-index-{digest}.json.gz"
+        self._lock = Lock()
+        self._files: dict[str, tuple[int, int, set[int]]] = {}
+        self._postings: dict[int, set[str]] | None = None
+        self._loaded = False
+
+    def _load(self) -> None:
+        self._loaded = True
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return
+        for rel, (mtime, size, packed) in data.get("files", {}).items():
+            ids = array("I")
+            ids.frombytes(base64.b64decode(packed))
+            self._files[rel] = (mtime, size, set(ids))
+
+    def _save(self) -> None:
+        files = {
+            rel: [mtime, size, base64.b64encode(array("I", sorted(ids)).tobytes()).decode()]
+            for rel, (mtime, size, ids) in self._files.items()
+        }
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=3) as fh:
+            json.dump({"root": str(self.root), "files": files}, fh)
+        os.replace(tmp, self.path)
+
+    def _indexed_files(self):
+        for pattern in SEARCH_INDEX_GLOBS:
+            for base in self.root.glob(pattern):
+                if not base.is_dir():
+                    continue
+                for dirpath, _, filenames in os.walk(base):
+                    for name in filenames:
+                        path = Path(dirpath) / name
+                        if not _blocked_extension(path):
+                            yield path
+
+    def refresh(self) -> None:
+        """Re-trigram files whose size or mtime changed; drop files that disappeared."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            seen, changed = set(), False
+            for path in self._indexed_files():
+                rel = str(path.relative_to(self.root))
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                if st.st_size > SEARCH_INDEX_MAX_FILE:
+                    continue
+                seen.add(rel)
+                known = self._files.get(rel)
+                if known and known[0] == st.st_mtime_ns and known[1] == st.st_size:
+                    continue
+                try:
+                    ids = _trigram_ids(path.read_bytes())
+                except OSError:
+                    continue
+                self._files[rel] = (st.st_mtime_ns, st.st_size, ids)
+                changed = True
+            for rel in set(self._files) - seen:
+                del self._files[rel]
+                changed = True
+            if changed or self._postings is None:
+                postings: dict[int, set[str]] = {}
+                for rel, (_, _, ids) in self._files.items():
+                    for tri in ids:
+                        postings.setdefault(tri, set()).add(rel)
+                self._postings = postings
+            if changed:
+                with contextlib.suppress(OSError):
+                    self._save()
+
+    def candidates(self, literals: list[bytes]) -> tuple[set[str], set[str]] | None:
+        """Return (indexed files, files that may match) or None when the index cannot help."""
+        if not literals:
+            return None
+        with self._lock:
+            result: set[str] | None = None
+            for literal in literals:
+                for tri in _trigram_ids(literal):
+                    files = self._postings.get(tri, set())
+                    result = set(files) if result is None else result & files
+                    if not result:
+                        return set(self._files), set()
+            return set(self._files), result or set()
+
+
+_SEARCH_INDEXES: dict[str, _SearchIndex] = {}
+_SEARCH_INDEXES_LOCK = Lock()
+
+def _search_index(root: Path) -> _SearchIndex:
+    with _SEARCH_INDEXES_LOCK:
+        index = _SEARCH_INDEXES.get(str(root))
+        if index is None:
+            index = _SEARCH_INDEXES[str(root)] = _SearchIndex(root)
+        return index
+
+def _walk_search(base: Path):
+    root = _inst().file_root
+    for dirpath, dirnames, filenames in os.walk(base):
+        current = Path(dirpath)
+        if current == root:
+            dirnames[:] = [d for d in dirnames if d != BACKUP_DIR_NAME]
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = current / name
+            if not path.is_symlink():  # never follow links out of the file root
+                yield path
+
+def _grep_file(path: Path, regex: re.Pattern) -> list[tuple[int, str]]:
+    matches = []
+    try:
+        if path.stat().st_size > SEARCH_MAX_FILE:
+            return matches
+        with path.open("rb") as fh:
+            if b"\0" in fh.read(8192):
+                return matches  # binary
+            fh.seek(0)
+            for number, raw in enumerate(fh, 1):
+                line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+                if regex.search(line):
+                    matches.append((number, line[:SEARCH_LINE_CHARS]))
+                    if len(matches) >= SEARCH_MATCHES_PER_FILE:
+                        break
+    except OSError:
+        pass
+    return matches
+
+def _search(base: Path, name_glob: str, regex: re.Pattern | None, literals: list[bytes], limit: int):
+    """Yield result dicts as they are found, ending with a summary."""
+    started = time.monotonic()
+    count = 0
+    truncated = False
+    skipped = 0
+    plan = None
+    if regex is not None:
+        index = _search_index(_inst().file_root)
+        index.refresh()
+        plan = index.candidates(literals)
+    name_glob = name_glob.lower()
+
+    def wanted(path: Path) -> bool:
+        return fnmatch.fnmatchcase(path.name.lower(), name_glob) and not _blocked_extension(path)
+
+    if regex is None:
+        for path in _walk_search(base):
+            if wanted(path):
+                yield {"type": "file", "path": _relative(path)}
+                count += 1
+                if count >= limit:
+                    truncated = True
+                    break
+    else:
+        pool = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="search")
+        pending = set()
+
+        def emit(futures):
+            for future in futures:
+                rel, matches = future.result()
+                for number, text in matches:
+                    yield {"type": "match", "path": rel, "line": number, "text": text}
+
+        try:
+            for path in _walk_search(base):
+                if not wanted(path):
+                    continue
+                rel = _relative(path)
+                if plan is not None and rel in plan[0] and rel not in plan[1]:
+                    skipped += 1
+                    continue
+                pending.add(pool.submit(lambda p=path, r=rel: (r, _grep_file(p, regex))))
+                if len(pending) >= SEARCH_WORKERS * 4:
+                    done, pending = wait_futures(pending, return_when=FIRST_COMPLETED)
+                    for item in emit(done):
+                        yield item
+                        count += 1
+                        if count >= limit:
+                            truncated = True
+                            break
+                    if truncated:
+                        break
+            while pending and not truncated:
+                done, pending = wait_futures(pending, return_when=FIRST_COMPLETED)
+                for item in emit(done):
+                    yield item
+                    count += 1
+                    if count >= limit:
+                        truncated = True
+                        break
+        finally:
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=False, cancel_futures=True)
+    yield {
+        "type": "done",
+        "count": count,
+        "truncated": truncated,
+        "skipped_by_index": skipped,
+        "elapsed": time.monotonic() - started,
+    }
+
+@app.get("/api/fs/search")
+def fs_search():
+    if not _authorized(request):
+        return jsonify({"ok": False, "error": "unauthorized"}), 401
+
+    rel = request.args.get("path", "").strip()
+    try:
+        base = _safe_path(rel or ".")
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid path"}), 400
+    if not base.is_dir():
+        return jsonify({"ok": False, "error": "not found"}), 404
+
+    name_glob = request.args.get("name", "").strip() or "*"
+    query = request.args.get("q", "")
+    is_regex = _coerce_bool(request.args.get("regex", "1"))
+    case_sensitive = _coerce_bool(request.args.get("case", "0"))
+    try:
+        limit = max(1, min(int(request.args.get("limit", SEARCH_LIMIT)), SEARCH_LIMIT_MAX))
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid limit"}), 400
+
+    regex = None
+    literals: list[bytes] = []
+    if query:
+        try:
+            regex = re.compile(query if is_regex else re.escape(query), 0 if case_sensitive else re.IGNORECASE)
+        except re.error as exc:
+            return jsonify({"ok": False, "error": f"invalid pattern: {exc}"}), 400
+        literals = _required_literals(query, is_regex)
+
+    def stream():
+        for item in _search(base, name_glob, regex, literals, limit):
+            yield json.dumps(item) + "\n"
+
+    return Response(stream(), mimetype="application/x-ndjson", headers=SSE_HEADERS)
 
 # === RUN ===
+# All panel state (jobs, samplers, log tails, caches) lives in this process,
+# so it is served by exactly one process and scales with threads. An SSE
+# stream parks its thread in a Condition wait, so threads get small stacks
+# and the pool is sized for hundreds of open consoles. gunicorn's gthread
+# worker is used when installed; otherwise Werkzeug's threaded server.
+SERVE_HOST = os.environ.get("RUSTPANEL_HOST", "0.0.0.0")
+SERVE_PORT = int(os.environ.get("RUSTPANEL_PORT", "8080"))
+SERVE_THREADS = int(os.environ.get("RUSTPANEL_THREADS", "256"))
+SERVE_KEEPALIVE = int(os.environ.get("RUSTPANEL_KEEPALIVE", "75"))
+SERVE_THREAD_STACK = 512 * 1024
+SERVE_API_THREADS = 16  # threads kept free of streams under gunicorn
+
+def _serve_gunicorn(args) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    class _PanelApplication(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"{args.host}:{args.port}",
+                "workers": 1,  # see above: state is per process
+                "worker_class": "gthread",
+                "threads": args.threads,
+                "worker_connections": max(1000, args.threads * 2),
+                "keepalive": args.keepalive,
+                "timeout": 60,  # worker heartbeat; gthread does not time out long requests
+                "graceful_timeout": 10,
+                "accesslog": "-" if args.access_log else None,
+                "post_worker_init": lambda worker: _SCHEDULER.ensure_started(),
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    _PanelApplication().run()
+
+def main(argv: list[str] | None = None) -> None:
+    global SSE_MAX_STREAMS
+    parser = argparse.ArgumentParser(prog="app.py", description="Run the Rust panel.")
+    parser.add_argument("command", nargs="?", default="serve", choices=["serve"])
+    parser.add_argument("--host", default=SERVE_HOST)
+    parser.add_argument("--port", type=int, default=SERVE_PORT)
+    parser.add_argument("--threads", type=int, default=SERVE_THREADS,
+                        help="request threads; each open log/RCON/job stream holds one (default %(default)s)")
+    parser.add_argument("--keepalive", type=int, default=SERVE_KEEPALIVE,
+                        help="seconds an idle keep-alive connection stays open (default %(default)s)")
+    parser.add_argument("--max-streams", type=int, default=SSE_MAX_STREAMS,
+                        help="open streams before new ones get 503 (default: threads - %d under gunicorn)"
+                        % SERVE_API_THREADS)
+    parser.add_argument("--server", choices=["auto", "gunicorn", "werkzeug"], default="auto")
+    parser.add_argument("--access-log", action="store_true")
+    args = parser.parse_args(argv)
+    threading.stack_size(SERVE_THREAD_STACK)
+    if args.server == "gunicorn" and gunicorn is None:
+        parser.error("gunicorn is not installed (pip install gunicorn)")
+    if args.server != "werkzeug" and gunicorn is not None:
+        # gthread has a fixed pool, so leave room for API calls beside the streams.
+        SSE_MAX_STREAMS = args.max_streams or max(args.threads - SERVE_API_THREADS, 1)
+        _serve_gunicorn(args)
+        return
+    if args.server == "auto":
+        app.logger.warning("gunicorn is not installed; serving with Werkzeug's threaded server")
+    SSE_MAX_STREAMS = args.max_streams
+    _SCHEDULER.ensure_started()  # schedules must fire even when nobody has the panel open
+    app.run(host=args.host, port=args.port, threaded=True)
+
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=8080)
+    main()
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""Load-test the panel API against stubbed system tools and a synthetic file root.
+
+Starts `app.py serve` on a free port with fake systemctl/journalctl/sudo and
+update scripts on PATH, fills a temporary file root with a large directory,
+big sparse files and a multi-GB backup tree, holds a number of console
+streams open, then hammers each scenario with concurrent keep-alive clients.
+Throughput, p50/p99 latency and the panel's own fork rate
+(/api/admin/stats) go to bench_output.txt. Finally it checks that the stub
+journal's burst of identical same-second lines was indexed once per line.
+
+    python bench/run.py                      # defaults, report in ./bench_output.txt
+    python bench/run.py --json base.json     # also keep the numbers
+    python bench/run.py --baseline base.json # exit 1 on a p99/throughput regression
+"""
+import argparse, http.client, json, os, shutil, signal, socket, stat, subprocess, sys, tempfile, threading, time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+TOKEN = "bench"
+HEADERS = {"X-Auth-Token": TOKEN}
+
+# (name, path); the big directory and backup tree come from build_file_root.
+SCENARIOS = [
+    ("status", "/api/status"),
+    ("fs-list-root", "/api/fs/list?path="),
+    ("fs-list-big", "/api/fs/list?path=big"),
+    ("fs-list-big-filter", "/api/fs/list?path=big&q=file01&sort=size&order=desc"),
+    ("metrics", "/api/metrics"),
+    ("metrics-history", "/api/metrics/history"),
+    ("backups", "/api/backups"),
+    ("updates", "/api/updates"),
+    ("logs-query", "/api/logs/query?q=error&limit=50"),
+    ("openmetrics", "/metrics"),
+    ("logs-stream-open", "/api/logs?n=50"),  # time to the first event of a new console stream
+]
+
+STUBS = {
+    "sudo": """#!/bin/bash
+# Run the command directly; /usr/local/bin helpers resolve to the stubs here.
+cmd="$1"; shift
+case "${cmd}" in /usr/local/bin/*) cmd="$(dirname "$0")/$(basename "${cmd}")" ;; esac
+exec "${cmd}" "$@"
+""",
+    "systemctl": """#!/bin/bash
+[ "$1" = show ] || exit 0
+shift
+for unit in "$@"; do
+  case "${unit}" in -*) continue ;; esac
+  printf 'Id=%s.service\\nLoadState=loaded\\nActiveState=active\\nSubState=running\\nResult=success\\nMainPID=%s\\nNRestarts=0\\nExecMainStartTimestamp=Sat 2026-01-03 10:00:00 UTC\\nExecMainStartTimestampMonotonic=1000000\\nMemoryCurrent=8589934592\\nCPUUsageNSec=5000000000\\n\\n' "${unit}" "$$"
+done
+""",
+    "journalctl": """#!/bin/bash
+# A chatty server: a backlog of mixed lines, then (with -f) one line every 10 ms.
+# Prints -o json entries (with cursors) when asked, short-iso text otherwise.
+json=0
+case " $* " in *" -o json "*) json=1 ;; esac
+entry() {  # seqnum, epoch seconds, message
+  if [ "${json}" = 1 ]; then
+    printf '{"__CURSOR":"s=bench;i=%x","__REALTIME_TIMESTAMP":"%d000000","_HOSTNAME":"host","SYSLOG_IDENTIFIER":"RustDedicated","_PID":"1","MESSAGE":"%s"}\\n' "$1" "$2" "$3"
+  else
+    printf '%s host RustDedicated[1]: %s\\n' "$(date -u -d "@$2" +%Y-%m-%dT%H:%M:%S+0000)" "$3"
+  fi
+}
+base=1767434400  # 2026-01-03T10:00:00Z
+for i in $(seq 1 2000); do
+  entry "${i}" $((base + i % 3600)) "[Oxide] player${i} connected, error count $((i % 7))"
+done
+for i in 2001 2002 2003; do  # an exception storm: identical lines within one second
+  entry "${i}" $((base + 2001)) "NullReferenceException: burst in OnTick"
+done
+case " $* " in *" -f "*) ;; *) exit 0 ;; esac
+i=2003
+while sleep 0.01; do
+  i=$((i + 1))
+  entry "${i}" $((base + 3600)) "live line ${i}" || exit 0
+done
+""",
+    "rust_update.sh": """#!/bin/bash
+# SteamCMD stand-in: a slow --check, as app_info_update is in practice.
+sleep 0.5
+echo "installed=100"
+echo "latest=101"
+""",
+    "oxide_update.sh": """#!/bin/bash
+sleep 0.2
+echo "installed=2.0.1"
+echo "latest=2.0.2"
+""",
+}
+
+
+def write_stubs(bin_dir: Path) -> None:
+    bin_dir.mkdir(parents=True)
+    for name, body in STUBS.items():
+        path = bin_dir / name
+        path.write_text(body)
+        path.chmod(path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+
+def build_file_root(root: Path, files: int, big_files: int, backup_gb: int) -> None:
+    """A server tree with one huge directory, big sparse files and a multi-GB backup directory."""
+    big = root / "big"
+    big.mkdir(parents=True)
+    for i in range(files):
+        (big / f"file{i:06d}.cfg").write_bytes(b"x" * (i % 512))
+    (root / "server" / "bench" / "cfg").mkdir(parents=True)
+    (root / "server" / "bench" / "cfg" / "server.cfg").write_text("server.hostname \"bench\"\n")
+    blobs = root / "blobs"
+    blobs.mkdir()
+    for i in range(big_files):
+        with open(blobs / f"proceduralmap.{i}.map", "wb") as fh:
+            fh.truncate(1 << 30)  # sparse: size without disk use
+    backups = root / "backups"
+    backups.mkdir()
+    for i in range(max(backup_gb, 1)):
+        with open(backups / f"bench-{i:03d}.tar.gz", "wb") as fh:
+            fh.truncate(1 << 30)
+        os.utime(backups / f"bench-{i:03d}.tar.gz", (time.time() - i * 3600,) * 2)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_panel(work: Path, args) -> tuple[subprocess.Popen, int]:
+    port = free_port()
+    env = dict(os.environ)
+    env.update({
+        "PATH": f"{work / 'bin'}{os.pathsep}{env.get('PATH', '')}",
+        "RUSTPANEL_CONFIG_FILE": str(work / "config.json"),
+        "RUSTPANEL_CACHE_DIR": str(work / "cache"),
+        "RUSTPANEL_TOKEN": TOKEN,
+        "PANEL_FILE_ROOT": str(work / "root"),
+        "RUST_DIR": str(work / "root"),
+        "STEAMCMD": str(work / "bin" / "rust_update.sh"),
+    })
+    cmd = [sys.executable, str(REPO / "app.py"), "serve", "--host", "127.0.0.1", "--port", str(port),
+           "--threads", str(args.threads), "--server", args.server]
+    log = open(work / "panel.log", "wb")
+    proc = subprocess.Popen(cmd, env=env, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            sys.exit(f"panel exited with {proc.returncode}; see {work / 'panel.log'}")
+        try:
+            status, _, _ = request(port, "/api/status")
+            if status == 200:
+                return proc, port
+        except OSError:
+            pass
+        time.sleep(0.2)
+    stop_panel(proc)
+    sys.exit("panel did not come up within 30s")
+
+
+def stop_panel(proc: subprocess.Popen) -> None:
+    if proc.poll() is None:
+        os.killpg(proc.pid, signal.SIGTERM)
+        try:
+            proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+            proc.wait()
+
+
+def request(port: int, path: str, conn: http.client.HTTPConnection | None = None):
+    """One GET; returns (status, headers, body). Reuses `conn` when given."""
+    own = conn is None
+    conn = conn or http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        conn.request("GET", path, headers=HEADERS)
+        response = conn.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        if own:
+            conn.close()
+
+
+def open_stream(port: int, path: str) -> socket.socket:
+    """Open an SSE stream and wait for its first event."""
+    sock = socket.create_connection(("127.0.0.1", port), timeout=30)
+    sock.sendall(f"GET {path} HTTP/1.1\r\nHost: bench\r\nX-Auth-Token: {TOKEN}\r\n\r\n".encode())
+    data = b""
+    while b"\ndata:" not in data and b"\n: " not in data:
+        chunk = sock.recv(65536)
+        if not chunk:
+            raise OSError("stream closed")
+        data += chunk
+    if not data.startswith(b"HTTP/1.1 200"):
+        raise OSError(data.split(b"\r\n", 1)[0].decode(errors="replace"))
+    return sock
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(int(q * len(sorted_values)), len(sorted_values) - 1)]
+
+
+def run_scenario(port: int, name: str, path: str, requests: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+    remaining = [requests]
+    streaming = name == "logs-stream-open"
+
+    def worker():
+        nonlocal errors
+        conn = None if streaming else http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    break
+                remaining[0] -= 1
+            started = time.perf_counter()
+            try:
+                if streaming:
+                    open_stream(port, path).close()
+                    ok = True
+                else:
+                    status, _, _ = request(port, path, conn)
+                    ok = status == 200
+            except (OSError, http.client.HTTPException):
+                ok = False
+                if conn is not None:
+                    conn.close()
+                    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            elapsed = time.perf_counter() - started
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+        if conn is not None:
+            conn.close()
+
+    request(port, path if not streaming else "/api/status")  # warm caches the way a first visitor would
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "name": name,
+        "path": path,
+        "requests": requests,
+        "errors": errors,
+        "rps": len(latencies) / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": (latencies[-1] if latencies else float("nan")) * 1000,
+    }
+
+
+def check_log_index(port: int) -> list[str]:
+    """The stub journal's burst of identical same-second lines must be indexed once each, no more, no less."""
+    deadline = time.monotonic() + 30
+    while True:
+        _, _, body = request(port, "/api/logs/query?q=burst+in+OnTick&limit=10")
+        found = len(json.loads(body).get("events", []))
+        if found >= 3 or time.monotonic() > deadline:
+            break
+        time.sleep(0.5)
+    return [] if found == 3 else [f"log index: {found} of 3 identical same-second lines indexed"]
+
+
+def spawn_total(port: int) -> int:
+    _, _, body = request(port, "/api/admin/stats")
+    return sum(row["count"] for row in json.loads(body)["spawns"])
+
+
+def compare(results: list[dict], baseline_file: Path, tolerance: float) -> list[str]:
+    baseline = {row["name"]: row for row in json.loads(baseline_file.read_text())["scenarios"]}
+    problems = []
+    for row in results:
+        base = baseline.get(row["name"])
+        if not base:
+            continue
+        # Ignore sub-5ms wobble: at that scale scheduling noise dominates.
+        if row["p99_ms"] > base["p99_ms"] * (1 + tolerance) and row["p99_ms"] - base["p99_ms"] > 5:
+            problems.append(f"{row['name']}: p99 {row['p99_ms']:.1f}ms vs {base['p99_ms']:.1f}ms")
+        if row["rps"] < base["rps"] / (1 + tolerance):
+            problems.append(f"{row['name']}: {row['rps']:.0f} req/s vs {base['rps']:.0f} req/s")
+        if row["errors"] > base["errors"]:
+            problems.append(f"{row['name']}: {row['errors']} errors vs {base['errors']}")
+    return problems
+
+
+def report(meta: dict, results: list[dict], problems: list[str] | None) -> str:
+    lines = [
+        f"rust panel benchmark  {time.strftime('%Y-%m-%d %H:%M:%S')}",
+        "server: {server}  threads: {threads}  concurrency: {concurrency}  held streams: {streams}".format(**meta),
+        "file root: {files} files in one directory, {big_files} GiB sparse files, {backup_gb} GiB of backups".format(**meta),
+        "",
+        f"{'scenario':<20} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7}",
+    ]
+    for row in results:
+        lines.append(f"{row['name']:<20} {row['rps']:>9.1f} {row['p50_ms']:>9.2f} {row['p99_ms']:>9.2f} "
+                     f"{row['max_ms']:>9.2f} {row['errors']:>7}")
+    lines += ["", "panel forks during the run: {spawns} ({spawns_per_second:.1f}/s)".format(**meta)]
+    for row in meta["spawn_programs"]:
+        p99 = f"{row['p99'] * 1000:.0f}ms" if row["p99"] is not None else "slow"
+        lines.append(f"  {row['program']:<18} {row['count']:>7}  p99 <= {p99}")
+    if problems is not None:
+        lines.append("")
+        lines += [f"REGRESSION {p}" for p in problems] or ["no regressions against the baseline"]
+    return "\n".join(lines) + "\n"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=400, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--streams", type=int, default=50, help="console streams held open during the run")
+    parser.add_argument("--threads", type=int, default=256, help="passed to app.py serve")
+    parser.add_argument("--server", choices=["auto", "gunicorn", "werkzeug"], default="auto")
+    parser.add_argument("--files", type=int, default=20000, help="files in the large directory")
+    parser.add_argument("--big-files", type=int, default=4, help="1 GiB sparse files in the file root")
+    parser.add_argument("--backup-gb", type=int, default=8, help="GiB of (sparse) backup archives")
+    parser.add_argument("--only", action="append", help="run only these scenarios (repeatable)")
+    parser.add_argument("--output", type=Path, default=Path("bench_output.txt"))
+    parser.add_argument("--json", type=Path, help="also write the results as JSON (usable as a baseline)")
+    parser.add_argument("--baseline", type=Path, help="JSON from an earlier --json run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown before a regression")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary work directory")
+    args = parser.parse_args()
+
+    scenarios = [s for s in SCENARIOS if not args.only or s[0] in args.only]
+    work = Path(tempfile.mkdtemp(prefix="rustpanel-bench."))
+    write_stubs(work / "bin")
+    build_file_root(work / "root", args.files, args.big_files, args.backup_gb)
+    proc, port = start_panel(work, args)
+    streams: list[socket.socket] = []
+    try:
+        _, headers, _ = request(port, "/api/status")
+        for _ in range(args.streams):
+            streams.append(open_stream(port, "/api/logs?n=50"))
+        spawns_before, started = spawn_total(port), time.monotonic()
+        results = []
+        for name, path in scenarios:
+            results.append(run_scenario(port, name, path, args.requests, args.concurrency))
+            print(f"{name:<20} {results[-1]['rps']:>9.1f} req/s  p99 {results[-1]['p99_ms']:.2f} ms", flush=True)
+        spawns = spawn_total(port) - spawns_before
+        elapsed = time.monotonic() - started
+        failures = check_log_index(port)
+        _, _, body = request(port, "/api/admin/stats")
+        meta = {
+            "server": headers.get("Server", "?"), "threads": args.threads, "concurrency": args.concurrency,
+            "streams": len(streams), "files": args.files, "big_files": args.big_files,
+            "backup_gb": args.backup_gb, "spawns": spawns, "spawns_per_second": spawns / elapsed,
+            "spawn_programs": json.loads(body)["spawns"],
+        }
+    finally:
+        for sock in streams:
+            sock.close()
+        stop_panel(proc)
+        if not args.keep:
+            shutil.rmtree(work, ignore_errors=True)
+        else:
+            print(f"work directory kept: {work}")
+
+    problems = compare(results, args.baseline, args.tolerance) if args.baseline else None
+    text = report(meta, results, problems) + "".join(f"CHECK FAILED {f}\n" for f in failures)
+    args.output.write_text(text)
+    print("\n" + text, end="")
+    if args.json:
+        args.json.write_text(json.dumps({"meta": meta, "scenarios": results}, indent=2))
+    return 1 if problems or failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -66,8 +66,8 @@ Rust-La-Panel installed into: ${INSTALL_DIR}
 Python virtual environment: ${VENV_DIR}
 
 To run the application manually:
-  ${VENV_DIR}/bin/python ${APP_DIR}/app.py
+  ${VENV_DIR}/bin/python ${APP_DIR}/app.py serve
 
 For systemd integration, create a unit similar to the example in README.md with:
-  ExecStart=${VENV_DIR}/bin/python ${APP_DIR}/app.py
+  ExecStart=${VENV_DIR}/bin/python ${APP_DIR}/app.py serve
 MSG
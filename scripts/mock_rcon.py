@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""mock_rcon.py — a stand-in Rust WebRCON server for trying the panel offline.
+
+Usage: mock_rcon.py [--host 127.0.0.1] [--port 28016] [--password secret]
+                    [--log-interval 5] [--reply-delay 0] [--save-delay 1]
+
+Point the panel at it (rcon_host / rcon_port / rcon_password) and use the
+RCON console as if a real server were running. It understands `serverinfo`,
+`save` / `server.save`, `say`, `playerlist`, `status` and `echo`; anything
+else gets the same "Command not found" warning the game prints.
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import socketserver
+import struct
+import threading
+import time
+
+WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+STARTED = time.time()
+
+
+def recv_exact(sock, count):
+    data = b""
+    while len(data) < count:
+        chunk = sock.recv(count - len(data))
+        if not chunk:
+            raise ConnectionError("client went away")
+        data += chunk
+    return data
+
+
+def send_frame(sock, lock, opcode, payload):
+    header = bytearray([0x80 | opcode])
+    if len(payload) < 126:
+        header.append(len(payload))
+    elif len(payload) < 1 << 16:
+        header += bytes([126]) + struct.pack("!H", len(payload))
+    else:
+        header += bytes([127]) + struct.pack("!Q", len(payload))
+    with lock:
+        sock.sendall(bytes(header) + payload)
+
+
+def recv_frame(sock):
+    first, second = recv_exact(sock, 2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", recv_exact(sock, 2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", recv_exact(sock, 8))[0]
+    mask = recv_exact(sock, 4) if second & 0x80 else b"\0\0\0\0"
+    payload = recv_exact(sock, length) if length else b""
+    return first & 0x0F, bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+
+class World:
+    """Fake game state that `serverinfo` reports and `save` touches."""
+
+    def __init__(self):
+        self.entities = 180_000
+        self.players = 0
+        self.lock = threading.Lock()
+
+    def tick(self):
+        with self.lock:
+            self.entities += random.randint(-50, 120)
+            self.players = max(0, min(100, self.players + random.randint(-2, 3)))
+
+    def serverinfo(self):
+        with self.lock:
+            return {
+                "Hostname": "Mock Rust Server",
+                "MaxPlayers": 100,
+                "Players": self.players,
+                "Queued": 0,
+                "Joining": 0,
+                "EntityCount": self.entities,
+                "GameTime": time.strftime("%m/%d/%Y %H:%M:%S"),
+                "Uptime": int(time.time() - STARTED),
+                "Map": "Procedural Map",
+                "Framerate": round(random.uniform(55, 61), 1),
+                "Memory": 6000 + self.entities // 100,
+                "MemoryUsageSystem": 9000 + self.entities // 80,
+                "Collections": 120,
+                "NetworkIn": random.randint(20_000, 90_000),
+                "NetworkOut": random.randint(100_000, 900_000),
+                "Restarting": False,
+                "SaveCreatedTime": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+
+
+class Handler(socketserver.BaseRequestHandler):
+    def setup(self):
+        self.send_lock = threading.Lock()
+
+    def send_message(self, message, identifier=0, kind="Generic"):
+        body = json.dumps({"Message": message, "Identifier": identifier, "Type": kind, "Stacktrace": ""})
+        send_frame(self.request, self.send_lock, 0x1, body.encode())
+
+    def handshake(self):
+        data = b""
+        while b"\r\n\r\n" not in data:
+            chunk = self.request.recv(4096)
+            if not chunk:
+                return False
+            data += chunk
+        lines = data.decode("latin-1").split("\r\n")
+        path = lines[0].split()[1] if len(lines[0].split()) > 1 else ""
+        headers = {k.strip().lower(): v.strip() for k, _, v in (line.partition(":") for line in lines[1:] if line)}
+        if path != "/" + self.server.password:
+            self.request.sendall(b"HTTP/1.1 401 Unauthorized\r\nContent-Length: 0\r\n\r\n")
+            return False
+        accept = base64.b64encode(hashlib.sha1(headers.get("sec-websocket-key", "").encode() + WS_GUID).digest())
+        self.request.sendall(
+            b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n"
+        )
+        return True
+
+    def handle(self):
+        if not self.handshake():
+            return
+        self.server.clients.add(self)
+        try:
+            while True:
+                opcode, payload = recv_frame(self.request)
+                if opcode == 0x8:
+                    send_frame(self.request, self.send_lock, 0x8, payload[:2])
+                    return
+                if opcode == 0x9:
+                    send_frame(self.request, self.send_lock, 0xA, payload)
+                    continue
+                if opcode != 0x1:
+                    continue
+                request = json.loads(payload)
+                threading.Thread(target=self.execute, args=(request,), daemon=True).start()
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            self.server.clients.discard(self)
+
+    def execute(self, request):
+        identifier = request.get("Identifier", 0)
+        command = str(request.get("Message", "")).strip()
+        name, _, args = command.partition(" ")
+        time.sleep(self.server.reply_delay)
+        try:
+            if name == "serverinfo":
+                self.send_message(json.dumps(self.server.world.serverinfo(), indent=2), identifier)
+            elif name in ("save", "server.save"):
+                entities = self.server.world.entities
+                self.send_message(f"Saving {entities:,} entities", identifier)
+                time.sleep(self.server.save_delay)
+                self.server.broadcast(f"Saved {entities:,} ents, cache(0.31), write(0.05), disk(0.04).")
+            elif name in ("say", "global.say"):
+                chat = {"Channel": 0, "Message": args, "UserId": "0", "Username": "SERVER", "Color": "#eee", "Time": int(time.time())}
+                self.server.broadcast(json.dumps(chat), kind="Chat")
+                self.send_message("", identifier)
+            elif name in ("playerlist", "global.playerlist"):
+                self.send_message("[]", identifier)
+            elif name == "status":
+                info = self.server.world.serverinfo()
+                self.send_message(f"hostname: {info['Hostname']}\nplayers : {info['Players']} ({info['MaxPlayers']} max)", identifier)
+            elif name == "echo":
+                self.send_message(args, identifier)
+            else:
+                self.send_message(f"Command '{name}' not found", identifier, kind="Warning")
+        except OSError:
+            pass
+
+
+class MockServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, password, reply_delay, save_delay):
+        super().__init__(address, Handler)
+        self.password = password
+        self.reply_delay = reply_delay
+        self.save_delay = save_delay
+        self.world = World()
+        self.clients = set()
+
+    def broadcast(self, message, kind="Generic"):
+        for client in list(self.clients):
+            try:
+                client.send_message(message, 0, kind)
+            except OSError:
+                self.clients.discard(client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("RUST_RCON_PORT", "28016")))
+    parser.add_argument("--password", default=os.environ.get("RUST_RCON_PASSWORD", "secret"))
+    parser.add_argument("--log-interval", type=float, default=5.0, help="seconds between fake console lines (0 = off)")
+    parser.add_argument("--reply-delay", type=float, default=0.0, help="delay before answering each command")
+    parser.add_argument("--save-delay", type=float, default=1.0, help="time a save takes to complete")
+    args = parser.parse_args()
+
+    server = MockServer((args.host, args.port), args.password, args.reply_delay, args.save_delay)
+
+    def chatter():
+        while args.log_interval > 0:
+            time.sleep(args.log_interval)
+            server.world.tick()
+            server.broadcast(f"[mock] {server.world.players} players, {server.world.entities:,} entities")
+
+    threading.Thread(target=chatter, daemon=True).start()
+    print(f"Mock RCON listening on ws://{args.host}:{args.port}/{args.password}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,168 @@
 #!/bin/bash
-# oxide_update.sh — usage: oxide_update.sh <DIRECT_ZIP_URL>
-# Downloads a Linux Oxide/Carbon ZIP and extracts into the Rust server dir.
+# oxide_update.sh — usage: oxide_update.sh [--check|--force] <DIRECT_ZIP_URL>
+#                          oxide_update.sh [--force] --zip <FILE> [--release <ID>]
+#                          oxide_update.sh --rollback
+# Downloads a Linux Oxide/Carbon ZIP (or takes one the panel already fetched)
+# and installs it into the Rust server dir.
+# The release that was installed is recorded in ${RUST_DIR}/.oxide_release, and
+# the install is skipped when the URL still resolves to that release.
+#   --check     print the installed and latest release and exit
+#   --force     install even when the release is already installed
+#   --rollback  put back the files the last install replaced or added
+# Only files whose content differs are written. The files an install replaces
+# are moved to ${RUST_DIR}/.oxide_rollback/<time>/ together with a list of the
+# files it added, so the previous version can be restored without a download.
 set -euo pipefail
-if [ $# -lt 1 ]; then
-  echo "Usage: $0 <DIRECT_ZIP_URL>"
+MODE=update
+ZIP_FILE=""
+RELEASE=""
+while [ $# -gt 0 ]; do
+  case "$1" in
+    --check) MODE=check ;;
+    --force) MODE=force ;;
+    --rollback) MODE=rollback ;;
+    --zip) ZIP_FILE="${2:-}"; shift ;;
+    --release) RELEASE="${2:-}"; shift ;;
+    -*) echo "Unknown option: $1" >&2; exit 2 ;;
+    *) break ;;
+  esac
+  shift
+done
+ZIP_URL="${1:-}"
+if [ "${MODE}" != rollback ] && [ -z "${ZIP_URL}" ] && [ -z "${ZIP_FILE}" ]; then
+  echo "Usage: $0 [--check|--force] <DIRECT_ZIP_URL> | [--force] --zip <FILE> [--release <ID>] | --rollback"
   exit 2
 fi
-ZIP_URL="$1"
 STEAM_USER="${STEAM_USER:-steam}"
 STEAM_HOME="${STEAM_HOME:-/home/${STEAM_USER}}"
 RUST_DIR="${RUST_DIR:-${STEAM_HOME}/rust-server}"
+MARKER="${RUST_DIR}/.oxide_release"
+ROLLBACK_DIR="${RUST_DIR}/.oxide_rollback"
+ROLLBACK_KEEP="${OXIDE_ROLLBACK_KEEP:-3}"
 
-TMP_ZIP="/tmp/oxide_update.zip"
-echo "Downloading: ${ZIP_URL}"
-curl -fsSL "${ZIP_URL}" -o "${TMP_ZIP}"
-echo "Extracting into ${RUST_DIR} ..."
-# Ensure unzip exists
-if ! command -v unzip >/dev/null 2>&1; then
-  apt-get update && apt-get install -y unzip
+# Identify the release behind a URL without downloading it: the GitHub release
+# tag from the redirect chain, otherwise the final response's ETag or
+# Last-Modified/Content-Length.
+release_id() {
+  local headers tag etag
+  headers="$(curl -fsSIL --max-time 30 "$1" | tr -d '\r')" || return 1
+  tag="$(printf '%s\n' "${headers}" | sed -n 's#^location: .*/releases/download/\([^/]*\)/.*#\1#Ip' | head -n 1)"
+  if [ -n "${tag}" ]; then
+    echo "${tag}"
+    return
+  fi
+  etag="$(printf '%s\n' "${headers}" | sed -n 's/^etag: *//Ip' | tail -n 1)"
+  if [ -n "${etag}" ]; then
+    echo "etag:${etag}"
+    return
+  fi
+  printf '%s\n' "${headers}" | awk 'tolower($1) == "last-modified:" { $1 = ""; sub(/^ +/, ""); modified = $0 }
+    tolower($1) == "content-length:" { length_ = $2 }
+    END { if (modified != "") print "modified:" modified " size:" length_ }'
+}
+
+as_steam() {
+  sudo -u "${STEAM_USER}" "$@"
+}
+
+need() {
+  if ! command -v "$1" >/dev/null 2>&1; then
+    apt-get update && apt-get install -y "$1"
+  fi
+}
+
+if [ "${MODE}" = rollback ]; then
+  LAST="$(find "${ROLLBACK_DIR}" -mindepth 1 -maxdepth 1 -type d 2>/dev/null | sort | tail -n 1)"
+  if [ -z "${LAST}" ]; then
+    echo "No Oxide install to roll back." >&2
+    exit 1
+  fi
+  echo "Rolling back to $(cat "${LAST}/previous" 2>/dev/null || echo 'the previous files') ..."
+  if [ -d "${LAST}/files" ]; then
+    while IFS= read -r -d '' saved; do
+      as_steam mv -f "${saved}" "${RUST_DIR}/${saved#"${LAST}/files/"}"
+    done < <(find "${LAST}/files" -type f -print0)
+  fi
+  while IFS= read -r path; do
+    [ -n "${path}" ] && rm -f -- "${RUST_DIR}/${path}"
+  done < "${LAST}/added"
+  if [ -s "${LAST}/previous" ]; then
+    cp "${LAST}/previous" "${MARKER}"
+    chown "${STEAM_USER}:${STEAM_USER}" "${MARKER}"
+  else
+    rm -f "${MARKER}"
+  fi
+  rm -rf "${LAST}"
+  echo "Oxide rollback complete."
+  exit 0
+fi
+
+INSTALLED="$(cat "${MARKER}" 2>/dev/null || true)"
+if [ -z "${ZIP_FILE}" ] && [ -z "${RELEASE}" ]; then
+  RELEASE="$(release_id "${ZIP_URL}" || true)"
+fi
+
+if [ "${MODE}" = check ]; then
+  echo "installed=${INSTALLED}"
+  echo "latest=${RELEASE}"
+  [ -n "${RELEASE}" ]
+  exit
 fi
+
+if [ "${MODE}" = update ] && [ -n "${RELEASE}" ] && [ "${RELEASE}" = "${INSTALLED}" ]; then
+  echo "Oxide is already at ${INSTALLED}; nothing to do."
+  exit 0
+fi
+
+need unzip
+WORK="$(mktemp -d /tmp/oxide_update.XXXXXX)"
+trap 'rm -rf "${WORK}"' EXIT
+chown "${STEAM_USER}:${STEAM_USER}" "${WORK}"
+
+if [ -n "${ZIP_FILE}" ]; then
+  install -m 0644 -o "${STEAM_USER}" "${ZIP_FILE}" "${WORK}/oxide.zip"
+else
+  echo "Downloading: ${ZIP_URL}${RELEASE:+ (${RELEASE})}"
+  curl -fsSL "${ZIP_URL}" -o "${WORK}/oxide.zip"
+  chown "${STEAM_USER}:${STEAM_USER}" "${WORK}/oxide.zip"
+fi
+unzip -tq "${WORK}/oxide.zip" >/dev/null
+
 # Extract as steam user to keep ownership sane
-chown "${STEAM_USER}:${STEAM_USER}" "${TMP_ZIP}"
-sudo -u "${STEAM_USER}" bash -lc "unzip -o ${TMP_ZIP} -d \"${RUST_DIR}\""
-rm -f "${TMP_ZIP}"
+as_steam unzip -q "${WORK}/oxide.zip" -d "${WORK}/files"
+STAMP="$(date +%Y%m%d-%H%M%S).$$"
+BACKUP="${ROLLBACK_DIR}/${STAMP}"
+as_steam mkdir -p "${BACKUP}"
+printf '%s\n' "${INSTALLED}" > "${BACKUP}/previous"
+: > "${BACKUP}/added"
+echo "Installing into ${RUST_DIR} (changed files only) ..."
+WRITTEN=0
+while IFS= read -r -d '' src; do
+  rel="${src#"${WORK}/files/"}"
+  dest="${RUST_DIR}/${rel}"
+  if [ -f "${dest}" ] && cmp -s "${src}" "${dest}"; then
+    continue
+  fi
+  as_steam mkdir -p "$(dirname "${dest}")"
+  if [ -e "${dest}" ]; then
+    # Keep the old inode as the rollback copy (a hard link costs nothing).
+    as_steam mkdir -p "$(dirname "${BACKUP}/files/${rel}")"
+    as_steam ln "${dest}" "${BACKUP}/files/${rel}" 2>/dev/null || as_steam cp -p "${dest}" "${BACKUP}/files/${rel}"
+  else
+    printf '%s\n' "${rel}" >> "${BACKUP}/added"
+  fi
+  # Swap the new file in by rename so a running server keeps its open copy intact.
+  as_steam cp "${src}" "${dest}.oxide-new"
+  as_steam mv -f "${dest}.oxide-new" "${dest}"
+  WRITTEN=$((WRITTEN + 1))
+done < <(find "${WORK}/files" -type f -print0)
+echo "${WRITTEN} files written, $(wc -l < "${BACKUP}/added") of them new."
+
+if [ -n "${RELEASE}" ]; then
+  printf '%s\n' "${RELEASE}" > "${MARKER}"
+  chown "${STEAM_USER}:${STEAM_USER}" "${MARKER}"
+else
+  rm -f "${MARKER}"
+fi
+find "${ROLLBACK_DIR}" -mindepth 1 -maxdepth 1 -type d | sort | head -n "-${ROLLBACK_KEEP}" | xargs -r rm -rf
 echo "Oxide update complete."
@@ -1,19 +1,81 @@
 #!/bin/bash
 # rust_update.sh — run as root via sudoers; drops to steam user and runs SteamCMD update
+# usage: rust_update.sh [--check] [--no-validate] [--force]
+#   --check        print the installed and latest public build ids and exit
+#   --no-validate  skip SteamCMD's full re-hash of every installed file
+#   --force        update even when the installed build is already the latest
 set -euo pipefail
 STEAM_USER="${STEAM_USER:-steam}"
 STEAM_HOME="${STEAM_HOME:-/home/${STEAM_USER}}"
 STEAMCMD="${STEAMCMD:-${STEAM_HOME}/steamcmd/steamcmd.sh}"
 INSTALL_DIR="${RUST_DIR:-${STEAM_HOME}/rust-server}"
+APP_ID=258550
+PACKAGES=(ca-certificates curl wget tar lib32gcc-s1 lib32stdc++6)
+
+MODE=update
+VALIDATE=validate
+FORCE=0
+for arg in "$@"; do
+  case "${arg}" in
+    --check) MODE=check ;;
+    --no-validate) VALIDATE= ;;
+    --force) FORCE=1 ;;
+    *) echo "Usage: $0 [--check] [--no-validate] [--force]" >&2; exit 2 ;;
+  esac
+done
 
 if ! id "${STEAM_USER}" >/dev/null 2>&1; then
   echo "Steam user ${STEAM_USER} does not exist. Please create it before running this script." >&2
   exit 1
 fi
 
-echo "Ensuring required packages are installed ..."
-apt-get update >/dev/null
-apt-get install -y --no-install-recommends ca-certificates curl wget tar lib32gcc-s1 lib32stdc++6 >/dev/null
+# Build id SteamCMD recorded for the installed copy (empty when not installed).
+installed_build() {
+  sed -n 's/^[[:space:]]*"buildid"[[:space:]]*"\([0-9]*\)".*/\1/p' \
+    "${INSTALL_DIR}/steamapps/appmanifest_${APP_ID}.acf" 2>/dev/null | head -n 1
+}
+
+# Current build id of the public branch, read from a freshly updated app info cache.
+latest_build() {
+  sudo -u "${STEAM_USER}" bash -lc "\"${STEAMCMD}\" +login anonymous +app_info_update 1 +app_info_print ${APP_ID} +quit" 2>/dev/null \
+    | tr -d '\r' \
+    | awk '/"branches"/ { branches = 1 } branches && /"public"/ { public = 1 }
+           public && /"buildid"/ { gsub(/[^0-9]/, "", $2); print $2; exit }'
+}
+
+if [ "${MODE}" = check ]; then
+  if [ ! -x "${STEAMCMD}" ]; then
+    echo "SteamCMD not found at ${STEAMCMD}." >&2
+    exit 1
+  fi
+  LATEST="$(latest_build || true)"
+  echo "installed=$(installed_build)"
+  echo "latest=${LATEST}"
+  [ -n "${LATEST}" ]
+  exit
+fi
+
+INSTALLED="$(installed_build)"
+if [ "${FORCE}" -eq 0 ] && [ -n "${INSTALLED}" ] && [ -x "${STEAMCMD}" ]; then
+  echo "Checking for a newer build ..."
+  LATEST="$(latest_build || true)"
+  if [ "${LATEST}" = "${INSTALLED}" ]; then
+    echo "Rust is already at build ${INSTALLED}; nothing to do."
+    echo "installed=${INSTALLED}"
+    exit 0
+  fi
+  echo "Build ${INSTALLED} installed, ${LATEST:-unknown} available."
+fi
+
+MISSING=()
+for pkg in "${PACKAGES[@]}"; do
+  dpkg-query -W -f='${Status}' "${pkg}" 2>/dev/null | grep -q "ok installed" || MISSING+=("${pkg}")
+done
+if [ "${#MISSING[@]}" -gt 0 ]; then
+  echo "Installing missing packages: ${MISSING[*]} ..."
+  apt-get update >/dev/null
+  apt-get install -y --no-install-recommends "${MISSING[@]}" >/dev/null
+fi
 
 if [ ! -x "${STEAMCMD}" ]; then
   echo "SteamCMD not found at ${STEAMCMD}. Installing to ${STEAM_HOME}/steamcmd ..."
@@ -22,8 +84,12 @@ fi
 
 echo "Creating install directory ${INSTALL_DIR} ..."
 mkdir -p "${INSTALL_DIR}"
-chown -R "${STEAM_USER}:${STEAM_USER}" "${INSTALL_DIR}"
+# A recursive chown walks every installed file; only do it when ownership is off.
+if [ "$(stat -c %U "${INSTALL_DIR}")" != "${STEAM_USER}" ]; then
+  chown -R "${STEAM_USER}:${STEAM_USER}" "${INSTALL_DIR}"
+fi
 
-echo "Updating Rust server with SteamCMD ..."
-sudo -u "${STEAM_USER}" bash -lc ""${STEAMCMD}" +login anonymous +force_install_dir \"${INSTALL_DIR}\" +app_update 258550 validate +quit"
+echo "Updating Rust server with SteamCMD${VALIDATE:+ (validating files)} ..."
+sudo -u "${STEAM_USER}" bash -lc "\"${STEAMCMD}\" +login anonymous +force_install_dir \"${INSTALL_DIR}\" +app_update ${APP_ID} ${VALIDATE} +quit"
+echo "installed=$(installed_build)"
 echo "Done."